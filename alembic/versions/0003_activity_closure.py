@@ -0,0 +1,43 @@
+"""activity closure table
+
+Revision ID: 0003_activity_closure
+Revises: 0002_seed
+Create Date: 2026-10-16
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003_activity_closure"
+down_revision = "0002_seed"
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_table(
+        "activity_closure",
+        sa.Column("ancestor_id", sa.Integer(), sa.ForeignKey("activities.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("descendant_id", sa.Integer(), sa.ForeignKey("activities.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("depth", sa.Integer(), nullable=False),
+    )
+    op.create_index("ix_activity_closure_descendant_id", "activity_closure", ["descendant_id"])
+    op.create_index("ix_organization_activity_activity_id", "organization_activity", ["activity_id"])
+
+    # Заполнение замыкания для уже существующего дерева
+    op.execute(sa.text("""
+        INSERT INTO activity_closure (ancestor_id, descendant_id, depth)
+        WITH RECURSIVE act_tree AS (
+            SELECT id AS ancestor_id, id AS descendant_id, 0 AS depth FROM activities
+            UNION ALL
+            SELECT t.ancestor_id, a.id, t.depth + 1
+            FROM activities a
+            JOIN act_tree t ON a.parent_id = t.descendant_id
+        )
+        SELECT ancestor_id, descendant_id, depth FROM act_tree;
+    """))
+
+def downgrade() -> None:
+    op.drop_index("ix_organization_activity_activity_id", table_name="organization_activity")
+    op.drop_index("ix_activity_closure_descendant_id", table_name="activity_closure")
+    op.drop_table("activity_closure")
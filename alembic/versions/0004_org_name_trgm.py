@@ -0,0 +1,24 @@
+"""trigram index for organization name search
+
+Revision ID: 0004_org_name_trgm
+Revises: 0003_activity_closure
+Create Date: 2026-10-16
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004_org_name_trgm"
+down_revision = "0003_activity_closure"
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.execute(sa.text("CREATE EXTENSION IF NOT EXISTS pg_trgm;"))
+    op.execute(sa.text(
+        "CREATE INDEX ix_organizations_name_trgm ON organizations USING gin (lower(name) gin_trgm_ops);"
+    ))
+
+def downgrade() -> None:
+    op.execute(sa.text("DROP INDEX IF EXISTS ix_organizations_name_trgm;"))
@@ -0,0 +1,22 @@
+"""composite index on building coordinates
+
+Revision ID: 0005_building_coords_index
+Revises: 0004_org_name_trgm
+Create Date: 2026-10-16
+
+"""
+
+from alembic import op
+
+revision = "0005_building_coords_index"
+down_revision = "0004_org_name_trgm"
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_index("ix_buildings_lat_lon", "buildings", ["latitude", "longitude", "id"])
+    op.create_index("ix_organizations_building_id", "organizations", ["building_id"])
+
+def downgrade() -> None:
+    op.drop_index("ix_organizations_building_id", table_name="organizations")
+    op.drop_index("ix_buildings_lat_lon", table_name="buildings")
@@ -0,0 +1,33 @@
+"""row version columns for ETag
+
+Revision ID: 0006_row_versions
+Revises: 0005_building_coords_index
+Create Date: 2026-10-17
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006_row_versions"
+down_revision = "0005_building_coords_index"
+branch_labels = None
+depends_on = None
+
+VERSIONED_TABLES = ("organizations", "buildings", "activities", "phones")
+
+def upgrade() -> None:
+    op.execute(sa.schema.CreateSequence(sa.Sequence("row_version_seq")))
+    for table in VERSIONED_TABLES:
+        # Существующие строки получают различные версии из последовательности
+        op.add_column(
+            table,
+            sa.Column("version", sa.BigInteger(), nullable=False, server_default=sa.text("nextval('row_version_seq')")),
+        )
+        op.create_index(f"ix_{table}_version", table, ["version"])
+
+def downgrade() -> None:
+    for table in VERSIONED_TABLES:
+        op.drop_index(f"ix_{table}_version", table_name=table)
+        op.drop_column(table, "version")
+    op.execute(sa.schema.DropSequence(sa.Sequence("row_version_seq")))
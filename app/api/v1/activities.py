@@ -1,25 +1,55 @@
 import logging
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
 from app.core.security import api_key_auth
-from app.schemas.activity import ActivityOut, ActivityCreate
+from app.core.cache import CachedRoute, cached
+from app.core.etag import check_etag
+from app.core.pagination import PageParams
+from app.core.streaming import stream_requested
+from app.api.v1.org_render import OrgListRenderer
+from app.schemas.activity import ActivityOut, ActivityCreate, ActivityTreeNode
 from app.schemas.organization import OrganizationOut
-from app.crud.activity import create_activity, list_activities
-from app.crud.organization import list_by_activity_with_descendants, list_by_activity_name_with_descendants
+from app.crud.activity import create_activity, list_activities, get_activity_tree
+from app.crud.versions import activities_version
+from app.crud.organization import (
+    list_by_activity_with_descendants, list_by_activity_name_with_descendants, stream_by_activity_with_descendants
+)
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/activities", tags=["activities"], dependencies=[Depends(api_key_auth)])
+router = APIRouter(prefix="/activities", tags=["activities"], dependencies=[Depends(api_key_auth)], route_class=CachedRoute)
 
-@router.get("", response_model=list[ActivityOut])
-async def get_activities(db: AsyncSession = Depends(get_db)):
-    """Список всех видов деятельности (плоский)."""
+async def activities_etag(request: Request, db: AsyncSession = Depends(get_db)) -> None:
+    """Условный GET по версии таблицы видов деятельности."""
+    check_etag(request, await activities_version(db))
+
+@router.get("", response_model=list[ActivityOut], dependencies=[Depends(activities_etag)])
+@cached(ttl=300, tags=("activities",))
+async def get_activities(response: Response, page: PageParams = Depends(), db: AsyncSession = Depends(get_db)):
+    """Список всех видов деятельности (плоский, постранично)."""
     logger.info("API: Запрос списка всех видов деятельности")
-    result = await list_activities(db)
+    activities = await list_activities(db, page.fetch_limit, page.after_key(2))
+    result = page.apply(activities, response, key=lambda act: (act.level, act.id))
     logger.debug(f"API: Возвращено {len(result)} видов деятельности")
     return result
 
+@router.get("/tree", response_model=list[ActivityTreeNode], dependencies=[Depends(activities_etag)])
+@cached(ttl=300, tags=("activities",))
+async def get_activities_tree(
+    root_id: int | None = Query(None, description="Идентификатор корня поддерева"),
+    max_depth: int | None = Query(None, ge=1, le=3, description="Максимальное число уровней в ответе"),
+    db: AsyncSession = Depends(get_db),
+):
+    """Дерево видов деятельности (вложенное).
+
+    Без root_id возвращаются все корневые виды деятельности с потомками.
+    """
+    logger.info(f"API: Запрос дерева видов деятельности: root_id={root_id}, max_depth={max_depth}")
+    result = await get_activity_tree(db, root_id, max_depth)
+    logger.debug(f"API: Возвращено {len(result)} корневых узлов")
+    return result
+
 @router.post("", response_model=ActivityOut, status_code=201)
 async def add_activity(payload: ActivityCreate, db: AsyncSession = Depends(get_db)):
     """Создать вид деятельности с проверкой глубины вложенности.
@@ -32,16 +62,40 @@ async def add_activity(payload: ActivityCreate, db: AsyncSession = Depends(get_d
     return result
 
 @router.get("/{activity_id}/organizations", response_model=list[OrganizationOut])
-async def organizations_by_activity(activity_id: int, db: AsyncSession = Depends(get_db)):
-    """Получить организации по идентификатору вида деятельности (включая дочерние)."""
+@cached(tags=("organizations",))
+async def organizations_by_activity(
+    activity_id: int,
+    response: Response,
+    page: PageParams = Depends(),
+    renderer: OrgListRenderer = Depends(),
+    stream: bool = Depends(stream_requested),
+    db: AsyncSession = Depends(get_db),
+):
+    """Получить организации по идентификатору вида деятельности (включая дочерние).
+
+    В потоковом режиме (stream=1 или Accept: application/x-ndjson) отдаются все
+    организации после курсора в формате NDJSON без ограничения limit.
+    """
+    if stream:
+        logger.info(f"API: Потоковый запрос организаций по виду деятельности: activity_id={activity_id}")
+        return renderer.render_stream(
+            db, lambda session, streamer: stream_by_activity_with_descendants(session, activity_id, page.after_id, streamer)
+        )
     logger.info(f"API: Запрос организаций по виду деятельности: activity_id={activity_id}")
-    result = await list_by_activity_with_descendants(db, activity_id)
+    orgs = await list_by_activity_with_descendants(
+        db, activity_id, page.fetch_limit, page.after_id, loader=renderer.loader
+    )
+    result = page.apply(orgs, response)
     logger.debug(f"API: Найдено {len(result)} организаций")
-    return result
+    return renderer.render_list(result, response)
 
 @router.get("/search/by-name/organizations", response_model=list[OrganizationOut])
+@cached(tags=("organizations",))
 async def organizations_by_activity_name(
+    response: Response,
     name: str = Query(..., min_length=1, description="Название вида деятельности"),
+    page: PageParams = Depends(),
+    renderer: OrgListRenderer = Depends(),
     db: AsyncSession = Depends(get_db)
 ):
     """Поиск организаций по названию вида деятельности (включая дочерние виды деятельности).
@@ -52,6 +106,9 @@ async def organizations_by_activity_name(
     - Молочная продукция (дочерняя)
     """
     logger.info(f"API: Поиск организаций по названию вида деятельности: '{name}'")
-    result = await list_by_activity_name_with_descendants(db, name)
+    orgs = await list_by_activity_name_with_descendants(
+        db, name, page.fetch_limit, page.after_id, loader=renderer.loader
+    )
+    result = page.apply(orgs, response)
     logger.debug(f"API: Найдено {len(result)} организаций")
-    return result
+    return renderer.render_list(result, response)
@@ -0,0 +1,30 @@
+import logging
+from typing import Literal
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.database import get_db
+from app.core.security import api_key_auth
+from app.core.cache import CachedRoute, cached
+from app.schemas.autocomplete import AutocompleteItem
+from app.indexes.autocomplete import autocomplete_index
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/autocomplete", tags=["autocomplete"], dependencies=[Depends(api_key_auth)], route_class=CachedRoute)
+
+@router.get("", response_model=list[AutocompleteItem])
+@cached(tags=("organizations", "buildings"))
+async def autocomplete(
+    q: str = Query(..., min_length=1, description="Начало названия организации или адреса здания"),
+    kind: Literal["organization", "building"] | None = Query(None, description="Ограничить тип подсказок"),
+    limit: int = Query(10, ge=1, le=settings.AUTOCOMPLETE_MAX_RESULTS, description="Максимальное число подсказок"),
+    db: AsyncSession = Depends(get_db),
+):
+    """Подсказки по префиксу слова в названиях организаций и адресах зданий.
+
+    Ответ строится из индекса в памяти и содержит только id, подпись и тип сущности.
+    """
+    logger.debug(f"API: Автодополнение: q='{q}', kind={kind}, limit={limit}")
+    index = await autocomplete_index.ensure_loaded(db)
+    return index.search(q, limit, kind)
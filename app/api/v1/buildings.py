@@ -1,29 +1,47 @@
 import logging
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
 from app.core.security import api_key_auth
+from app.core.cache import CachedRoute, cached
+from app.core.etag import check_etag
+from app.core.pagination import PageParams
+from app.api.v1.org_render import OrgListRenderer
 from app.schemas.building import BuildingOut
 from app.schemas.organization import OrganizationOut
 from app.crud.building import list_buildings
+from app.crud.versions import buildings_version
 from app.crud.organization import list_by_building
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/buildings", tags=["buildings"], dependencies=[Depends(api_key_auth)])
+router = APIRouter(prefix="/buildings", tags=["buildings"], dependencies=[Depends(api_key_auth)], route_class=CachedRoute)
 
-@router.get("", response_model=list[BuildingOut])
-async def get_buildings(db: AsyncSession = Depends(get_db)):
-    """Список всех зданий."""
+async def buildings_etag(request: Request, db: AsyncSession = Depends(get_db)) -> None:
+    """Условный GET по версии таблицы зданий."""
+    check_etag(request, await buildings_version(db))
+
+@router.get("", response_model=list[BuildingOut], dependencies=[Depends(buildings_etag)])
+@cached(ttl=300, tags=("buildings",))
+async def get_buildings(response: Response, page: PageParams = Depends(), db: AsyncSession = Depends(get_db)):
+    """Список всех зданий (постранично, курсор следующей страницы в заголовке X-Next-Cursor)."""
     logger.info("API: Запрос списка всех зданий")
-    result = await list_buildings(db)
+    result = page.apply(await list_buildings(db, page.fetch_limit, page.after_id), response)
     logger.debug(f"API: Возвращено {len(result)} зданий")
     return result
 
 @router.get("/{building_id}/organizations", response_model=list[OrganizationOut])
-async def organizations_in_building(building_id: int, db: AsyncSession = Depends(get_db)):
+@cached(tags=("organizations",))
+async def organizations_in_building(
+    building_id: int,
+    response: Response,
+    page: PageParams = Depends(),
+    renderer: OrgListRenderer = Depends(),
+    db: AsyncSession = Depends(get_db),
+):
     """Организации, расположенные в указанном здании."""
     logger.info(f"API: Запрос организаций в здании: building_id={building_id}")
-    result = await list_by_building(db, building_id)
+    orgs = await list_by_building(db, building_id, page.fetch_limit, page.after_id, loader=renderer.loader)
+    result = page.apply(orgs, response)
     logger.debug(f"API: Найдено {len(result)} организаций")
-    return result
+    return renderer.render_list(result, response)
@@ -0,0 +1,204 @@
+import json
+import logging
+from typing import Any, AsyncIterator, Callable, Literal, Sequence
+
+from fastapi import HTTPException, Query, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.streaming import NDJSON_MEDIA_TYPE
+from app.crud.loading import (
+    Loader, Streamer, encode_json, encode_rows, load_organization_documents, load_organization_fragments, load_organization_rows,
+    load_organization_refs, load_organizations, projection_loader, projection_streamer, stream_organization_documents,
+    stream_organization_fragments, stream_organization_rows, stream_organizations,
+)
+from app.schemas.organization import OrganizationOut, parse_fields, projected_model
+
+logger = logging.getLogger(__name__)
+
+FIELDS_DESCRIPTION = "Поля ответа через запятую, например id,name,building.latitude,building.longitude"
+
+_LOADERS: dict[str, tuple[Loader, Streamer]] = {
+    "orm": (load_organizations, stream_organizations),
+    "json_agg": (load_organization_documents, stream_organization_documents),
+    "rows": (load_organization_rows, stream_organization_rows),
+    "fragments": (load_organization_fragments, stream_organization_fragments),
+}
+
+
+class OrgRenderer:
+    """Способ загрузки и отдачи организаций для текущего запроса.
+
+    Используется как зависимость маршрутов, возвращающих OrganizationOut.
+    При ORG_READ_PATH="orm" организации загружаются ORM-объектами и проходят
+    валидацию response_model. При ORG_READ_PATH="json_agg" документы собирает
+    Postgres, а маршрут отдаёт их клиенту как есть. При ORG_READ_PATH="rows"
+    организации собираются словарями из строк и кодируются orjson сразу в байты
+    ответа, побайтно совпадающие с ответом через response_model. При
+    ORG_READ_PATH="fragments" ответ склеивается из готовых JSON-фрагментов
+    организаций из кэша фрагментов, собираются только промахи.
+
+    Параметр fields (например, "id,name,building.latitude") выбирает поля
+    ответа: читаются только их колонки и связи, а ответ строится схемой
+    projected_model, созданной один раз на набор полей.
+    """
+
+    def __init__(
+        self,
+        fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+    ):
+        self.loader, self.streamer = _LOADERS[settings.ORG_READ_PATH]
+        self.documents = settings.ORG_READ_PATH in ("json_agg", "fragments")
+        self.rows = settings.ORG_READ_PATH == "rows"
+        self.model = OrganizationOut
+        self.projected = fields is not None
+        if self.projected:
+            try:
+                projection = parse_fields(fields)
+            except ValueError as e:
+                logger.warning(f"Некорректный параметр fields '{fields[:64]}': {str(e)}")
+                raise HTTPException(400, detail="Invalid fields")
+            self.loader = projection_loader(projection)
+            self.streamer = projection_streamer(projection)
+            self.model = projected_model(projection)
+            self.documents = self.rows = False
+
+    def _project(self, item: Any) -> dict[str, Any] | None:
+        return self.model.model_validate(item).model_dump(mode="json") if item is not None else None
+
+    def render_list(self, items: Sequence[Any], response: Response) -> Any:
+        """Ответ со списком организаций, полученных через loader.
+
+        Заголовки, выставленные маршрутом в response (например, X-Next-Cursor),
+        переносятся в готовый ответ.
+        """
+        if self.projected:
+            return JSONResponse([self._project(item) for item in items], headers=dict(response.headers))
+        if self.rows:
+            body = encode_rows([row.data for row in items], items)
+            return Response(content=body, media_type="application/json", headers=dict(response.headers))
+        if not self.documents:
+            return items
+        body = "[" + ",".join(row.document for row in items) + "]"
+        return Response(content=body, media_type="application/json", headers=dict(response.headers))
+
+    def render_page(self, items: Sequence[Any], response: Response, facets: dict[str, list[dict]]) -> Any:
+        """Ответ-конверт {"items": [...], "facets": {...}} со списком организаций и фасетами."""
+        if self.projected:
+            content = {"items": [self._project(item) for item in items], "facets": facets}
+            return JSONResponse(content, headers=dict(response.headers))
+        if self.rows:
+            body = encode_rows({"items": [row.data for row in items], "facets": facets}, items)
+            return Response(content=body, media_type="application/json", headers=dict(response.headers))
+        if not self.documents:
+            return {"items": items, "facets": facets}
+        body = (
+            '{"items":[' + ",".join(row.document for row in items) + '],"facets":'
+            + json.dumps(facets, separators=(",", ":")) + "}"
+        )
+        return Response(content=body, media_type="application/json", headers=dict(response.headers))
+
+    def render_batch(self, ids: Sequence[int], items: Sequence[Any]) -> Any:
+        """Ответ пакетного получения: элементы {"id", "organization"} в порядке ids."""
+        if self.projected:
+            return JSONResponse([{"id": org_id, "organization": self._project(item)} for org_id, item in zip(ids, items)])
+        if self.rows:
+            body = encode_rows(
+                [{"id": org_id, "organization": item.data if item is not None else None} for org_id, item in zip(ids, items)],
+                items,
+            )
+            return Response(content=body, media_type="application/json")
+        if not self.documents:
+            return [{"id": org_id, "organization": item} for org_id, item in zip(ids, items)]
+        body = "[" + ",".join(
+            f'{{"id":{org_id},"organization":{item.document if item is not None else "null"}}}'
+            for org_id, item in zip(ids, items)
+        ) + "]"
+        return Response(content=body, media_type="application/json")
+
+    def render_one(self, item: Any) -> Any:
+        """Ответ с одной организацией, полученной через loader."""
+        if self.projected:
+            return JSONResponse(self._project(item))
+        if self.rows:
+            return Response(content=encode_rows(item.data, [item]), media_type="application/json")
+        if not self.documents:
+            return item
+        return Response(content=item.document, media_type="application/json")
+
+    def render_stream(
+        self, db: AsyncSession, produce: Callable[[AsyncSession, Streamer], AsyncIterator[Any]]
+    ) -> StreamingResponse:
+        """Потоковый ответ NDJSON: по одной организации OrganizationOut (или полям fields) в строке.
+
+        produce(session, streamer) выдаёт организации по мере чтения из БД.
+        Сессия запроса закрывается до отправки тела ответа, поэтому поток
+        читает в собственной сессии на том же движке.
+        """
+        documents = self.documents
+        rows = self.rows
+        model = self.model
+        streamer = self.streamer
+
+        async def lines():
+            async with AsyncSession(bind=db.bind, expire_on_commit=False) as session:
+                try:
+                    async for item in produce(session, streamer):
+                        if rows:
+                            yield encode_rows(item.data, [item]) + b"\n"
+                        elif documents:
+                            yield item.document + "\n"
+                        else:
+                            yield model.model_validate(item).model_dump_json() + "\n"
+                except Exception as e:
+                    logger.error(f"Ошибка потоковой выдачи организаций: {str(e)}")
+                    raise
+
+        return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
+
+
+class OrgListRenderer(OrgRenderer):
+    """Способ загрузки и отдачи для списочных маршрутов с параметром format.
+
+    format=normalized возвращает конверт {"items", "buildings", "activities"}:
+    организации ссылаются на building_id и activity_ids, а здания и виды
+    деятельности страницы приводятся по одному разу в словарях по id.
+    Потоковая выдача отдаёт OrganizationOut (или поля fields), а не конверт.
+    """
+
+    def __init__(
+        self,
+        response_format: Literal["full", "normalized"] = Query(
+            "full", alias="format", description="full — OrganizationOut; normalized — ссылки и словари зданий и видов деятельности"
+        ),
+        fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+    ):
+        super().__init__(fields)
+        self.normalized = response_format == "normalized"
+        if self.normalized:
+            if self.projected:
+                raise HTTPException(400, detail="Invalid fields")
+            self.loader = load_organization_refs
+
+    def render_list(self, items: Sequence[Any], response: Response) -> Any:
+        if not self.normalized:
+            return super().render_list(items, response)
+        return self._render_normalized(items, response, {})
+
+    def render_page(self, items: Sequence[Any], response: Response, facets: dict[str, list[dict]]) -> Any:
+        if not self.normalized:
+            return super().render_page(items, response, facets)
+        return self._render_normalized(items, response, {"facets": facets})
+
+    def _render_normalized(self, items: Sequence[Any], response: Response, extra: dict[str, Any]) -> Response:
+        buildings = {item.building["id"]: item.building for item in items}
+        activities = {activity["id"]: activity for item in items for activity in item.activities}
+        content = {
+            "items": [item.data for item in items],
+            "buildings": {str(k): buildings[k] for k in sorted(buildings)},
+            "activities": {str(k): activities[k] for k in sorted(activities)},
+            **extra,
+        }
+        body = encode_json(content, buildings.values())
+        return Response(content=body, media_type="application/json", headers=dict(response.headers))
@@ -1,36 +1,174 @@
 import logging
-from fastapi import APIRouter, Depends, Query, HTTPException
+from typing import Literal
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
 from app.core.database import get_db
 from app.core.security import api_key_auth
-from app.schemas.organization import OrganizationOut, OrganizationCreate
+from app.core.cache import CachedRoute, cached
+from app.core.etag import check_etag
+from app.core.pagination import PageParams
+from app.core.streaming import stream_requested
+from app.api.v1.org_render import OrgListRenderer, OrgRenderer
+from app.schemas.organization import (
+    OrganizationOut, OrganizationCreate, OrganizationNearbyOut, OrganizationClusterOut, OrganizationSearchPage,
+    GeoBatchRequest, GeoBatchResultOut, OrganizationBatchItem, OrganizationBatchGet
+)
+from app.crud.versions import organization_version
 from app.crud.organization import (
-    get_org, search_by_name, create_org,
-    list_in_rectangular_area
+    get_org_batched, get_orgs, search_by_name, search_combined, count_facets, create_org, FACETS,
+    list_in_rectangular_area, list_nearby, cluster_cells, cluster_organizations, list_in_areas_batch, stream_in_rectangular_area
 )
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/organizations", tags=["organizations"], dependencies=[Depends(api_key_auth)])
+router = APIRouter(prefix="/organizations", tags=["organizations"], dependencies=[Depends(api_key_auth)], route_class=CachedRoute)
+
+def _parse_ids(values: list[str]) -> list[int]:
+    """Разобрать идентификаторы из повторяющихся параметров и/или списков через запятую."""
+    try:
+        ids = [int(part) for value in values for part in value.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(400, detail="Invalid ids")
+    if not ids or len(ids) > settings.BATCH_GET_MAX_IDS:
+        raise HTTPException(400, detail="Invalid ids")
+    return ids
+
+@router.get("", response_model=list[OrganizationBatchItem])
+@cached(tags=("organizations",))
+async def get_organizations_by_ids(
+    ids: list[str] = Query(..., description="Идентификаторы организаций: ids=1,2,3 или ids=1&ids=2"),
+    renderer: OrgRenderer = Depends(),
+    db: AsyncSession = Depends(get_db),
+):
+    """Получить организации по списку идентификаторов одним запросом.
+
+    Ответ следует порядку ids; для отсутствующих организаций organization равно null.
+    """
+    org_ids = _parse_ids(ids)
+    logger.info(f"API: Пакетный запрос {len(org_ids)} организаций")
+    orgs = await get_orgs(db, org_ids, loader=renderer.loader)
+    return renderer.render_batch(org_ids, orgs)
+
+@router.post("/batch-get", response_model=list[OrganizationBatchItem])
+async def batch_get_organizations(
+    payload: OrganizationBatchGet,
+    renderer: OrgRenderer = Depends(),
+    db: AsyncSession = Depends(get_db),
+):
+    """Получить организации по списку идентификаторов из тела запроса.
+
+    Ответ следует порядку ids; для отсутствующих организаций organization равно null.
+    """
+    logger.info(f"API: Пакетный запрос {len(payload.ids)} организаций")
+    orgs = await get_orgs(db, payload.ids, loader=renderer.loader)
+    return renderer.render_batch(payload.ids, orgs)
 
-@router.get("/{org_id}", response_model=OrganizationOut)
-async def get_organization(org_id: int, db: AsyncSession = Depends(get_db)):
+FACETS_QUERY = Query(None, description="Фасеты через запятую: activity, building")
+
+def _parse_facets(facets: str | None) -> set[str]:
+    """Разобрать список фасетов вида "activity,building"."""
+    if not facets:
+        return set()
+    requested = {facet.strip() for facet in facets.split(",")}
+    if not requested <= set(FACETS):
+        raise HTTPException(400, detail="Invalid facets")
+    return requested
+
+@router.get("/search", response_model=list[OrganizationOut] | OrganizationSearchPage)
+@cached(tags=("organizations",))
+async def search_organizations_combined(
+    response: Response,
+    name: str | None = Query(None, min_length=1, description="Часть названия организации"),
+    activity_id: int | None = Query(None, description="Вид деятельности (включая дочерние)"),
+    building_id: int | None = Query(None, description="Идентификатор здания"),
+    lat: float | None = Query(None, description="Широта центра прямоугольной области"),
+    lon: float | None = Query(None, description="Долгота центра прямоугольной области"),
+    width_m: float | None = Query(None, gt=0, description="Ширина прямоугольной области в метрах"),
+    height_m: float | None = Query(None, gt=0, description="Высота прямоугольной области в метрах"),
+    facets: str | None = FACETS_QUERY,
+    page: PageParams = Depends(),
+    renderer: OrgListRenderer = Depends(),
+    db: AsyncSession = Depends(get_db),
+):
+    """Поиск организаций по любому сочетанию фильтров одним запросом.
+
+    Фильтры объединяются по «И»; прямоугольная область задаётся всеми
+    четырьмя параметрами lat, lon, width_m, height_m. При указании facets
+    ответ оборачивается в {"items": [...], "facets": {...}}.
+    """
+    logger.info(
+        f"API: Комбинированный поиск организаций: name={name!r}, activity_id={activity_id}, building_id={building_id}, "
+        f"lat={lat}, lon={lon}, width={width_m}, height={height_m}"
+    )
+    area_params = (lat, lon, width_m, height_m)
+    if all(p is None for p in area_params):
+        area = None
+    elif any(p is None for p in area_params):
+        raise HTTPException(400, detail="Area filter requires lat, lon, width_m and height_m")
+    else:
+        area = area_params
+    requested_facets = _parse_facets(facets)
+    orgs = await search_combined(
+        db, name, activity_id, building_id, area, page.fetch_limit, page.after_id, loader=renderer.loader
+    )
+    result = page.apply(orgs, response)
+    logger.debug(f"API: Найдено {len(result)} организаций")
+    if requested_facets:
+        counts = await count_facets(db, requested_facets, name, activity_id, building_id, area)
+        return renderer.render_page(result, response, counts)
+    return renderer.render_list(result, response)
+
+async def organization_etag(org_id: int, request: Request, db: AsyncSession = Depends(get_db)) -> None:
+    """Условный GET по версии организации, её здания и видов деятельности."""
+    check_etag(request, await organization_version(db, org_id))
+
+@router.get("/{org_id}", response_model=OrganizationOut, dependencies=[Depends(organization_etag)])
+@cached(tags=("organization:{org_id}", "buildings", "activities"))
+async def get_organization(
+    org_id: int,
+    renderer: OrgRenderer = Depends(),
+    db: AsyncSession = Depends(get_db),
+):
     """Получить организацию по идентификатору."""
     logger.info(f"API: Запрос организации: org_id={org_id}")
-    org = await get_org(db, org_id)
+    org = await get_org_batched(db, org_id, loader=renderer.loader)
     if not org:
         logger.warning(f"API: Организация не найдена: org_id={org_id}")
         raise HTTPException(404, detail="Organization not found")
-    logger.debug(f"API: Организация найдена: id={org_id}, name='{org.name}'")
-    return org
-
-@router.get("/search/by-name", response_model=list[OrganizationOut])
-async def search_organizations(name: str = Query(..., min_length=1), db: AsyncSession = Depends(get_db)):
-    """Поиск организаций по названию (частичное совпадение, регистр не учитывается)."""
-    logger.info(f"API: Поиск организаций по названию: '{name}'")
-    result = await search_by_name(db, name)
+    logger.debug(f"API: Организация найдена: id={org_id}")
+    return renderer.render_one(org)
+
+@router.get("/search/by-name", response_model=list[OrganizationOut] | OrganizationSearchPage)
+@cached(tags=("organizations",))
+async def search_organizations(
+    response: Response,
+    name: str = Query(..., min_length=1),
+    order: Literal["id", "relevance"] = Query("id", description="Порядок: по id (постранично) или по сходству с запросом"),
+    facets: str | None = FACETS_QUERY,
+    page: PageParams = Depends(),
+    renderer: OrgListRenderer = Depends(),
+    db: AsyncSession = Depends(get_db),
+):
+    """Поиск организаций по названию (частичное совпадение, регистр не учитывается).
+
+    При order=relevance возвращаются limit лучших совпадений без курсора следующей страницы.
+    При указании facets ответ оборачивается в {"items": [...], "facets": {...}}.
+    """
+    logger.info(f"API: Поиск организаций по названию: '{name}', order={order}")
+    requested_facets = _parse_facets(facets)
+    if order == "relevance":
+        if page.after is not None:
+            raise HTTPException(400, detail="Cursor is not supported for relevance ordering")
+        result = await search_by_name(db, name, page.limit, ranked=True, loader=renderer.loader)
+    else:
+        orgs = await search_by_name(db, name, page.fetch_limit, page.after_id, loader=renderer.loader)
+        result = page.apply(orgs, response)
     logger.debug(f"API: Найдено {len(result)} организаций")
-    return result
+    if requested_facets:
+        counts = await count_facets(db, requested_facets, name=name)
+        return renderer.render_page(result, response, counts)
+    return renderer.render_list(result, response)
 
 @router.post("", response_model=OrganizationOut, status_code=201)
 async def add_organization(payload: OrganizationCreate, db: AsyncSession = Depends(get_db)):
@@ -41,18 +179,103 @@ async def add_organization(payload: OrganizationCreate, db: AsyncSession = Depen
     return result
 
 @router.get("/geo/rectangular-area", response_model=list[OrganizationOut])
+@cached(tags=("organizations",))
 async def orgs_in_rectangular_area(
+    response: Response,
     lat: float = Query(..., description="Широта центральной точки"),
     lon: float = Query(..., description="Долгота центральной точки"),
     width_m: float = Query(..., gt=0, description="Ширина прямоугольной области в метрах"),
     height_m: float = Query(..., gt=0, description="Высота прямоугольной области в метрах"),
+    page: PageParams = Depends(),
+    renderer: OrgListRenderer = Depends(),
+    stream: bool = Depends(stream_requested),
     db: AsyncSession = Depends(get_db),
 ):
     """Найти организации в прямоугольной области относительно указанной точки на карте.
 
     Прямоугольник формируется вокруг центральной точки (lat, lon) с заданными размерами.
+    В потоковом режиме (stream=1 или Accept: application/x-ndjson) отдаются все
+    организации после курсора в формате NDJSON без ограничения limit.
     """
+    if stream:
+        logger.info(f"API: Потоковый поиск организаций в прямоугольной области: lat={lat}, lon={lon}, width={width_m}м, height={height_m}м")
+        return renderer.render_stream(
+            db, lambda session, streamer: stream_in_rectangular_area(
+                session, lat, lon, width_m, height_m, page.after_id, streamer
+            )
+        )
     logger.info(f"API: Поиск организаций в прямоугольной области: lat={lat}, lon={lon}, width={width_m}м, height={height_m}м")
-    result = await list_in_rectangular_area(db, lat, lon, width_m, height_m)
+    orgs = await list_in_rectangular_area(
+        db, lat, lon, width_m, height_m, page.fetch_limit, page.after_id, loader=renderer.loader
+    )
+    result = page.apply(orgs, response)
+    logger.debug(f"API: Найдено {len(result)} организаций")
+    return renderer.render_list(result, response)
+
+@router.get("/geo/nearby", response_model=list[OrganizationNearbyOut])
+@cached(tags=("organizations",))
+async def orgs_nearby(
+    lat: float = Query(..., ge=-90, le=90, description="Широта точки поиска"),
+    lon: float = Query(..., ge=-180, le=180, description="Долгота точки поиска"),
+    radius_m: float = Query(..., gt=0, description="Радиус поиска в метрах"),
+    k: int = Query(settings.PAGE_SIZE_DEFAULT, ge=1, le=settings.PAGE_SIZE_MAX, description="Максимальное число организаций"),
+    db: AsyncSession = Depends(get_db),
+):
+    """Найти до k ближайших к точке организаций в пределах радиуса.
+
+    Организации упорядочены по расстоянию, поле distance_m содержит расстояние в метрах.
+    """
+    logger.info(f"API: Поиск ближайших организаций: lat={lat}, lon={lon}, radius={radius_m}м, k={k}")
+    result = await list_nearby(db, lat, lon, radius_m, k)
     logger.debug(f"API: Найдено {len(result)} организаций")
     return result
+
+@router.post("/geo/batch", response_model=list[GeoBatchResultOut])
+async def orgs_geo_batch(payload: GeoBatchRequest, db: AsyncSession = Depends(get_db)):
+    """Найти организации сразу для набора прямоугольных и радиусных запросов.
+
+    Результаты возвращаются в порядке запросов; index соответствует позиции в queries.
+    """
+    logger.info(f"API: Пакетный геопоиск: {len(payload.queries)} запросов, limit={payload.limit}")
+    queries = [
+        (q.lat, q.lon, 2 * q.radius_m, 2 * q.radius_m, q.radius_m) if q.radius_m is not None
+        else (q.lat, q.lon, q.width_m, q.height_m, None)
+        for q in payload.queries
+    ]
+    groups = await list_in_areas_batch(db, queries, payload.limit)
+    logger.debug(f"API: Пакетный геопоиск завершён: {sum(len(g) for g in groups)} организаций")
+    return [{"index": i, "organizations": orgs} for i, orgs in enumerate(groups)]
+
+def _parse_bbox(bbox: str) -> tuple[float, float, float, float]:
+    """Разобрать bbox вида "min_lon,min_lat,max_lon,max_lat" в (min_lat, max_lat, min_lon, max_lon)."""
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(part) for part in bbox.split(","))
+    except ValueError:
+        raise HTTPException(400, detail="Invalid bbox")
+    if not (-90 <= min_lat <= max_lat <= 90 and -180 <= min_lon <= max_lon <= 180):
+        raise HTTPException(400, detail="Invalid bbox")
+    return min_lat, max_lat, min_lon, max_lon
+
+@router.get("/geo/clusters", response_model=list[OrganizationClusterOut])
+@cached(tags=("organizations",))
+async def orgs_clusters(
+    bbox: str = Query(..., description="Границы области: min_lon,min_lat,max_lon,max_lat"),
+    zoom: int = Query(..., ge=0, le=22, description="Масштаб карты (как у тайлов z/x/y)"),
+    activity_id: int | None = Query(None, description="Вид деятельности (включая дочерние)"),
+    db: AsyncSession = Depends(get_db),
+):
+    """Получить число организаций и центроиды по ячейкам сетки для отрисовки кластеров на карте.
+
+    Размер ячейки зависит от масштаба: тайл масштаба zoom делится на
+    GEO_CLUSTER_CELLS_PER_TILE ячеек по каждой оси. Если bbox задевает больше
+    GEO_CLUSTER_MAX_CELLS ячеек, возвращается 400.
+    """
+    logger.info(f"API: Кластеризация организаций: bbox={bbox}, zoom={zoom}, activity_id={activity_id}")
+    min_lat, max_lat, min_lon, max_lon = _parse_bbox(bbox)
+    cell_deg = 360.0 / (2 ** zoom) / settings.GEO_CLUSTER_CELLS_PER_TILE
+    if cluster_cells(min_lat, max_lat, min_lon, max_lon, cell_deg) > settings.GEO_CLUSTER_MAX_CELLS:
+        logger.warning(f"API: Слишком много ячеек кластеризации: bbox={bbox}, zoom={zoom}")
+        raise HTTPException(400, detail="Too many cells for bbox and zoom")
+    result = await cluster_organizations(db, min_lat, max_lat, min_lon, max_lon, cell_deg, activity_id)
+    logger.debug(f"API: Получено {len(result)} кластеров")
+    return result
@@ -0,0 +1,73 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+class _Batch:
+    __slots__ = ("waiters", "handle")
+
+    def __init__(self):
+        self.waiters: dict[Hashable, list[asyncio.Future]] = {}
+        self.handle: asyncio.TimerHandle | None = None
+
+
+class BatchLoader:
+    """Загрузчик в стиле DataLoader: объединяет одиночные загрузки в пакетные.
+
+    Ключи, запрошенные в пределах окна window секунд, собираются в пакет по
+    группе (например, по движку БД и способу загрузки) и загружаются одним
+    вызовом load_many(group, keys), который возвращает словарь ключ -> значение.
+    Отсутствующие в словаре ключи получают None, исключение пакета получают
+    все ожидающие.
+    """
+
+    def __init__(
+        self,
+        load_many: Callable[[Hashable, list[Hashable]], Awaitable[dict[Hashable, Any]]],
+        window: float,
+    ):
+        self.load_many = load_many
+        self.window = window
+        self._batches: dict[Hashable, _Batch] = {}
+        self._running: set[asyncio.Task] = set()
+
+    async def load(self, group: Hashable, key: Hashable) -> Any:
+        """Загрузить значение по ключу в составе ближайшего пакета группы."""
+        loop = asyncio.get_running_loop()
+        batch = self._batches.get(group)
+        if batch is None:
+            batch = self._batches[group] = _Batch()
+            batch.handle = loop.call_later(self.window, self._dispatch, group)
+        future = loop.create_future()
+        batch.waiters.setdefault(key, []).append(future)
+        return await future
+
+    def _dispatch(self, group: Hashable) -> None:
+        batch = self._batches.pop(group)
+        task = asyncio.ensure_future(self._run(group, batch))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run(self, group: Hashable, batch: _Batch) -> None:
+        keys = list(batch.waiters)
+        logger.debug(f"Пакетная загрузка: {len(keys)} ключей")
+        try:
+            values = await self.load_many(group, keys)
+        except Exception as e:
+            for futures in batch.waiters.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+        except BaseException:
+            # Отмена пакета (CancelledError) отменяет и ожидающих, иначе они зависнут
+            for futures in batch.waiters.values():
+                for future in futures:
+                    future.cancel()
+            raise
+        for key, futures in batch.waiters.items():
+            for future in futures:
+                if not future.done():
+                    future.set_result(values.get(key))
@@ -0,0 +1,181 @@
+import asyncio
+import json
+import logging
+import uuid
+from typing import Awaitable, Callable
+
+from redis.asyncio import Redis
+
+from app.core.config import settings
+from app.core.database import Base
+from app.core.events import Change, dispatch, subscribe_local
+
+logger = logging.getLogger(__name__)
+
+
+def _models_by_table() -> dict[str, type]:
+    return {mapper.class_.__tablename__: mapper.class_ for mapper in Base.registry.mappers}
+
+
+def encode_changes(changes: list[Change], origin: str) -> str:
+    """Сериализовать изменения транзакции для передачи другим процессам."""
+    return json.dumps(
+        {
+            "origin": origin,
+            "changes": [
+                {"op": change.op, "table": change.model.__tablename__, "values": change.values}
+                for change in changes
+            ],
+        },
+        default=str,
+    )
+
+
+def decode_changes(payload: str | bytes) -> tuple[str, list[Change]]:
+    """Восстановить изменения из сообщения; изменения неизвестных таблиц пропускаются."""
+    data = json.loads(payload)
+    models = _models_by_table()
+    changes = [
+        Change(item["op"], models[item["table"]], item["values"])
+        for item in data["changes"]
+        if item["table"] in models
+    ]
+    return data["origin"], changes
+
+
+class ChangeBus:
+    """Рассылка зафиксированных изменений между воркерами и узлами через Redis pub/sub.
+
+    Изменения, зафиксированные в этом процессе, публикуются в канал; изменения,
+    полученные от других процессов, передаются обработчикам subscribe так же,
+    как локальные. Так индексы в памяти и кэш ответов каждого воркера
+    сбрасываются и дополняются при записи через любой воркер.
+
+    При потере соединения с Redis подписка восстанавливается с экспоненциальной
+    задержкой. Сообщения, отправленные за время разрыва, потеряны, поэтому после
+    восстановления вызывается on_resync — сброс индексов и кэшей процесса.
+    """
+
+    def __init__(self, client: Redis, channel: str, on_resync: Callable[[], Awaitable[None]] | None = None):
+        self.client = client
+        self.channel = channel
+        self.on_resync = on_resync
+        self.instance_id = uuid.uuid4().hex
+        self._listener: asyncio.Task | None = None
+        self._publishing: set[asyncio.Task] = set()
+
+    async def start(self) -> None:
+        """Подписаться на канал и начать приём изменений других процессов."""
+        pubsub = await self._subscribe()
+        self._listener = asyncio.create_task(self._listen(pubsub))
+        logger.info(f"Шина изменений запущена: канал {self.channel}")
+
+    async def stop(self) -> None:
+        """Остановить приём и дождаться отправки опубликованных изменений."""
+        if self._publishing:
+            await asyncio.gather(*self._publishing, return_exceptions=True)
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+
+    def publish(self, changes: list[Change]) -> None:
+        """Опубликовать изменения, зафиксированные в этом процессе."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            logger.warning("Шина изменений: нет event loop, изменения не опубликованы")
+            return
+        task = loop.create_task(self.client.publish(self.channel, encode_changes(changes, self.instance_id)))
+        self._publishing.add(task)
+        task.add_done_callback(self._published)
+
+    def _published(self, task: asyncio.Task) -> None:
+        self._publishing.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Шина изменений: ошибка публикации: {task.exception()}")
+
+    async def _subscribe(self):
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(self.channel)
+        except BaseException:
+            await pubsub.aclose()
+            raise
+        return pubsub
+
+    async def _listen(self, pubsub) -> None:
+        while True:
+            try:
+                await self._receive(pubsub)
+            except Exception as e:
+                logger.error(f"Шина изменений: соединение с Redis потеряно: {str(e)}")
+            finally:
+                await self._close(pubsub)
+            pubsub = await self._resubscribe()
+            if self.on_resync is not None:
+                try:
+                    await self.on_resync()
+                except Exception as e:
+                    logger.error(f"Шина изменений: ошибка сброса состояния после переподключения: {str(e)}")
+
+    async def _resubscribe(self):
+        delay = settings.CHANGES_RECONNECT_DELAY
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                pubsub = await self._subscribe()
+            except Exception as e:
+                delay = min(delay * 2, settings.CHANGES_RECONNECT_MAX_DELAY)
+                logger.warning(f"Шина изменений: не удалось переподключиться ({str(e)}), повтор через {delay} с")
+                continue
+            logger.info(f"Шина изменений: подписка на канал {self.channel} восстановлена")
+            return pubsub
+
+    @staticmethod
+    async def _close(pubsub) -> None:
+        try:
+            await pubsub.aclose()
+        except Exception as e:
+            logger.debug(f"Шина изменений: ошибка закрытия подписки: {str(e)}")
+
+    async def _receive(self, pubsub) -> None:
+        async for message in pubsub.listen():
+            if message["type"] != "message":
+                continue
+            try:
+                origin, changes = decode_changes(message["data"])
+            except (ValueError, KeyError) as e:
+                logger.error(f"Шина изменений: некорректное сообщение: {str(e)}")
+                continue
+            if origin == self.instance_id or not changes:
+                continue
+            logger.debug(f"Шина изменений: получено {len(changes)} изменений от {origin}")
+            dispatch(changes)
+
+
+change_bus: ChangeBus | None = None
+
+
+async def start_change_bus(
+    client: Redis, channel: str, on_resync: Callable[[], Awaitable[None]] | None = None
+) -> ChangeBus:
+    """Запустить шину изменений процесса и подписать её на локальные изменения."""
+    global change_bus
+    change_bus = ChangeBus(client, channel, on_resync)
+    await change_bus.start()
+    return change_bus
+
+
+async def stop_change_bus() -> None:
+    """Остановить шину изменений процесса."""
+    global change_bus
+    if change_bus is not None:
+        await change_bus.stop()
+        change_bus = None
+
+
+@subscribe_local
+def _publish_local_changes(changes: list[Change]) -> None:
+    if change_bus is not None:
+        change_bus.publish(changes)
@@ -0,0 +1,202 @@
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Any, Callable, NamedTuple
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+
+from app.core.cache_backends import CacheBackend, CachedResponse, MemoryCacheBackend, RedisCacheBackend
+from app.core.config import settings
+from app.core.etag import ETAG_HEADER, etag_matches
+from app.core.events import Change, subscribe
+from app.core.redis_client import get_redis
+from app.core.security import is_valid_api_key
+from app.core.streaming import is_stream_request
+
+logger = logging.getLogger(__name__)
+
+CACHE_HEADER = "X-Cache"
+
+
+class CachePolicy(NamedTuple):
+    """Правило кэширования маршрута.
+
+    - ttl: время жизни записи в секундах
+    - tags: теги записи; шаблоны вида "organization:{org_id}" заполняются параметрами пути
+    """
+
+    ttl: float
+    tags: tuple[str, ...]
+
+
+class ResponseCache:
+    """Кэш ответов GET-маршрутов поверх хранилища CacheBackend.
+
+    Ведёт счётчики попаданий и промахов по маршрутам этого процесса. Сброс по
+    тегам из обработчиков изменений планируется задачей; чтение дожидается
+    запланированных сбросов, поэтому процесс видит собственные записи.
+    """
+
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+        self._local_generation = 0
+        self._pending: set[asyncio.Task] = set()
+        self._stats: dict[str, dict[str, int]] = defaultdict(lambda: {"hits": 0, "misses": 0})
+
+    async def get(self, key: str, route: str) -> CachedResponse | None:
+        """Получить запись и учесть попадание или промах маршрута."""
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+        hit = await self.backend.get(key)
+        self._stats[route]["hits" if hit is not None else "misses"] += 1
+        return hit
+
+    async def generation(self) -> tuple[int, int]:
+        """Номер поколения до вычисления ответа: локальный и хранилища."""
+        return self._local_generation, await self.backend.generation()
+
+    async def put(
+        self, key: str, value: CachedResponse, ttl: float, tags: tuple[str, ...], generation: tuple[int, int]
+    ) -> None:
+        """Сохранить запись, если с начала её вычисления не было сброса по тегам."""
+        local_generation, backend_generation = generation
+        if local_generation != self._local_generation:
+            return
+        await self.backend.put(key, value, ttl, tags, backend_generation)
+
+    def invalidate_tags_soon(self, tags: set[str]) -> None:
+        """Запланировать сброс записей по тегам из синхронного обработчика изменений."""
+        self._local_generation += 1
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            logger.warning(f"Кэш ответов: нет event loop, сброс по тегам {sorted(tags)} пропущен")
+            return
+        task = loop.create_task(self.backend.invalidate_tags(tags))
+        self._pending.add(task)
+        task.add_done_callback(self._invalidated)
+
+    def _invalidated(self, task: asyncio.Task) -> None:
+        self._pending.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Кэш ответов: ошибка сброса по тегам: {task.exception()}")
+
+    async def clear(self) -> None:
+        """Сбросить все записи и счётчики."""
+        self._local_generation += 1
+        self._stats.clear()
+        await self.backend.clear()
+
+    async def stats(self) -> dict[str, Any]:
+        """Метрики хранилища и счётчики попаданий и промахов по маршрутам."""
+        return {
+            **await self.backend.stats(),
+            "routes": {route: dict(counts) for route, counts in self._stats.items()},
+        }
+
+
+def create_backend() -> CacheBackend:
+    """Хранилище кэша по настройке CACHE_BACKEND."""
+    if settings.CACHE_BACKEND == "redis":
+        return RedisCacheBackend(get_redis(), settings.CACHE_KEY_PREFIX)
+    return MemoryCacheBackend(settings.CACHE_MAX_ENTRIES)
+
+
+response_cache = ResponseCache(create_backend())
+
+
+def cached(ttl: float | None = None, tags: tuple[str, ...] = ()) -> Callable:
+    """Пометить эндпоинт как кэшируемый; действует в маршрутизаторах с route_class=CachedRoute."""
+    policy = CachePolicy(settings.CACHE_DEFAULT_TTL if ttl is None else ttl, tags)
+
+    def mark(endpoint: Callable) -> Callable:
+        endpoint.__cache_policy__ = policy
+        return endpoint
+
+    return mark
+
+
+def cache_key(request: Request) -> str:
+    """Ключ записи: путь запроса и отсортированные параметры строки запроса."""
+    query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+    return f"{request.url.path}?{query}"
+
+
+class CachedRoute(APIRoute):
+    """Маршрут, отдающий GET-ответы помеченных через cached эндпоинтов из кэша.
+
+    При попадании ответ возвращается до разрешения зависимостей маршрута,
+    поэтому сессия БД не открывается. Ключ API проверяется до обращения к кэшу;
+    запросы с неверным ключом и потоковые запросы (NDJSON) проходят обычную обработку.
+
+    ETag, вычисленный зависимостью маршрута (check_etag), выставляется в ответ
+    200 и сохраняется в записи кэша; при попадании с совпадающим If-None-Match
+    возвращается 304 без тела.
+    """
+
+    def get_route_handler(self) -> Callable:
+        handler = self._etag_handler(super().get_route_handler())
+        policy: CachePolicy | None = getattr(self.endpoint, "__cache_policy__", None)
+        if policy is None:
+            return handler
+        route = self.path_format
+
+        async def cached_handler(request: Request) -> Response:
+            if (
+                not settings.CACHE_ENABLED
+                or request.method != "GET"
+                or not is_valid_api_key(request.headers.get("X-API-KEY"))
+                or is_stream_request(request)
+            ):
+                return await handler(request)
+            key = cache_key(request)
+            hit = await response_cache.get(key, route)
+            if hit is not None:
+                etag = hit.headers.get(ETAG_HEADER.lower())
+                if etag is not None and etag_matches(request.headers.get("if-none-match"), etag):
+                    return Response(status_code=304, headers={ETAG_HEADER: etag, CACHE_HEADER: "HIT"})
+                return Response(content=hit.body, status_code=hit.status_code, headers={**hit.headers, CACHE_HEADER: "HIT"})
+            generation = await response_cache.generation()
+            response = await handler(request)
+            if response.status_code == 200 and hasattr(response, "body"):
+                tags = tuple(tag.format(**request.path_params) for tag in policy.tags)
+                headers = {k: v for k, v in response.headers.items() if k != CACHE_HEADER.lower()}
+                await response_cache.put(key, CachedResponse(200, headers, response.body), policy.ttl, tags, generation)
+            response.headers[CACHE_HEADER] = "MISS"
+            return response
+
+        return cached_handler
+
+    @staticmethod
+    def _etag_handler(handler: Callable) -> Callable:
+        async def etag_handler(request: Request) -> Response:
+            response = await handler(request)
+            etag = getattr(request.state, "etag", None)
+            if etag is not None and response.status_code == 200:
+                response.headers[ETAG_HEADER] = etag
+            return response
+
+        return etag_handler
+
+
+def _change_tags(change: Change) -> set[str]:
+    """Теги кэша, которые затрагивает изменение сущности."""
+    model = change.model.__tablename__
+    values = change.values
+    if model == "organizations":
+        return {"organizations", f"organization:{values.get('id')}"}
+    if model == "phones":
+        return {"organizations", f"organization:{values.get('organization_id')}"}
+    if model == "buildings":
+        return {"buildings", "organizations"}
+    if model == "activities":
+        return {"activities", "organizations"}
+    return set()
+
+
+@subscribe
+def _on_changes(changes: list[Change]) -> None:
+    tags = set().union(*(_change_tags(change) for change in changes))
+    if tags:
+        response_cache.invalidate_tags_soon(tags)
@@ -0,0 +1,217 @@
+import json
+import logging
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, NamedTuple, Protocol
+
+from redis.asyncio import Redis
+from redis.exceptions import WatchError
+
+logger = logging.getLogger(__name__)
+
+_PUT_ATTEMPTS = 3
+
+
+class CachedResponse(NamedTuple):
+    status_code: int
+    headers: dict[str, str]
+    body: bytes
+
+
+class CacheBackend(Protocol):
+    """Хранилище кэша ответов.
+
+    Запись сохраняется с номером поколения, полученным до вычисления ответа:
+    если за это время был сброс по тегам, запись не сохраняется.
+    """
+
+    async def get(self, key: str) -> CachedResponse | None: ...
+
+    async def generation(self) -> int: ...
+
+    async def put(self, key: str, value: CachedResponse, ttl: float, tags: tuple[str, ...], generation: int) -> None: ...
+
+    async def invalidate_tags(self, tags: set[str]) -> None: ...
+
+    async def clear(self) -> None: ...
+
+    async def stats(self) -> dict[str, Any]: ...
+
+
+class MemoryCacheBackend:
+    """Кэш ответов в памяти процесса.
+
+    Записи хранятся в порядке последнего обращения; при превышении max_entries
+    вытесняются самые давние (LRU). У каждой записи свой срок жизни и набор тегов,
+    по которым записи сбрасываются при изменении данных.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, tuple[str, ...], CachedResponse]] = OrderedDict()
+        self._keys_by_tag: dict[str, set[str]] = defaultdict(set)
+        self._generation = 0
+        self.evictions = 0
+
+    async def get(self, key: str) -> CachedResponse | None:
+        """Получить неистёкшую запись."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry[2]
+
+    async def generation(self) -> int:
+        """Номер поколения, увеличивается при каждом сбросе."""
+        return self._generation
+
+    async def put(self, key: str, value: CachedResponse, ttl: float, tags: tuple[str, ...], generation: int) -> None:
+        """Сохранить запись, если с начала её вычисления не было сброса по тегам."""
+        if generation != self._generation:
+            return
+        self._remove(key)
+        self._entries[key] = (time.monotonic() + ttl, tags, value)
+        for tag in tags:
+            self._keys_by_tag[tag].add(key)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    async def invalidate_tags(self, tags: set[str]) -> None:
+        """Сбросить все записи, помеченные любым из тегов."""
+        self._generation += 1
+        keys = set().union(*(self._keys_by_tag.pop(tag, set()) for tag in tags))
+        for key in keys:
+            self._remove(key)
+        if keys:
+            logger.debug(f"Кэш ответов: сброшено {len(keys)} записей по тегам {sorted(tags)}")
+
+    async def clear(self) -> None:
+        """Сбросить все записи."""
+        self._generation += 1
+        self._entries.clear()
+        self._keys_by_tag.clear()
+        self.evictions = 0
+
+    async def stats(self) -> dict[str, Any]:
+        """Размер кэша и число вытеснений."""
+        return {
+            "backend": "memory",
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "evictions": self.evictions,
+        }
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[1]:
+            keys = self._keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_tag[tag]
+
+
+class RedisCacheBackend:
+    """Кэш ответов в Redis, общий для всех воркеров и узлов.
+
+    Запись хранится строкой с TTL, теги — множествами ключей записей с TTL не
+    меньше, чем у записей в них (иначе вытеснение множества в allkeys-lru
+    оставило бы записи без тегов). Сброс по тегам увеличивает общий счётчик
+    поколения и удаляет записи из множеств.
+    Ограничение памяти и вытеснение LRU обеспечивает сам Redis
+    (maxmemory и maxmemory-policy allkeys-lru).
+    """
+
+    def __init__(self, client: Redis, prefix: str):
+        self.client = client
+        self.prefix = prefix
+        self._generation_key = f"{prefix}generation"
+
+    def _entry_key(self, key: str) -> str:
+        return f"{self.prefix}entry:{key}"
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.prefix}tag:{tag}"
+
+    async def get(self, key: str) -> CachedResponse | None:
+        """Получить неистёкшую запись."""
+        raw = await self.client.get(self._entry_key(key))
+        if raw is None:
+            return None
+        meta, body = raw.split(b"\n", 1)
+        status_code, headers = json.loads(meta)
+        return CachedResponse(status_code, headers, body)
+
+    async def generation(self) -> int:
+        """Номер поколения, общий для всех процессов."""
+        return int(await self.client.get(self._generation_key) or 0)
+
+    async def put(self, key: str, value: CachedResponse, ttl: float, tags: tuple[str, ...], generation: int) -> None:
+        """Сохранить запись, если с начала её вычисления не было сброса по тегам.
+
+        Проверка поколения и запись выполняются одной транзакцией под WATCH
+        счётчика поколения и множеств тегов: сброс между ними отменяет запись.
+        Множества тегов живут не меньше записи.
+        """
+        entry_key = self._entry_key(key)
+        tag_keys = [self._tag_key(tag) for tag in tags]
+        ttl_ms = max(1, int(ttl * 1000))
+        meta = json.dumps([value.status_code, value.headers], separators=(",", ":")).encode()
+        async with self.client.pipeline(transaction=True) as pipe:
+            for _ in range(_PUT_ATTEMPTS):
+                try:
+                    await pipe.watch(self._generation_key, *tag_keys)
+                    if generation != int(await pipe.get(self._generation_key) or 0):
+                        return
+                    tag_ttls = [await pipe.pttl(tag_key) for tag_key in tag_keys]
+                    pipe.multi()
+                    pipe.set(entry_key, meta + b"\n" + value.body, px=ttl_ms)
+                    for tag_key, tag_ttl in zip(tag_keys, tag_ttls):
+                        pipe.sadd(tag_key, entry_key)
+                        if tag_ttl < ttl_ms:
+                            pipe.pexpire(tag_key, ttl_ms)
+                    await pipe.execute()
+                    return
+                except WatchError:
+                    continue
+        logger.debug(f"Кэш ответов: запись {key} не сохранена из-за параллельных изменений")
+
+    async def invalidate_tags(self, tags: set[str]) -> None:
+        """Сбросить все записи, помеченные любым из тегов.
+
+        Поколение увеличивается до чтения множеств тегов: записи, сохранённые
+        раньше, попадут в чтение, а более поздние запись с прежним поколением
+        отклонит. Из множеств удаляются только найденные ключи, поэтому
+        записи, добавленные следом с новым поколением, не теряют теги.
+        """
+        tag_keys = [self._tag_key(tag) for tag in tags]
+        await self.client.incr(self._generation_key)
+        entry_keys = await self.client.sunion(tag_keys) if tag_keys else set()
+        if not entry_keys:
+            return
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.delete(*entry_keys)
+            for tag_key in tag_keys:
+                pipe.srem(tag_key, *entry_keys)
+            await pipe.execute()
+        logger.debug(f"Кэш ответов: сброшено {len(entry_keys)} записей по тегам {sorted(tags)}")
+
+    async def clear(self) -> None:
+        """Сбросить все записи с префиксом кэша."""
+        keys = [key async for key in self.client.scan_iter(match=f"{self.prefix}entry:*")]
+        keys += [key async for key in self.client.scan_iter(match=f"{self.prefix}tag:*")]
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.incr(self._generation_key)
+            if keys:
+                pipe.delete(*keys)
+            await pipe.execute()
+
+    async def stats(self) -> dict[str, Any]:
+        """Тип хранилища; размер и вытеснения отслеживает сам Redis."""
+        return {"backend": "redis"}
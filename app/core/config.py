@@ -1,4 +1,5 @@
 import logging
+from typing import Literal
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 logger = logging.getLogger(__name__)
@@ -9,6 +10,29 @@ class Settings(BaseSettings):
     DATABASE_URL: str = "postgresql+asyncpg://user:pass@db:5432/mkk_luna_db"
     API_KEY: str = "SECRET_API_KEY"
     APP_NAME: str = "mkk_luna"
+    PAGE_SIZE_DEFAULT: int = 100
+    PAGE_SIZE_MAX: int = 1000
+    AUTOCOMPLETE_MAX_RESULTS: int = 20
+    INDEX_LOAD_ATTEMPTS: int = 3
+    GEO_GRID_CELL_DEG: float = 0.01
+    GEO_CLUSTER_CELLS_PER_TILE: int = 8
+    GEO_CLUSTER_MAX_CELLS: int = 16384
+    GEO_BATCH_MAX_QUERIES: int = 1000
+    REDIS_URL: str | None = None
+    CHANGES_CHANNEL: str = "mkk_luna:changes"
+    CHANGES_RECONNECT_DELAY: float = 0.5
+    CHANGES_RECONNECT_MAX_DELAY: float = 30.0
+    CACHE_ENABLED: bool = True
+    CACHE_BACKEND: Literal["memory", "redis"] = "memory"
+    CACHE_KEY_PREFIX: str = "mkk_luna:cache:"
+    CACHE_MAX_ENTRIES: int = 1024
+    CACHE_DEFAULT_TTL: float = 60.0
+    SINGLEFLIGHT_ENABLED: bool = True
+    BATCH_GET_MAX_IDS: int = 1000
+    ORG_BATCH_WINDOW_MS: float = 0.0
+    STREAM_YIELD_PER: int = 500
+    ORG_READ_PATH: Literal["orm", "json_agg", "rows", "fragments"] = "orm"
+    ORG_FRAGMENT_CACHE_BYTES: int = 64 * 1024 * 1024
 
 logger.info("Загрузка настроек приложения")
 settings = Settings()
@@ -0,0 +1,41 @@
+import logging
+
+from fastapi import HTTPException, Request
+
+logger = logging.getLogger(__name__)
+
+ETAG_HEADER = "ETag"
+
+
+def weak_etag(version: str) -> str:
+    """Слабый ETag по версии ресурса."""
+    return f'W/"{version}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Совпадает ли ETag с заголовком If-None-Match (слабое сравнение, "*" совпадает с любым)."""
+    if not if_none_match:
+        return False
+    opaque = etag.removeprefix("W/")
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == opaque:
+            return True
+    return False
+
+
+def check_etag(request: Request, version: str | None) -> None:
+    """Условный GET по версии ресурса.
+
+    Сохраняет ETag в request.state.etag (CachedRoute выставит его в ответ 200)
+    и отвечает 304, если ETag совпадает с If-None-Match. Вызывается из
+    зависимостей маршрутов до основного запроса и сериализации ответа.
+    При version=None (ресурса нет) ничего не делает.
+    """
+    if version is None:
+        return
+    etag = weak_etag(version)
+    request.state.etag = etag
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        logger.debug(f"Условный GET {request.url.path}: {etag} не изменился")
+        raise HTTPException(304, headers={ETAG_HEADER: etag})
@@ -0,0 +1,88 @@
+import logging
+from collections import namedtuple
+from typing import Callable
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+Change = namedtuple("Change", ["op", "model", "values"])
+"""Изменение одной сущности, зафиксированное транзакцией.
+
+- op: тип изменения ("insert", "update", "relate" или "delete");
+  "relate" означает, что изменились только коллекции связей, но не колонки
+- model: класс модели
+- values: значения колонок сущности на момент flush
+"""
+
+_PENDING_KEY = "pending_changes"
+_subscribers: list[Callable[[list[Change]], None]] = []
+_local_subscribers: list[Callable[[list[Change]], None]] = []
+
+
+def subscribe(handler: Callable[[list[Change]], None]) -> Callable[[list[Change]], None]:
+    """Подписать обработчик на изменения, зафиксированные после commit.
+
+    Обработчик вызывается синхронно из события after_commit и получает
+    список изменений всей транзакции. Может использоваться как декоратор.
+    """
+    _subscribers.append(handler)
+    return handler
+
+
+def subscribe_local(handler: Callable[[list[Change]], None]) -> Callable[[list[Change]], None]:
+    """Подписать обработчик только на изменения, зафиксированные в этом процессе.
+
+    Вызывается после обработчиков subscribe; изменения, полученные от других
+    процессов через dispatch, ему не передаются.
+    """
+    _local_subscribers.append(handler)
+    return handler
+
+
+def dispatch(changes: list[Change]) -> None:
+    """Передать изменения обработчикам, подписанным через subscribe."""
+    _notify(_subscribers, changes)
+
+
+def _notify(handlers: list[Callable[[list[Change]], None]], changes: list[Change]) -> None:
+    for handler in handlers:
+        try:
+            handler(changes)
+        except Exception as e:
+            logger.error(f"Ошибка обработчика изменений {handler.__name__}: {str(e)}", exc_info=True)
+
+
+def _snapshot(obj) -> dict:
+    state = inspect(obj)
+    return {attr.key: state.dict[attr.key] for attr in state.mapper.column_attrs if attr.key in state.dict}
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session: Session, flush_context) -> None:
+    pending = session.info.setdefault(_PENDING_KEY, [])
+    for obj in session.new:
+        pending.append(Change("insert", type(obj), _snapshot(obj)))
+    for obj in session.dirty:
+        if session.is_modified(obj, include_collections=False):
+            pending.append(Change("update", type(obj), _snapshot(obj)))
+        elif session.is_modified(obj):
+            pending.append(Change("relate", type(obj), _snapshot(obj)))
+    for obj in session.deleted:
+        pending.append(Change("delete", type(obj), _snapshot(obj)))
+
+
+@event.listens_for(Session, "after_commit")
+def _dispatch_changes(session: Session) -> None:
+    changes = session.info.pop(_PENDING_KEY, None)
+    if not changes:
+        return
+    logger.debug(f"Зафиксировано изменений: {len(changes)}")
+    dispatch(changes)
+    _notify(_local_subscribers, changes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,116 @@
+import logging
+from collections import OrderedDict
+from typing import Any, Iterable, Mapping
+
+from app.core.config import settings
+from app.core.events import Change, subscribe
+
+logger = logging.getLogger(__name__)
+
+
+class FragmentCache:
+    """Кэш готовых JSON-фрагментов OrganizationOut по id организации и версии документа.
+
+    Версия документа читается тем же запросом, что и id организаций, поэтому
+    фрагмент другой версии не отдаётся, даже если событие об изменении в
+    другом воркере до этого процесса не дошло (например, без REDIS_URL).
+    Фрагменты заполняются лениво загрузчиком load_organization_fragments и
+    хранятся в порядке последнего обращения; при превышении max_bytes (по
+    длине фрагментов в UTF-8) вытесняются самые давние (LRU). Изменения
+    организаций и телефонов (включая связи с видами деятельности) сбрасывают
+    фрагменты этих организаций, изменение или удаление зданий и видов
+    деятельности — весь кэш. Номер поколения, полученный до
+    чтения из БД, не даёт сохранить фрагмент, вычисленный до сброса.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[int, tuple[str, int, str]] = OrderedDict()
+        self.size = 0
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_many(self, versions: Mapping[int, str]) -> dict[int, str]:
+        """Найденные фрагменты по {id: версия}; отсутствующие и устаревшие в результат не попадают."""
+        found = {}
+        for org_id, version in versions.items():
+            entry = self._entries.get(org_id)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                continue
+            self._entries.move_to_end(org_id)
+            found[org_id] = entry[2]
+            self.hits += 1
+        return found
+
+    def put(self, org_id: int, version: str, fragment: str, generation: int) -> None:
+        """Сохранить фрагмент версии version, если с начала его вычисления не было сброса."""
+        if generation != self.generation:
+            return
+        size = len(fragment.encode())
+        if size > self.max_bytes:
+            return
+        self._remove(org_id)
+        self._entries[org_id] = (version, size, fragment)
+        self.size += size
+        while self.size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def invalidate(self, org_ids: Iterable[int] | None = None) -> None:
+        """Сбросить фрагменты организаций; без org_ids — все фрагменты."""
+        self.generation += 1
+        if org_ids is None:
+            self._entries.clear()
+            self.size = 0
+            return
+        for org_id in org_ids:
+            self._remove(org_id)
+
+    def clear(self) -> None:
+        """Сбросить все фрагменты и счётчики."""
+        self.generation += 1
+        self._entries.clear()
+        self.size = 0
+        self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict[str, Any]:
+        """Размер кэша, вытеснения, попадания и промахи."""
+        return {
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def _remove(self, org_id: int) -> None:
+        entry = self._entries.pop(org_id, None)
+        if entry is not None:
+            self.size -= entry[1]
+
+
+org_fragments = FragmentCache(settings.ORG_FRAGMENT_CACHE_BYTES)
+
+
+@subscribe
+def _on_changes(changes: list[Change]) -> None:
+    org_ids = set()
+    for change in changes:
+        model = change.model.__tablename__
+        if model in ("buildings", "activities"):
+            if change.op in ("insert", "relate"):
+                continue
+            org_fragments.invalidate()
+            logger.debug("Кэш фрагментов: сброшены все организации")
+            return
+        if model == "organizations":
+            org_ids.add(change.values.get("id"))
+        elif model == "phones":
+            org_ids.add(change.values.get("organization_id"))
+    if org_ids:
+        org_fragments.invalidate(org_ids)
+        logger.debug(f"Кэш фрагментов: сброшены организации {sorted(i for i in org_ids if i is not None)}")
@@ -0,0 +1,74 @@
+import base64
+import json
+import logging
+from typing import Any, Callable, Sequence
+
+from fastapi import HTTPException, Query, Response
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(key: Sequence[int]) -> str:
+    """Закодировать ключ последней записи страницы в непрозрачный курсор."""
+    raw = json.dumps(list(key), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> tuple[int, ...]:
+    """Раскодировать курсор в ключ записи, после которой начинается страница."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key = json.loads(raw)
+    except ValueError:
+        key = None
+    if not isinstance(key, list) or not key or not all(type(v) is int for v in key):
+        logger.warning(f"Некорректный курсор пагинации: '{cursor[:32]}'")
+        raise HTTPException(400, detail="Invalid cursor")
+    return tuple(key)
+
+
+class PageParams:
+    """Параметры keyset-пагинации списочных эндпоинтов.
+
+    - limit: максимальное число записей на странице
+    - cursor: курсор из заголовка X-Next-Cursor предыдущей страницы
+    """
+
+    def __init__(
+        self,
+        limit: int = Query(settings.PAGE_SIZE_DEFAULT, ge=1, le=settings.PAGE_SIZE_MAX, description="Размер страницы"),
+        cursor: str | None = Query(None, description="Курсор следующей страницы (заголовок X-Next-Cursor)"),
+    ):
+        self.limit = limit
+        self.after = decode_cursor(cursor) if cursor else None
+
+    @property
+    def fetch_limit(self) -> int:
+        """Лимит для запроса к БД: на одну запись больше, чтобы узнать о следующей странице."""
+        return self.limit + 1
+
+    def after_key(self, size: int) -> tuple[int, ...] | None:
+        """Ключ из курсора, проверенный на ожидаемую длину."""
+        if self.after is not None and len(self.after) != size:
+            raise HTTPException(400, detail="Invalid cursor")
+        return self.after
+
+    @property
+    def after_id(self) -> int | None:
+        key = self.after_key(1)
+        return key[0] if key else None
+
+    def apply(
+        self,
+        items: Sequence[Any],
+        response: Response,
+        key: Callable[[Any], Sequence[int]] = lambda item: (item.id,),
+    ) -> list[Any]:
+        """Обрезать выборку до limit и выставить заголовок X-Next-Cursor, если есть следующая страница."""
+        page = list(items[:self.limit])
+        if len(items) > self.limit:
+            response.headers[NEXT_CURSOR_HEADER] = encode_cursor(key(page[-1]))
+        return page
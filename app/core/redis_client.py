@@ -0,0 +1,20 @@
+import logging
+
+from redis.asyncio import Redis
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_client: Redis | None = None
+
+
+def get_redis() -> Redis:
+    """Общий клиент Redis процесса, создаётся при первом обращении по REDIS_URL."""
+    global _client
+    if _client is None:
+        if not settings.REDIS_URL:
+            raise RuntimeError("REDIS_URL не задан")
+        logger.info("Создание клиента Redis")
+        _client = Redis.from_url(settings.REDIS_URL)
+    return _client
@@ -4,9 +4,13 @@ from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+def is_valid_api_key(x_api_key: str | None) -> bool:
+    """Совпадает ли переданный ключ с ключом API сервиса."""
+    return x_api_key == settings.API_KEY
+
 def api_key_auth(x_api_key: str = Header(..., alias="X-API-KEY")):
     logger.debug("Проверка API ключа")
-    if x_api_key != settings.API_KEY:
+    if not is_valid_api_key(x_api_key):
         logger.warning(f"Неудачная попытка аутентификации с ключом: {x_api_key[:10]}...")
         raise HTTPException(status_code=403, detail="Invalid API key")
     logger.debug("API ключ успешно проверен")
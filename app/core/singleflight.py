@@ -0,0 +1,85 @@
+import asyncio
+import functools
+import logging
+from typing import Any, Awaitable, Callable, Hashable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Объединение одинаковых одновременных вызовов в одно выполнение.
+
+    Первый вызов с ключом запускает задачу, остальные ждут её же результата.
+    Исключение задачи получают все ожидающие. Отмена одного ожидающего не
+    отменяет задачу, пока её результат нужен другим; задача отменяется, когда
+    ожидающих не осталось.
+    """
+
+    def __init__(self):
+        self._flights: dict[Hashable, _Flight] = {}
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._flights
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Выполнить fn или присоединиться к уже выполняющемуся вызову с тем же ключом."""
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(fn()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+        else:
+            logger.debug(f"Присоединение к выполняющемуся запросу: {key}")
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                logger.debug(f"Отмена запроса без ожидающих: {key}")
+                flight.task.cancel()
+                self._forget(key, flight)
+
+    def _forget(self, key: Hashable, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+
+read_flights = SingleFlight()
+
+
+def coalesce_reads(fn: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+    """Объединять одновременные одинаковые вызовы функции чтения CRUD.
+
+    Ключ — функция и все аргументы, кроме сессии. Общий вызов выполняется
+    в собственной сессии на том же движке, что и сессия первого вызывающего,
+    поэтому отмена или завершение запроса одного клиента не закрывает
+    соединение, которым пользуются остальные. Отключается настройкой
+    SINGLEFLIGHT_ENABLED.
+    """
+
+    @functools.wraps(fn)
+    async def wrapper(db: AsyncSession, *args, **kwargs):
+        if not settings.SINGLEFLIGHT_ENABLED:
+            return await fn(db, *args, **kwargs)
+        key = (fn.__qualname__, args, tuple(sorted(kwargs.items())))
+
+        async def run():
+            async with AsyncSession(bind=db.bind, expire_on_commit=False) as session:
+                return await fn(session, *args, **kwargs)
+
+        return await read_flights.do(key, run)
+
+    return wrapper
@@ -0,0 +1,24 @@
+import logging
+
+from fastapi import Query, Request
+
+logger = logging.getLogger(__name__)
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+_TRUE_VALUES = {"1", "true", "yes", "on"}
+
+
+def is_stream_request(request: Request) -> bool:
+    """Запрошена ли потоковая выдача: ?stream=1 или Accept: application/x-ndjson."""
+    if request.query_params.get("stream", "").lower() in _TRUE_VALUES:
+        return True
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def stream_requested(
+    request: Request,
+    stream: bool = Query(False, description="Потоковая выдача NDJSON (также Accept: application/x-ndjson)"),
+) -> bool:
+    """Зависимость маршрутов, поддерживающих потоковую выдачу NDJSON."""
+    return stream or is_stream_request(request)
@@ -1,8 +1,10 @@
 import logging
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, tuple_
 from fastapi import HTTPException
 from app.models.activity import Activity
+from app.indexes.activity_tree import activity_tree
+from app.crud import loading
 
 logger = logging.getLogger(__name__)
 
@@ -14,7 +16,14 @@ async def create_activity(db: AsyncSession, name: str, parent_id: int | None):
         level = 1
         logger.debug(f"Создание корневого вида деятельности (level={level})")
     else:
-        parent = await db.get(Activity, parent_id)
+        tree = await activity_tree.ensure_loaded(db)
+        parent = tree.get(parent_id)
+        if not parent:
+            # Индекс мог не получить событие о новом виде деятельности (другой воркер без REDIS_URL)
+            parent = await db.get(Activity, parent_id)
+            if parent:
+                logger.warning(f"Родительская деятельность отсутствует в индексе, индекс сброшен: parent_id={parent_id}")
+                activity_tree.invalidate()
         if not parent:
             logger.error(f"Родительская деятельность не найдена: parent_id={parent_id}")
             raise HTTPException(404, detail="Parent activity not found")
@@ -27,14 +36,50 @@ async def create_activity(db: AsyncSession, name: str, parent_id: int | None):
     act = Activity(name=name, parent_id=parent_id, level=level)
     db.add(act)
     await db.commit()
-    await db.refresh(act)
+    await db.refresh(act, attribute_names=["id", "name", "parent_id", "level"])
     logger.info(f"Вид деятельности успешно создан: id={act.id}, name='{act.name}', level={act.level}")
     return act
 
-async def list_activities(db: AsyncSession):
-    """Получить список всех видов деятельности, отсортированных по уровню и идентификатору."""
+async def list_activities(db: AsyncSession, limit: int | None = None, after: tuple[int, int] | None = None):
+    """Получить список всех видов деятельности, отсортированных по уровню и идентификатору.
+
+    Для постраничного чтения after задаёт ключ (level, id) последней полученной записи.
+    """
     logger.debug("Получение списка всех видов деятельности")
-    res = await db.execute(select(Activity).order_by(Activity.level, Activity.id))
+    stmt = select(Activity).options(*loading.FLAT).order_by(Activity.level, Activity.id)
+    if after is not None:
+        stmt = stmt.where(tuple_(Activity.level, Activity.id) > tuple_(*after))
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    res = await db.execute(stmt)
     activities = res.scalars().all()
     logger.info(f"Получено {len(activities)} видов деятельности")
     return activities
+
+async def get_activity_tree(db: AsyncSession, root_id: int | None = None, max_depth: int | None = None):
+    """Получить дерево видов деятельности в виде вложенной структуры.
+
+    Дерево собирается за O(n) из индекса в памяти, который загружается одним
+    запросом по колонкам (id, name, parent_id, level).
+    """
+    logger.debug(f"Получение дерева видов деятельности: root_id={root_id}, max_depth={max_depth}")
+    tree = await activity_tree.ensure_loaded(db)
+
+    if root_id is None:
+        roots = [node for node in tree.nodes() if node.parent_id is None]
+    else:
+        root = tree.get(root_id)
+        if not root:
+            logger.warning(f"Вид деятельности не найден: id={root_id}")
+            raise HTTPException(404, detail="Activity not found")
+        roots = [root]
+
+    def build(node, depth: int) -> dict:
+        children = []
+        if max_depth is None or depth < max_depth:
+            children = [build(tree.get(child_id), depth + 1) for child_id in node.children]
+        return {"id": node.id, "name": node.name, "level": node.level, "children": children}
+
+    result = [build(root, 1) for root in roots]
+    logger.info(f"Получено дерево видов деятельности: {len(result)} корневых узлов")
+    return result
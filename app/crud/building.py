@@ -2,13 +2,19 @@ import logging
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.models.building import Building
+from app.crud import loading
 
 logger = logging.getLogger(__name__)
 
-async def list_buildings(db: AsyncSession):
+async def list_buildings(db: AsyncSession, limit: int | None = None, after_id: int | None = None):
     """Получить список всех зданий, отсортированных по идентификатору."""
     logger.debug("Получение списка всех зданий")
-    res = await db.execute(select(Building).order_by(Building.id))
+    stmt = select(Building).options(*loading.FLAT).order_by(Building.id)
+    if after_id is not None:
+        stmt = stmt.where(Building.id > after_id)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    res = await db.execute(stmt)
     buildings = res.scalars().all()
     logger.info(f"Получено {len(buildings)} зданий")
     return buildings
@@ -0,0 +1,441 @@
+"""Профили и способы загрузки организаций для запросов CRUD.
+
+Все связи моделей объявлены с lazy="selectin", поэтому запрос без явных опций
+каскадом подтягивает связанные организации, телефоны и виды деятельности.
+Каждая функция CRUD указывает профиль явно: нужные схеме ответа связи
+загружаются жадно, остальные закрыты raiseload и не порождают запросов.
+
+Списочные функции CRUD строят отфильтрованный и упорядоченный select(Organization)
+и передают его загрузчику (Loader), который решает, в каком виде получить строки:
+ORM-объектами, готовыми JSON-документами OrganizationOut, словарями в форме
+OrganizationOut, собранными из строк без ORM и Pydantic, или JSON-фрагментами
+из кэша фрагментов. Для потоковой
+выдачи тот же select передаётся потоковому загрузчику (Streamer), который
+читает строки серверным курсором порциями по STREAM_YIELD_PER.
+"""
+import json
+from functools import lru_cache
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, NamedTuple, Sequence
+
+import orjson
+
+from sqlalchemy import Integer, Select, Text, any_, cast, func, literal, literal_column, select
+from sqlalchemy.dialects.postgresql import ARRAY, aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import RelationshipProperty, joinedload, load_only, raiseload, selectinload
+
+from app.core.config import settings
+from app.core.fragments import org_fragments
+from app.models.activity import Activity
+from app.models.building import Building
+from app.models.organization import Organization, organization_activity
+from app.models.phone import Phone
+from app.schemas.organization import Projection
+
+FLAT = (raiseload("*"),)
+"""Только колонки сущности (BuildingOut, ActivityOut)."""
+
+ORGANIZATION_OUT = (
+    joinedload(Organization.building).raiseload("*"),
+    joinedload(Organization.phones).raiseload("*"),
+    joinedload(Organization.activities).raiseload("*"),
+    raiseload("*"),
+)
+"""Организация со зданием, телефонами и видами деятельности (OrganizationOut)."""
+
+ORGANIZATION_OUT_STREAM = (
+    joinedload(Organization.building).raiseload("*"),
+    selectinload(Organization.phones).raiseload("*"),
+    selectinload(Organization.activities).raiseload("*"),
+    raiseload("*"),
+)
+"""Профиль OrganizationOut для потокового чтения: yield_per несовместим с joinedload коллекций,
+поэтому телефоны и виды деятельности догружаются отдельным запросом на каждую порцию."""
+
+Loader = Callable[[AsyncSession, Select], Awaitable[Sequence[Any]]]
+Streamer = Callable[[AsyncSession, Select], AsyncIterator[Any]]
+
+
+async def load_organizations(db: AsyncSession, stmt: Select) -> Sequence[Organization]:
+    """Загрузить организации ORM-объектами с профилем ORGANIZATION_OUT."""
+    res = await db.execute(stmt.options(*ORGANIZATION_OUT))
+    return res.scalars().unique().all()
+
+
+async def stream_organizations(db: AsyncSession, stmt: Select) -> AsyncIterator[Organization]:
+    """Читать организации ORM-объектами порциями с профилем ORGANIZATION_OUT_STREAM."""
+    res = await db.stream(
+        stmt.options(*ORGANIZATION_OUT_STREAM).execution_options(yield_per=settings.STREAM_YIELD_PER)
+    )
+    async for org in res.scalars():
+        yield org
+
+
+def projection_options(projection: Projection, stream: bool = False) -> tuple:
+    """Профиль загрузки только полей projection (параметр fields).
+
+    Колонки организации и связанных сущностей ограничиваются load_only, связи
+    вне projection не загружаются и закрыты raiseload. Для потокового чтения
+    коллекции загружаются selectinload, как в ORGANIZATION_OUT_STREAM.
+    """
+    columns = [Organization.id]
+    options = []
+    for name, nested in projection:
+        attr = getattr(Organization, name)
+        if not isinstance(attr.property, RelationshipProperty):
+            columns.append(attr)
+            continue
+        option = selectinload(attr) if stream and attr.property.uselist else joinedload(attr)
+        if nested is not None:
+            target = attr.property.mapper.class_
+            option = option.load_only(*(getattr(target, field) for field in nested))
+        options.append(option.raiseload("*"))
+    return (load_only(*columns), *options, raiseload("*"))
+
+
+@lru_cache(maxsize=256)
+def projection_loader(projection: Projection) -> Loader:
+    """Загрузчик ORM-объектов с профилем projection_options; один на набор полей."""
+    options = projection_options(projection)
+
+    async def load_projection(db: AsyncSession, stmt: Select) -> Sequence[Organization]:
+        res = await db.execute(stmt.options(*options))
+        return res.scalars().unique().all()
+
+    return load_projection
+
+
+@lru_cache(maxsize=256)
+def projection_streamer(projection: Projection) -> Streamer:
+    """Потоковый загрузчик ORM-объектов с профилем projection_options; один на набор полей."""
+    options = projection_options(projection, stream=True)
+
+    async def stream_projection(db: AsyncSession, stmt: Select) -> AsyncIterator[Organization]:
+        res = await db.stream(stmt.options(*options).execution_options(yield_per=settings.STREAM_YIELD_PER))
+        async for org in res.scalars():
+            yield org
+
+    return stream_projection
+
+
+_EMPTY_JSON_ARRAY = literal_column("'[]'::json")
+
+_building_document = (
+    select(
+        func.json_build_object(
+            "id", Building.id,
+            "address", Building.address,
+            "latitude", Building.latitude,
+            "longitude", Building.longitude,
+        )
+    )
+    .where(Building.id == Organization.building_id)
+    .correlate(Organization)
+    .scalar_subquery()
+)
+
+_phones_document = (
+    select(
+        func.coalesce(
+            func.json_agg(aggregate_order_by(func.json_build_object("id", Phone.id, "number", Phone.number), Phone.id)),
+            _EMPTY_JSON_ARRAY,
+        )
+    )
+    .where(Phone.organization_id == Organization.id)
+    .correlate(Organization)
+    .scalar_subquery()
+)
+
+_activities_document = (
+    select(
+        func.coalesce(
+            func.json_agg(
+                aggregate_order_by(
+                    func.json_build_object(
+                        "id", Activity.id,
+                        "name", Activity.name,
+                        "parent_id", Activity.parent_id,
+                        "level", Activity.level,
+                    ),
+                    Activity.id,
+                )
+            ),
+            _EMPTY_JSON_ARRAY,
+        )
+    )
+    .select_from(organization_activity.join(Activity, Activity.id == organization_activity.c.activity_id))
+    .where(organization_activity.c.organization_id == Organization.id)
+    .correlate(Organization)
+    .scalar_subquery()
+)
+
+ORGANIZATION_DOCUMENT = cast(
+    func.json_build_object(
+        "id", Organization.id,
+        "name", Organization.name,
+        "building", _building_document,
+        "phones", _phones_document,
+        "activities", _activities_document,
+    ),
+    Text,
+).label("document")
+"""JSON-документ организации в форме OrganizationOut, собираемый на стороне Postgres."""
+
+
+async def load_organization_documents(db: AsyncSession, stmt: Select) -> Sequence[Any]:
+    """Загрузить организации строками (id, document) без создания ORM-объектов.
+
+    Документ каждой организации собирается в БД через json_build_object/json_agg
+    по коррелированным подзапросам, поэтому нет декартова произведения телефонов
+    и видов деятельности и не нужна дедупликация строк.
+    """
+    res = await db.execute(stmt.with_only_columns(Organization.id, ORGANIZATION_DOCUMENT))
+    return res.all()
+
+
+async def stream_organization_documents(db: AsyncSession, stmt: Select) -> AsyncIterator[Any]:
+    """Читать организации строками (id, document) порциями без создания ORM-объектов."""
+    res = await db.stream(
+        stmt.with_only_columns(Organization.id, ORGANIZATION_DOCUMENT)
+        .execution_options(yield_per=settings.STREAM_YIELD_PER)
+    )
+    async for row in res:
+        yield row
+
+
+class OrganizationRow(NamedTuple):
+    """Организация словарём data в форме OrganizationOut (порядок ключей как у полей схемы)."""
+
+    id: int
+    data: dict[str, Any]
+
+
+def _exact_float(value: float) -> bool:
+    """Совпадает ли запись числа в orjson с записью стандартного json (без экспоненты)."""
+    return "e" not in repr(value)
+
+
+def encode_json(content: Any, buildings: Iterable[dict[str, Any]]) -> bytes:
+    """Сериализовать ответ в те же байты, что JSONResponse после response_model.
+
+    Кодирует orjson; он расходится со стандартным json только в записи чисел
+    с экспонентой (1e-05 против 0.00001), поэтому ответы с такими координатами
+    зданий buildings кодируются стандартным json с настройками JSONResponse.
+    """
+    if all(_exact_float(b["latitude"]) and _exact_float(b["longitude"]) for b in buildings):
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def encode_rows(content: Any, rows: Sequence[OrganizationRow | None]) -> bytes:
+    """Сериализовать ответ из OrganizationRow функцией encode_json."""
+    return encode_json(content, (row.data["building"] for row in rows if row is not None))
+
+
+async def _phones_by_organization(db: AsyncSession, ids) -> dict[int, list[dict[str, Any]]]:
+    phones: dict[int, list[dict[str, Any]]] = {}
+    res = await db.execute(
+        select(Phone.organization_id, Phone.id, Phone.number)
+        .where(Phone.organization_id == any_(ids))
+        .order_by(Phone.id)
+    )
+    for org_id, phone_id, number in res:
+        phones.setdefault(org_id, []).append({"id": phone_id, "number": number})
+    return phones
+
+
+def _rows_stmt(stmt: Select) -> Select:
+    return stmt.with_only_columns(
+        Organization.id, Organization.name, Building.id, Building.address, Building.latitude, Building.longitude
+    ).join(Building, Building.id == Organization.building_id)
+
+
+async def _organization_rows(db: AsyncSession, base: Sequence[Any]) -> list[OrganizationRow]:
+    """Дополнить строки организаций со зданием телефонами и видами деятельности.
+
+    Телефоны и виды деятельности всех организаций читаются двумя запросами
+    по массиву id, упорядоченными по id, как в ORGANIZATION_DOCUMENT.
+    """
+    if not base:
+        return []
+    ids = literal([row[0] for row in base], ARRAY(Integer))
+    phones = await _phones_by_organization(db, ids)
+    activities: dict[int, list[dict[str, Any]]] = {}
+    res = await db.execute(
+        select(organization_activity.c.organization_id, Activity.id, Activity.name, Activity.parent_id, Activity.level)
+        .join(Activity, Activity.id == organization_activity.c.activity_id)
+        .where(organization_activity.c.organization_id == any_(ids))
+        .order_by(Activity.id)
+    )
+    for org_id, activity_id, name, parent_id, level in res:
+        activities.setdefault(org_id, []).append(
+            {"id": activity_id, "name": name, "parent_id": parent_id, "level": level}
+        )
+    return [
+        OrganizationRow(org_id, {
+            "id": org_id,
+            "name": name,
+            "building": {"id": building_id, "address": address, "latitude": latitude, "longitude": longitude},
+            "phones": phones.get(org_id, []),
+            "activities": activities.get(org_id, []),
+        })
+        for org_id, name, building_id, address, latitude, longitude in base
+    ]
+
+
+async def load_organization_rows(db: AsyncSession, stmt: Select) -> list[OrganizationRow]:
+    """Загрузить организации словарями OrganizationRow без ORM-объектов и валидации Pydantic.
+
+    Организации со зданием читаются одним запросом, телефоны и виды
+    деятельности — ещё двумя на всю выборку.
+    """
+    res = await db.execute(_rows_stmt(stmt))
+    return await _organization_rows(db, res.all())
+
+
+async def stream_organization_rows(db: AsyncSession, stmt: Select) -> AsyncIterator[OrganizationRow]:
+    """Читать организации словарями OrganizationRow порциями по STREAM_YIELD_PER."""
+    res = await db.stream(_rows_stmt(stmt).execution_options(yield_per=settings.STREAM_YIELD_PER))
+    async for partition in res.partitions():
+        for row in await _organization_rows(db, partition):
+            yield row
+
+
+class OrganizationRef(NamedTuple):
+    """Организация нормализованного ответа.
+
+    - id: идентификатор организации
+    - data: словарь {"id", "name", "building_id", "phones", "activity_ids"}
+    - building: словарь BuildingOut, общий для всех организаций здания
+    - activities: словари ActivityOut, общие для всех организаций выборки
+    """
+
+    id: int
+    data: dict[str, Any]
+    building: dict[str, Any]
+    activities: list[dict[str, Any]]
+
+
+async def load_organization_refs(db: AsyncSession, stmt: Select) -> list[OrganizationRef]:
+    """Загрузить организации со ссылками на здания и виды деятельности (format=normalized).
+
+    Здания и виды деятельности читаются по одному разу на всю выборку по
+    массивам их id, а не для каждой организации, поэтому число запросов
+    не зависит от размера выборки.
+    """
+    res = await db.execute(stmt.with_only_columns(Organization.id, Organization.name, Organization.building_id))
+    base = res.all()
+    if not base:
+        return []
+    ids = literal([row[0] for row in base], ARRAY(Integer))
+    phones = await _phones_by_organization(db, ids)
+    activity_ids: dict[int, list[int]] = {}
+    res = await db.execute(
+        select(organization_activity.c.organization_id, organization_activity.c.activity_id)
+        .where(organization_activity.c.organization_id == any_(ids))
+        .order_by(organization_activity.c.activity_id)
+    )
+    for org_id, activity_id in res:
+        activity_ids.setdefault(org_id, []).append(activity_id)
+    res = await db.execute(
+        select(Building.id, Building.address, Building.latitude, Building.longitude)
+        .where(Building.id == any_(literal(list({row[2] for row in base}), ARRAY(Integer))))
+    )
+    buildings = {
+        building_id: {"id": building_id, "address": address, "latitude": latitude, "longitude": longitude}
+        for building_id, address, latitude, longitude in res
+    }
+    activities: dict[int, dict[str, Any]] = {}
+    all_activity_ids = list(set().union(*activity_ids.values()))
+    if all_activity_ids:
+        res = await db.execute(
+            select(Activity.id, Activity.name, Activity.parent_id, Activity.level)
+            .where(Activity.id == any_(literal(all_activity_ids, ARRAY(Integer))))
+        )
+        activities = {
+            activity_id: {"id": activity_id, "name": name, "parent_id": parent_id, "level": level}
+            for activity_id, name, parent_id, level in res
+        }
+    return [
+        OrganizationRef(
+            org_id,
+            {
+                "id": org_id,
+                "name": name,
+                "building_id": building_id,
+                "phones": phones.get(org_id, []),
+                "activity_ids": activity_ids.get(org_id, []),
+            },
+            buildings[building_id],
+            [activities[activity_id] for activity_id in activity_ids.get(org_id, [])],
+        )
+        for org_id, name, building_id in base
+    ]
+
+
+class OrganizationDocument(NamedTuple):
+    """Организация готовым JSON-документом OrganizationOut."""
+
+    id: int
+    document: str
+
+
+_LINKED_ACTIVITIES_VERSION = (
+    select(func.concat(func.count(), ".", func.coalesce(func.max(Activity.version), 0)))
+    .select_from(organization_activity.join(Activity, Activity.id == organization_activity.c.activity_id))
+    .where(organization_activity.c.organization_id == Organization.id)
+    .correlate(Organization)
+    .scalar_subquery()
+)
+
+DOCUMENT_VERSION = func.concat_ws("-", Organization.version, Building.version, _LINKED_ACTIVITIES_VERSION)
+"""Версия документа OrganizationOut: версии организации и здания, число и max(version) видов деятельности."""
+
+
+def _fragments_stmt(stmt: Select) -> Select:
+    return stmt.with_only_columns(Organization.id, DOCUMENT_VERSION).join(
+        Building, Building.id == Organization.building_id
+    )
+
+
+async def _organization_fragments(
+    db: AsyncSession, versions: Sequence[tuple[int, str]], generation: int
+) -> list[OrganizationDocument]:
+    """Документы организаций в порядке versions (пары id, версия документа).
+
+    Фрагменты той же версии берутся из кэша, промахи и устаревшие версии
+    собираются через load_organization_rows.
+    """
+    wanted = dict(versions)
+    fragments = org_fragments.get_many(wanted)
+    missing = [org_id for org_id in wanted if org_id not in fragments]
+    if missing:
+        rows = await load_organization_rows(
+            db, select(Organization).where(Organization.id == any_(literal(missing, ARRAY(Integer))))
+        )
+        for row in rows:
+            fragment = encode_rows(row.data, [row]).decode()
+            org_fragments.put(row.id, wanted[row.id], fragment, generation)
+            fragments[row.id] = fragment
+    return [OrganizationDocument(org_id, fragments[org_id]) for org_id, _ in versions if org_id in fragments]
+
+
+async def load_organization_fragments(db: AsyncSession, stmt: Select) -> list[OrganizationDocument]:
+    """Загрузить организации JSON-фрагментами из кэша фрагментов.
+
+    Запрос выборки читает только id организаций и версии их документов;
+    документы берутся из кэша, из БД догружаются и кодируются только
+    отсутствующие в нём или изменившиеся организации.
+    """
+    generation = org_fragments.generation
+    res = await db.execute(_fragments_stmt(stmt))
+    return await _organization_fragments(db, res.tuples().all(), generation)
+
+
+async def stream_organization_fragments(db: AsyncSession, stmt: Select) -> AsyncIterator[OrganizationDocument]:
+    """Читать организации JSON-фрагментами порциями по STREAM_YIELD_PER."""
+    generation = org_fragments.generation
+    res = await db.stream(_fragments_stmt(stmt).execution_options(yield_per=settings.STREAM_YIELD_PER))
+    async for partition in res.partitions():
+        for document in await _organization_fragments(db, [tuple(row) for row in partition], generation):
+            yield document
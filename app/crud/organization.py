@@ -1,180 +1,638 @@
 import logging
 import math
+from typing import Any, Sequence
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, text, bindparam
-from sqlalchemy.orm import joinedload
-from app.models.organization import Organization
+from sqlalchemy import select, func, literal, literal_column, union_all, case, true, Integer, Float, any_
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import with_expression
+from app.models.organization import PG_TRGM_INSTALLED, Organization, organization_activity
 from app.models.phone import Phone
-from app.models.activity import Activity
+from app.models.activity import Activity, activity_closure
 from app.models.building import Building
+from app.indexes.activity_tree import activity_tree
+from app.indexes.building_grid import building_grid
+from app.core.batching import BatchLoader
+from app.core.config import settings
+from app.core.singleflight import coalesce_reads
+from app.crud import loading
+from app.crud.loading import Loader, Streamer, load_organizations, stream_organizations
 
 logger = logging.getLogger(__name__)
 
-async def get_org(db: AsyncSession, org_id: int):
+def _orgs_with_activities(activity_ids: set[int]):
+    """Подзапрос идентификаторов организаций, привязанных к любому из видов деятельности."""
+    return (
+        select(organization_activity.c.organization_id)
+        .where(organization_activity.c.activity_id.in_(sorted(activity_ids)))
+    )
+
+DEGREES_PER_METER_LAT = 1.0 / 111000.0
+EARTH_RADIUS_M = 6371008.8
+
+def bounding_box(center_lat: float, center_lon: float, width_m: float, height_m: float):
+    """Границы прямоугольника (min_lat, max_lat, min_lon, max_lon) вокруг точки в градусах."""
+    half_height_deg = (height_m / 2.0) * DEGREES_PER_METER_LAT
+    half_width_deg = (width_m / 2.0) * DEGREES_PER_METER_LAT / math.cos(math.radians(center_lat))
+    return (
+        center_lat - half_height_deg,
+        center_lat + half_height_deg,
+        center_lon - half_width_deg,
+        center_lon + half_width_deg,
+    )
+
+def buildings_in_box(min_lat: float, max_lat: float, min_lon: float, max_lon: float):
+    """Подзапрос идентификаторов зданий, попадающих в прямоугольник координат.
+
+    Условия по latitude и longitude обслуживаются составным индексом
+    ix_buildings_lat_lon (latitude, longitude, id): диапазон по широте ограничивает
+    сканирование, долгота проверяется по записям индекса без обращения к таблице.
+    """
+    return (
+        select(Building.id)
+        .where(Building.latitude.between(min_lat, max_lat))
+        .where(Building.longitude.between(min_lon, max_lon))
+    )
+
+def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Расстояние в метрах между двумя точками по формуле гаверсинусов."""
+    a = (
+        math.sin(math.radians(lat2 - lat1) / 2) ** 2
+        + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2))
+        * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+def haversine_sql(lat1, lon1, lat2, lon2):
+    """SQL-выражение расстояния в метрах по формуле гаверсинусов (как haversine_m)."""
+    a = (
+        func.power(func.sin(func.radians(lat2 - lat1) * 0.5), 2)
+        + func.cos(func.radians(lat1)) * func.cos(func.radians(lat2))
+        * func.power(func.sin(func.radians(lon2 - lon1) * 0.5), 2)
+    )
+    return 2 * EARTH_RADIUS_M * func.asin(func.least(1.0, func.sqrt(a)))
+
+def _paginate(stmt, limit: int | None, after_id: int | None):
+    """Применить keyset-пагинацию по Organization.id к упорядоченному списку организаций."""
+    if after_id is not None:
+        stmt = stmt.where(Organization.id > after_id)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
+
+async def get_org(db: AsyncSession, org_id: int, loader: Loader = load_organizations):
     """Получить организацию по идентификатору."""
     logger.debug(f"Получение организации: id={org_id}")
     stmt = (
         select(Organization)
-        .options(
-            joinedload(Organization.building),
-            joinedload(Organization.phones),
-            joinedload(Organization.activities),
-        )
         .where(Organization.id == org_id)
     )
-    res = await db.execute(stmt)
-    org = res.scalars().first()
+    orgs = await loader(db, stmt)
+    org = orgs[0] if orgs else None
     if org:
-        logger.info(f"Организация найдена: id={org_id}, name='{org.name}'")
+        logger.info(f"Организация найдена: id={org_id}")
     else:
         logger.warning(f"Организация не найдена: id={org_id}")
     return org
 
-async def search_by_name(db: AsyncSession, name: str):
-    """Поиск организаций по названию (частичное совпадение, без учета регистра)."""
-    logger.debug(f"Поиск организаций по названию: '{name}'")
+async def get_orgs(db: AsyncSession, org_ids: Sequence[int], loader: Loader = load_organizations) -> list[Any]:
+    """Получить организации по списку идентификаторов одним запросом.
+
+    Результат соответствует org_ids по порядку; для отсутствующих организаций — None.
+    """
+    logger.debug(f"Получение организаций по {len(org_ids)} идентификаторам")
+    unique_ids = sorted(set(org_ids))
+    stmt = select(Organization).where(Organization.id == any_(literal(unique_ids, ARRAY(Integer))))
+    orgs_by_id = {org.id: org for org in await loader(db, stmt)} if unique_ids else {}
+    logger.info(f"Найдено {len(orgs_by_id)} из {len(unique_ids)} организаций")
+    return [orgs_by_id.get(org_id) for org_id in org_ids]
+
+async def _load_orgs_batch(group: tuple, org_ids: list[int]) -> dict[int, Any]:
+    bind, loader = group
+    async with AsyncSession(bind=bind, expire_on_commit=False) as session:
+        orgs = await get_orgs(session, org_ids, loader)
+    return {org.id: org for org in orgs if org is not None}
+
+org_batch_loader = BatchLoader(_load_orgs_batch, settings.ORG_BATCH_WINDOW_MS / 1000)
+
+async def get_org_batched(db: AsyncSession, org_id: int, loader: Loader = load_organizations):
+    """Получить организацию по идентификатору в составе пакета.
+
+    Одновременные вызовы в пределах окна ORG_BATCH_WINDOW_MS объединяются в один
+    запрос get_orgs, выполняемый в собственной сессии на движке сессии db.
+    При окне 0 (по умолчанию) пакетирование выключено и запрос выполняется
+    в сессии db без ожидания.
+    """
+    if settings.ORG_BATCH_WINDOW_MS <= 0:
+        return await get_org(db, org_id, loader)
+    return await org_batch_loader.load((db.bind, loader), org_id)
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+_pg_trgm: bool | None = None
+
+async def _has_pg_trgm(db: AsyncSession) -> bool:
+    """Установлено ли расширение pg_trgm (проверяется один раз на процесс)."""
+    global _pg_trgm
+    if _pg_trgm is None:
+        _pg_trgm = bool(await db.scalar(PG_TRGM_INSTALLED))
+        if not _pg_trgm:
+            logger.warning("Расширение pg_trgm не установлено, поиск по сходству упорядочивает по позиции совпадения")
+    return _pg_trgm
+
+async def search_by_name(
+    db: AsyncSession,
+    name: str,
+    limit: int | None = None,
+    after_id: int | None = None,
+    ranked: bool = False,
+    loader: Loader = load_organizations,
+):
+    """Поиск организаций по названию (частичное совпадение, без учета регистра).
+
+    Условие lower(name) LIKE '%...%' обслуживается триграммным GIN-индексом
+    ix_organizations_name_trgm. При ranked=True результаты упорядочиваются по
+    триграммному сходству с запросом (pg_trgm similarity), лучшие совпадения первыми;
+    без pg_trgm — по позиции совпадения в названии, затем по длине названия.
+    """
+    logger.debug(f"Поиск организаций по названию: '{name}', ranked={ranked}")
+    query = name.lower()
+    lowered_name = func.lower(Organization.name)
     stmt = (
         select(Organization)
-        .options(joinedload(Organization.building), joinedload(Organization.phones), joinedload(Organization.activities))
-        .where(func.lower(Organization.name).like(f"%{name.lower()}%"))
-        .order_by(Organization.id)
+        .where(lowered_name.like(f"%{_escape_like(query)}%", escape="\\"))
     )
-    res = await db.execute(stmt)
-    orgs = res.scalars().unique().all()
+    if ranked:
+        if await _has_pg_trgm(db):
+            stmt = stmt.order_by(func.similarity(lowered_name, query).desc(), Organization.id)
+        else:
+            stmt = stmt.order_by(func.strpos(lowered_name, query), func.length(Organization.name), Organization.id)
+        if limit is not None:
+            stmt = stmt.limit(limit)
+    else:
+        stmt = _paginate(stmt.order_by(Organization.id), limit, after_id)
+    orgs = await loader(db, stmt)
     logger.info(f"Найдено {len(orgs)} организаций по запросу '{name}'")
     return orgs
 
-async def list_by_building(db: AsyncSession, building_id: int):
+async def _search_conditions(
+    db: AsyncSession,
+    name: str | None = None,
+    activity_id: int | None = None,
+    building_id: int | None = None,
+    area: tuple[float, float, float, float] | None = None,
+) -> list | None:
+    """Условия отбора организаций для комбинированного поиска.
+
+    Поддерево вида деятельности и здания в прямоугольной области area
+    (lat, lon, width_m, height_m) разрешаются по индексам в памяти в списки
+    идентификаторов. Условия упорядочены от наиболее избирательного: здание,
+    область, вид деятельности, название. Если какой-то фильтр заведомо ничего
+    не находит, возвращается None, и запрос к БД не нужен.
+    """
+    conditions = []
+    building_ids = None
+    if building_id is not None:
+        building_ids = [building_id]
+    if area is not None:
+        grid = await building_grid.ensure_loaded(db)
+        in_area = [b_id for b_id, _, _ in grid.within(*bounding_box(*area))]
+        if building_ids is None:
+            building_ids = in_area
+        else:
+            building_ids = [b_id for b_id in building_ids if b_id in set(in_area)]
+    if building_ids is not None:
+        if not building_ids:
+            return None
+        if len(building_ids) == 1:
+            conditions.append(Organization.building_id == building_ids[0])
+        else:
+            conditions.append(Organization.building_id == any_(literal(building_ids, ARRAY(Integer))))
+    if activity_id is not None:
+        tree = await activity_tree.ensure_loaded(db)
+        activity_ids = tree.descendants(activity_id)
+        if not activity_ids:
+            return None
+        conditions.append(Organization.id.in_(_orgs_with_activities(activity_ids)))
+    if name is not None:
+        conditions.append(func.lower(Organization.name).like(f"%{_escape_like(name.lower())}%", escape="\\"))
+    return conditions
+
+async def search_combined(
+    db: AsyncSession,
+    name: str | None = None,
+    activity_id: int | None = None,
+    building_id: int | None = None,
+    area: tuple[float, float, float, float] | None = None,
+    limit: int | None = None,
+    after_id: int | None = None,
+    loader: Loader = load_organizations,
+):
+    """Комбинированный поиск организаций по любому сочетанию фильтров одним запросом.
+
+    - name: часть названия организации (без учета регистра)
+    - activity_id: вид деятельности, включая дочерние
+    - building_id: здание
+    - area: прямоугольная область (lat, lon, width_m, height_m)
+    """
+    logger.debug(
+        f"Комбинированный поиск организаций: name={name!r}, activity_id={activity_id}, "
+        f"building_id={building_id}, area={area}"
+    )
+    conditions = await _search_conditions(db, name, activity_id, building_id, area)
+    if conditions is None:
+        logger.info("Комбинированный поиск: фильтры заведомо не дают результатов")
+        return []
+    stmt = select(Organization).where(*conditions).order_by(Organization.id)
+    stmt = _paginate(stmt, limit, after_id)
+    orgs = await loader(db, stmt)
+    logger.info(f"Комбинированный поиск: найдено {len(orgs)} организаций")
+    return orgs
+
+FACETS = ("activity", "building")
+
+async def count_facets(
+    db: AsyncSession,
+    facets: set[str],
+    name: str | None = None,
+    activity_id: int | None = None,
+    building_id: int | None = None,
+    area: tuple[float, float, float, float] | None = None,
+) -> dict[str, list[dict]]:
+    """Посчитать число найденных организаций по видам деятельности и зданиям.
+
+    Фильтры совпадают с search_combined. Отобранные организации помещаются в CTE,
+    по которому одним запросом (UNION ALL агрегатов) считаются запрошенные
+    фасеты: activity — по видам деятельности верхнего уровня с учетом всех
+    дочерних (через activity_closure), building — по зданиям. Значения
+    упорядочены по убыванию числа организаций.
+    """
+    logger.debug(f"Подсчёт фасетов {sorted(facets)}: name={name!r}, activity_id={activity_id}, building_id={building_id}, area={area}")
+    result = {facet: [] for facet in FACETS if facet in facets}
+    conditions = await _search_conditions(db, name, activity_id, building_id, area)
+    if conditions is None or not result:
+        return result
+    filtered = select(Organization.id, Organization.building_id).where(*conditions).cte("filtered")
+    parts = []
+    if "activity" in result:
+        parts.append(
+            select(
+                literal_column("'activity'").label("facet"),
+                activity_closure.c.ancestor_id.label("value"),
+                func.count(func.distinct(filtered.c.id)).label("count"),
+            )
+            .select_from(filtered)
+            .join(organization_activity, organization_activity.c.organization_id == filtered.c.id)
+            .join(activity_closure, activity_closure.c.descendant_id == organization_activity.c.activity_id)
+            .join(Activity, Activity.id == activity_closure.c.ancestor_id)
+            .where(Activity.level == 1)
+            .group_by(activity_closure.c.ancestor_id)
+        )
+    if "building" in result:
+        parts.append(
+            select(
+                literal_column("'building'").label("facet"),
+                filtered.c.building_id.label("value"),
+                func.count().label("count"),
+            )
+            .group_by(filtered.c.building_id)
+        )
+    stmt = union_all(*parts) if len(parts) > 1 else parts[0]
+    res = await db.execute(stmt)
+    for facet, value, count in res.all():
+        result[facet].append({"id": value, "count": count})
+    for values in result.values():
+        values.sort(key=lambda item: (-item["count"], item["id"]))
+    logger.info(f"Фасеты посчитаны: {', '.join(f'{k}={len(v)}' for k, v in result.items())}")
+    return result
+
+@coalesce_reads
+async def list_by_building(
+    db: AsyncSession,
+    building_id: int,
+    limit: int | None = None,
+    after_id: int | None = None,
+    loader: Loader = load_organizations,
+):
     """Получить список всех организаций в указанном здании."""
     logger.debug(f"Получение организаций в здании: building_id={building_id}")
     stmt = (
         select(Organization)
-        .options(joinedload(Organization.building), joinedload(Organization.phones), joinedload(Organization.activities))
         .where(Organization.building_id == building_id)
         .order_by(Organization.id)
     )
-    res = await db.execute(stmt)
-    orgs = res.scalars().unique().all()
+    stmt = _paginate(stmt, limit, after_id)
+    orgs = await loader(db, stmt)
     logger.info(f"Найдено {len(orgs)} организаций в здании {building_id}")
     return orgs
 
-async def list_by_activity_with_descendants(db: AsyncSession, activity_id: int):
+@coalesce_reads
+async def list_by_activity_with_descendants(
+    db: AsyncSession,
+    activity_id: int,
+    limit: int | None = None,
+    after_id: int | None = None,
+    loader: Loader = load_organizations,
+):
     """Получить список организаций по виду деятельности, включая дочерние виды деятельности."""
     logger.debug(f"Получение организаций по виду деятельности: activity_id={activity_id}")
-    sql = text("""
-        WITH RECURSIVE act_tree AS (
-            SELECT id, parent_id FROM activities WHERE id = :root_id
-            UNION ALL
-            SELECT a.id, a.parent_id
-            FROM activities a
-            JOIN act_tree t ON a.parent_id = t.id
-        )
-        SELECT DISTINCT o.id
-        FROM organizations o
-        JOIN organization_activity oa ON oa.organization_id = o.id
-        JOIN act_tree t ON t.id = oa.activity_id
-        ORDER BY o.id
-    """)
-    rows = (await db.execute(sql, {"root_id": activity_id})).fetchall()
-    ids = [r[0] for r in rows]
-    if not ids:
-        logger.info(f"Организации по виду деятельности {activity_id} не найдены")
+    tree = await activity_tree.ensure_loaded(db)
+    activity_ids = tree.descendants(activity_id)
+    if not activity_ids:
+        logger.info(f"Вид деятельности {activity_id} отсутствует в дереве")
         return []
-    logger.debug(f"Найдено {len(ids)} организаций через рекурсивный запрос")
-    stmt = (
-        select(Organization)
-        .options(joinedload(Organization.building), joinedload(Organization.phones), joinedload(Organization.activities))
-        .where(Organization.id.in_(ids))
-        .order_by(Organization.id)
-    )
-    res = await db.execute(stmt)
-    orgs = res.scalars().unique().all()
+    orgs = await _list_by_activity_ids(db, activity_ids, limit, after_id, loader)
     logger.info(f"Получено {len(orgs)} организаций по виду деятельности {activity_id}")
     return orgs
 
-async def list_by_activity_name_with_descendants(db: AsyncSession, activity_name: str):
+@coalesce_reads
+async def list_by_activity_name_with_descendants(
+    db: AsyncSession,
+    activity_name: str,
+    limit: int | None = None,
+    after_id: int | None = None,
+    loader: Loader = load_organizations,
+):
     """Поиск организаций по названию вида деятельности, включая дочерние виды деятельности."""
     logger.debug(f"Поиск организаций по названию вида деятельности: '{activity_name}'")
-    stmt = select(Activity).where(func.lower(Activity.name) == activity_name.lower())
-    res = await db.execute(stmt)
-    matching_activities = res.scalars().all()
-
-    if not matching_activities:
+    tree = await activity_tree.ensure_loaded(db)
+    matching_ids = tree.find_by_name(activity_name)
+    if not matching_ids:
         logger.warning(f"Вид деятельности не найден: '{activity_name}'")
         return []
+    logger.debug(f"Найдено {len(matching_ids)} совпадающих видов деятельности")
+    activity_ids = set().union(*(tree.descendants(i) for i in matching_ids))
+    orgs = await _list_by_activity_ids(db, activity_ids, limit, after_id, loader)
+    logger.info(f"Найдено {len(orgs)} организаций с видом деятельности '{activity_name}'")
+    return orgs
 
-    logger.debug(f"Найдено {len(matching_activities)} совпадающих видов деятельности")
+async def _list_by_activity_ids(
+    db: AsyncSession, activity_ids: set[int], limit: int | None, after_id: int | None, loader: Loader
+):
+    return await loader(db, _activity_ids_stmt(activity_ids, limit, after_id))
 
-    if len(matching_activities) == 1:
-        return await list_by_activity_with_descendants(db, matching_activities[0].id)
+def _activity_ids_stmt(activity_ids: set[int], limit: int | None, after_id: int | None):
+    stmt = (
+        select(Organization)
+        .where(Organization.id.in_(_orgs_with_activities(activity_ids)))
+        .order_by(Organization.id)
+    )
+    return _paginate(stmt, limit, after_id)
 
-    activity_ids = [act.id for act in matching_activities]
+async def stream_by_activity_with_descendants(
+    db: AsyncSession,
+    activity_id: int,
+    after_id: int | None = None,
+    streamer: Streamer = stream_organizations,
+):
+    """Потоково выдать организации по виду деятельности, включая дочерние, по возрастанию id.
 
-    sql = text("""
-        WITH RECURSIVE act_tree AS (
-            SELECT id, parent_id FROM activities WHERE id IN :root_ids
-            UNION ALL
-            SELECT a.id, a.parent_id
-            FROM activities a
-            JOIN act_tree t ON a.parent_id = t.id
-        )
-        SELECT DISTINCT o.id
-        FROM organizations o
-        JOIN organization_activity oa ON oa.organization_id = o.id
-        JOIN act_tree t ON t.id = oa.activity_id
-        ORDER BY o.id
-    """).bindparams(bindparam("root_ids", expanding=True))
-
-    rows = (await db.execute(sql, {"root_ids": activity_ids})).fetchall()
-    org_ids = [r[0] for r in rows]
-
-    if not org_ids:
-        logger.info(f"Организации с видом деятельности '{activity_name}' не найдены")
+    Строки читаются серверным курсором порциями, поэтому память не зависит от
+    числа организаций, а первые организации отдаются до окончания выборки.
+    """
+    logger.debug(f"Потоковое получение организаций по виду деятельности: activity_id={activity_id}")
+    tree = await activity_tree.ensure_loaded(db)
+    activity_ids = tree.descendants(activity_id)
+    if not activity_ids:
+        logger.info(f"Вид деятельности {activity_id} отсутствует в дереве")
+        return
+    count = 0
+    async for org in streamer(db, _activity_ids_stmt(activity_ids, None, after_id)):
+        count += 1
+        yield org
+    logger.info(f"Потоково отдано {count} организаций по виду деятельности {activity_id}")
+
+async def list_in_rectangular_area(
+    db: AsyncSession,
+    center_lat: float,
+    center_lon: float,
+    width_m: float,
+    height_m: float,
+    limit: int | None = None,
+    after_id: int | None = None,
+    loader: Loader = load_organizations,
+):
+    """Найти организации в прямоугольной области относительно указанной точки на карте.
+
+    Прямоугольник формируется вокруг центральной точки с заданными размерами.
+    Здания в прямоугольнике определяются по сетке зданий в памяти, из БД читаются
+    только организации этих зданий.
+    """
+    logger.debug(f"Поиск организаций в прямоугольной области: lat={center_lat}, lon={center_lon}, width={width_m}м, height={height_m}м")
+
+    min_lat, max_lat, min_lon, max_lon = bounding_box(center_lat, center_lon, width_m, height_m)
+
+    logger.debug(f"Границы области: lat=[{min_lat:.6f}, {max_lat:.6f}], lon=[{min_lon:.6f}, {max_lon:.6f}]")
+
+    stmt = await _rectangular_area_stmt(db, min_lat, max_lat, min_lon, max_lon, limit, after_id)
+    if stmt is None:
+        logger.info("В прямоугольной области нет зданий")
         return []
+    orgs = await loader(db, stmt)
+    logger.info(f"Найдено {len(orgs)} организаций в прямоугольной области")
+    return orgs
 
+async def _rectangular_area_stmt(
+    db: AsyncSession,
+    min_lat: float,
+    max_lat: float,
+    min_lon: float,
+    max_lon: float,
+    limit: int | None,
+    after_id: int | None,
+):
+    """Запрос организаций зданий из сетки в границах области или None, если зданий нет."""
+    grid = await building_grid.ensure_loaded(db)
+    building_ids = [building_id for building_id, _, _ in grid.within(min_lat, max_lat, min_lon, max_lon)]
+    if not building_ids:
+        return None
     stmt = (
         select(Organization)
-        .options(joinedload(Organization.building), joinedload(Organization.phones), joinedload(Organization.activities))
-        .where(Organization.id.in_(org_ids))
+        .where(Organization.building_id == any_(literal(building_ids, ARRAY(Integer))))
         .order_by(Organization.id)
     )
+    return _paginate(stmt, limit, after_id)
+
+async def stream_in_rectangular_area(
+    db: AsyncSession,
+    center_lat: float,
+    center_lon: float,
+    width_m: float,
+    height_m: float,
+    after_id: int | None = None,
+    streamer: Streamer = stream_organizations,
+):
+    """Потоково выдать организации в прямоугольной области относительно точки по возрастанию id."""
+    logger.debug(f"Потоковый поиск организаций в прямоугольной области: lat={center_lat}, lon={center_lon}, width={width_m}м, height={height_m}м")
+    min_lat, max_lat, min_lon, max_lon = bounding_box(center_lat, center_lon, width_m, height_m)
+    stmt = await _rectangular_area_stmt(db, min_lat, max_lat, min_lon, max_lon, None, after_id)
+    if stmt is None:
+        logger.info("В прямоугольной области нет зданий")
+        return
+    count = 0
+    async for org in streamer(db, stmt):
+        count += 1
+        yield org
+    logger.info(f"Потоково отдано {count} организаций в прямоугольной области")
+
+async def list_nearby(db: AsyncSession, lat: float, lon: float, radius_m: float, k: int):
+    """Найти k ближайших к точке организаций в пределах радиуса, упорядоченных по расстоянию.
+
+    Здания-кандидаты берутся из сетки зданий в памяти по ограничивающему прямоугольнику
+    радиуса, расстояние до них вычисляется по формуле гаверсинусов. В БД передаются
+    только идентификаторы подходящих зданий с расстояниями; сортировка с LIMIT k
+    позволяет Postgres держать в памяти только k лучших строк. Расстояние в метрах
+    доступно в атрибуте distance_m каждой организации.
+    """
+    logger.debug(f"Поиск ближайших организаций: lat={lat}, lon={lon}, radius={radius_m}м, k={k}")
+    min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, 2 * radius_m, 2 * radius_m)
+    grid = await building_grid.ensure_loaded(db)
+    building_ids, distances = [], []
+    for building_id, building_lat, building_lon in grid.within(min_lat, max_lat, min_lon, max_lon):
+        distance = haversine_m(lat, lon, building_lat, building_lon)
+        if distance <= radius_m:
+            building_ids.append(building_id)
+            distances.append(distance)
+    if not building_ids:
+        logger.info(f"В радиусе {radius_m}м нет зданий")
+        return []
+    nearby = func.unnest(
+        literal(building_ids, ARRAY(Integer)), literal(distances, ARRAY(Float))
+    ).table_valued("building_id", "distance").render_derived()
+    stmt = (
+        select(Organization)
+        .join(nearby, nearby.c.building_id == Organization.building_id)
+        .options(*loading.ORGANIZATION_OUT, with_expression(Organization.distance_m, nearby.c.distance))
+        .order_by(nearby.c.distance, Organization.id)
+        .limit(k)
+        .execution_options(populate_existing=True)
+    )
     res = await db.execute(stmt)
     orgs = res.scalars().unique().all()
-    logger.info(f"Найдено {len(orgs)} организаций с видом деятельности '{activity_name}'")
+    logger.info(f"Найдено {len(orgs)} организаций в радиусе {radius_m}м")
     return orgs
 
-async def list_in_rectangular_area(db: AsyncSession, center_lat: float, center_lon: float, width_m: float, height_m: float):
-    """Найти организации в прямоугольной области относительно указанной точки на карте.
+async def list_in_areas_batch(
+    db: AsyncSession,
+    queries: Sequence[tuple[float, float, float, float, float | None]],
+    limit: int,
+    loader: Loader = load_organizations,
+) -> list[list[Any]]:
+    """Найти организации для набора геозапросов одним запросом к БД.
 
-    Прямоугольник формируется вокруг центральной точки с заданными размерами.
+    Каждый запрос задаётся кортежем (lat, lon, width_m, height_m, radius_m): прямоугольник
+    width_m x height_m вокруг точки, а при указанном radius_m — круг этого радиуса
+    (width_m и height_m тогда должны покрывать его, т.е. равны 2 * radius_m).
+
+    Центры, радиусы и границы всех прямоугольников передаются в БД массивами и
+    разворачиваются через unnest; для каждого запроса LATERAL-подзапрос находит
+    организации в прямоугольнике (для кругов — в радиусе по формуле гаверсинусов)
+    и возвращает не более limit лучших, поэтому лишние строки не покидают БД.
+    Сами организации загружаются вторым запросом без повторов.
+    Возвращает списки организаций в порядке запросов: по id для прямоугольников,
+    по расстоянию для кругов; не более limit организаций на запрос.
     """
-    logger.debug(f"Поиск организаций в прямоугольной области: lat={center_lat}, lon={center_lon}, width={width_m}м, height={height_m}м")
-    
-    DEGREES_PER_METER_LAT = 1.0 / 111000.0
+    logger.debug(f"Пакетный геопоиск: {len(queries)} запросов, limit={limit}")
+    boxes = [bounding_box(lat, lon, width_m, height_m) for lat, lon, width_m, height_m, _ in queries]
+    min_lats, max_lats, min_lons, max_lons = (list(column) for column in zip(*boxes))
+    areas = func.unnest(
+        literal(list(range(len(queries))), ARRAY(Integer)),
+        literal([query[0] for query in queries], ARRAY(Float)),
+        literal([query[1] for query in queries], ARRAY(Float)),
+        literal([query[4] for query in queries], ARRAY(Float)),
+        literal(min_lats, ARRAY(Float)),
+        literal(max_lats, ARRAY(Float)),
+        literal(min_lons, ARRAY(Float)),
+        literal(max_lons, ARRAY(Float)),
+    ).table_valued(
+        "query_index", "lat", "lon", "radius_m", "min_lat", "max_lat", "min_lon", "max_lon"
+    ).render_derived()
+    distance = case(
+        (areas.c.radius_m.is_(None), literal(0.0)),
+        else_=haversine_sql(areas.c.lat, areas.c.lon, Building.latitude, Building.longitude),
+    ).label("distance")
+    found = (
+        select(Organization.id.label("org_id"), distance)
+        .select_from(Building)
+        .join(Organization, Organization.building_id == Building.id)
+        .where(Building.latitude.between(areas.c.min_lat, areas.c.max_lat))
+        .where(Building.longitude.between(areas.c.min_lon, areas.c.max_lon))
+        .where(distance <= func.coalesce(areas.c.radius_m, 0.0))
+        .order_by(distance, Organization.id)
+        .limit(limit)
+        .lateral("found")
+    )
+    stmt = (
+        select(areas.c.query_index, found.c.org_id)
+        .select_from(areas)
+        .join(found, true())
+        .order_by(areas.c.query_index, found.c.distance, found.c.org_id)
+    )
+    res = await db.execute(stmt)
 
-    half_height_deg = (height_m / 2.0) * DEGREES_PER_METER_LAT
-    half_width_deg = (width_m / 2.0) * DEGREES_PER_METER_LAT / math.cos(math.radians(center_lat))
+    org_ids: list[list[int]] = [[] for _ in queries]
+    for query_index, org_id in res.all():
+        org_ids[query_index].append(org_id)
 
-    min_lat = center_lat - half_height_deg
-    max_lat = center_lat + half_height_deg
-    min_lon = center_lon - half_width_deg
-    max_lon = center_lon + half_width_deg
+    unique_ids = sorted(set().union(*org_ids))
+    orgs_by_id = {}
+    if unique_ids:
+        orgs = await loader(db, select(Organization).where(Organization.id == any_(literal(unique_ids, ARRAY(Integer)))))
+        orgs_by_id = {org.id: org for org in orgs}
+    logger.info(f"Пакетный геопоиск: найдено {len(unique_ids)} организаций для {len(queries)} запросов")
+    return [[orgs_by_id[org_id] for org_id in ids] for ids in org_ids]
 
-    logger.debug(f"Границы области: lat=[{min_lat:.6f}, {max_lat:.6f}], lon=[{min_lon:.6f}, {max_lon:.6f}]")
+def cluster_cells(min_lat: float, max_lat: float, min_lon: float, max_lon: float, cell_deg: float) -> int:
+    """Число ячеек сетки размером cell_deg градусов, которые задевает прямоугольник."""
+    rows = math.floor(max_lat / cell_deg) - math.floor(min_lat / cell_deg) + 1
+    cols = math.floor(max_lon / cell_deg) - math.floor(min_lon / cell_deg) + 1
+    return rows * cols
+
+async def cluster_organizations(
+    db: AsyncSession,
+    min_lat: float,
+    max_lat: float,
+    min_lon: float,
+    max_lon: float,
+    cell_deg: float,
+    activity_id: int | None = None,
+):
+    """Сгруппировать организации в прямоугольнике по ячейкам сетки размером cell_deg градусов.
 
+    Для каждой непустой ячейки возвращается число организаций и центроид их зданий.
+    Агрегация выполняется в БД через GROUP BY по номеру ячейки. При указании
+    activity_id учитываются только организации с этим видом деятельности или
+    его дочерними видами.
+    """
+    logger.debug(
+        f"Кластеризация организаций: lat=[{min_lat}, {max_lat}], lon=[{min_lon}, {max_lon}], "
+        f"cell={cell_deg}, activity_id={activity_id}"
+    )
+    row = func.floor(Building.latitude / cell_deg)
+    col = func.floor(Building.longitude / cell_deg)
     stmt = (
-        select(Organization)
+        select(
+            func.count(Organization.id).label("count"),
+            func.avg(Building.latitude).label("latitude"),
+            func.avg(Building.longitude).label("longitude"),
+        )
         .join(Organization.building)
-        .options(joinedload(Organization.building), joinedload(Organization.phones), joinedload(Organization.activities))
-        .where(Building.latitude.between(min_lat, max_lat))
-        .where(Building.longitude.between(min_lon, max_lon))
-        .order_by(Organization.id)
+        .where(Building.id.in_(buildings_in_box(min_lat, max_lat, min_lon, max_lon)))
+        .group_by(row, col)
+        .order_by(row, col)
     )
+    if activity_id is not None:
+        tree = await activity_tree.ensure_loaded(db)
+        activity_ids = tree.descendants(activity_id)
+        if not activity_ids:
+            logger.info(f"Вид деятельности {activity_id} отсутствует в дереве")
+            return []
+        stmt = stmt.where(Organization.id.in_(_orgs_with_activities(activity_ids)))
     res = await db.execute(stmt)
-    orgs = res.scalars().unique().all()
-    logger.info(f"Найдено {len(orgs)} организаций в прямоугольной области")
-    return orgs
+    clusters = res.mappings().all()
+    logger.info(f"Получено {len(clusters)} кластеров организаций")
+    return clusters
 
 async def create_org(db: AsyncSession, name: str, building_id: int, phone_numbers: list[str], activity_ids: list[int]):
     """Создать новую организацию с указанными телефонами и видами деятельности."""
@@ -191,7 +649,7 @@ async def create_org(db: AsyncSession, name: str, building_id: int, phone_number
     logger.debug(f"Добавлено {len(phone_numbers)} телефонов")
 
     if activity_ids:
-        res = await db.execute(select(Activity).where(Activity.id.in_(activity_ids)))
+        res = await db.execute(select(Activity).options(*loading.FLAT).where(Activity.id.in_(activity_ids)))
         activities = res.scalars().all()
         await db.run_sync(lambda session: org.activities.extend(activities))
         logger.debug(f"Добавлено {len(activities)} видов деятельности")
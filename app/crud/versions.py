@@ -0,0 +1,61 @@
+"""Версии ресурсов для ETag.
+
+Версии читаются отдельными лёгкими запросами по колонкам version и индексам,
+без загрузки содержимого ответа: при совпадении с If-None-Match маршрут
+отвечает 304 до основного запроса.
+"""
+import logging
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.activity import Activity
+from app.models.building import Building
+from app.models.organization import Organization, organization_activity
+
+logger = logging.getLogger(__name__)
+
+
+async def _table_version(db: AsyncSession, model) -> str:
+    """Версия таблицы: число строк и max(version).
+
+    max(version) растёт при любой вставке и изменении строки, число строк
+    меняется при удалении.
+    """
+    res = await db.execute(select(func.count(), func.coalesce(func.max(model.version), 0)).select_from(model))
+    count, version = res.one()
+    return f"{count}-{version}"
+
+
+async def activities_version(db: AsyncSession) -> str:
+    """Версия списка и дерева видов деятельности."""
+    return await _table_version(db, Activity)
+
+
+async def buildings_version(db: AsyncSession) -> str:
+    """Версия списка зданий."""
+    return await _table_version(db, Building)
+
+
+async def organization_version(db: AsyncSession, org_id: int) -> str | None:
+    """Версия документа OrganizationOut или None, если организации нет.
+
+    Наибольшая из версий организации (она растёт и при изменении телефонов и
+    списка видов деятельности), её здания и её видов деятельности, вместе с
+    числом видов деятельности — оно меняется при удалении вида деятельности.
+    """
+    linked = (
+        select(organization_activity.c.activity_id)
+        .where(organization_activity.c.organization_id == org_id)
+    )
+    activities = select(func.count(), func.coalesce(func.max(Activity.version), 0)).where(Activity.id.in_(linked))
+    res = await db.execute(
+        select(func.greatest(Organization.version, Building.version))
+        .join(Building, Building.id == Organization.building_id)
+        .where(Organization.id == org_id)
+    )
+    version = res.scalar_one_or_none()
+    if version is None:
+        return None
+    count, activities_version = (await db.execute(activities)).one()
+    return f"{count}-{max(version, activities_version)}"
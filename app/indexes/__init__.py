@@ -0,0 +1,19 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .activity_tree import activity_tree
+from .autocomplete import autocomplete_index
+from .building_grid import building_grid
+
+INDEXES = (activity_tree, autocomplete_index, building_grid)
+
+
+async def load_all(db: AsyncSession) -> None:
+    """Загрузить все индексы в памяти процесса."""
+    for index in INDEXES:
+        await index.load(db)
+
+
+def invalidate_all() -> None:
+    """Сбросить все индексы в памяти процесса."""
+    for index in INDEXES:
+        index.invalidate()
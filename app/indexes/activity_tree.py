@@ -0,0 +1,150 @@
+import logging
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.events import Change, subscribe
+from app.models.activity import Activity
+
+logger = logging.getLogger(__name__)
+
+
+class ActivityNode:
+    """Узел дерева видов деятельности в памяти.
+
+    - id: идентификатор вида деятельности
+    - name: наименование вида деятельности
+    - parent_id: идентификатор родительского вида деятельности
+    - level: уровень вложенности в дереве (1–3)
+    - children: идентификаторы дочерних видов деятельности
+    - descendants: идентификаторы поддерева, включая сам узел
+    """
+
+    __slots__ = ("id", "name", "parent_id", "level", "children", "descendants")
+
+    def __init__(self, id: int, name: str, parent_id: int | None, level: int):
+        self.id = id
+        self.name = name
+        self.parent_id = parent_id
+        self.level = level
+        self.children: list[int] = []
+        self.descendants: set[int] = {id}
+
+
+def normalize_name(name: str) -> str:
+    """Нормализовать название вида деятельности для поиска без учета регистра."""
+    return name.lower()
+
+
+class ActivityTree:
+    """Индекс дерева видов деятельности в памяти процесса.
+
+    Дерево небольшое (не более 3 уровней) и почти не меняется, поэтому оно целиком
+    загружается одним запросом, а поиск поддерева, родителя и видов деятельности
+    по названию выполняется без обращения к БД. Индекс дополняется при вставке
+    видов деятельности и сбрасывается при их изменении или удалении.
+
+    Номер поколения растёт при каждом add и invalidate: загрузка отбрасывает
+    снимок, если за время запроса поколение сменилось, и повторяет запрос —
+    иначе снимок, прочитанный до commit, затёр бы зафиксированное изменение.
+    """
+
+    def __init__(self):
+        self._nodes: dict[int, ActivityNode] | None = None
+        self._by_name: dict[str, list[int]] = {}
+        self._generation = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self._nodes is not None
+
+    async def load(self, db: AsyncSession) -> None:
+        """Загрузить дерево из БД одним запросом (повторяется, если индекс изменился во время запроса)."""
+        for attempt in range(1, settings.INDEX_LOAD_ATTEMPTS + 1):
+            generation = self._generation
+            res = await db.execute(
+                select(Activity.id, Activity.name, Activity.parent_id, Activity.level)
+                .order_by(Activity.level, Activity.id)
+            )
+            rows = res.all()
+            if generation == self._generation:
+                break
+            logger.info(f"Виды деятельности изменились во время загрузки дерева, попытка {attempt}")
+        else:
+            logger.warning("Дерево видов деятельности загружено из снимка, изменившегося во время запроса")
+        self._nodes = {}
+        self._by_name = {}
+        for row in rows:
+            self._insert(row.id, row.name, row.parent_id, row.level)
+        logger.info(f"Дерево видов деятельности загружено: {len(self._nodes)} узлов")
+
+    async def ensure_loaded(self, db: AsyncSession) -> "ActivityTree":
+        """Загрузить дерево, если оно ещё не загружено или было сброшено."""
+        if self._nodes is None:
+            await self.load(db)
+        return self
+
+    def invalidate(self) -> None:
+        """Сбросить индекс; он будет перезагружен при следующем обращении."""
+        self._generation += 1
+        if self._nodes is not None:
+            logger.debug("Индекс дерева видов деятельности сброшен")
+        self._nodes = None
+        self._by_name = {}
+
+    def add(self, id: int, name: str, parent_id: int | None, level: int) -> None:
+        """Добавить новый вид деятельности в загруженный индекс."""
+        self._generation += 1
+        if self._nodes is None:
+            return
+        if parent_id is not None and parent_id not in self._nodes:
+            logger.warning(f"Родитель {parent_id} отсутствует в индексе дерева, индекс будет перезагружен")
+            self.invalidate()
+            return
+        self._insert(id, name, parent_id, level)
+
+    def _insert(self, id: int, name: str, parent_id: int | None, level: int) -> None:
+        node = ActivityNode(id, name, parent_id, level)
+        self._nodes[id] = node
+        self._by_name.setdefault(normalize_name(name), []).append(id)
+        ancestor_id = parent_id
+        if ancestor_id is not None:
+            self._nodes[ancestor_id].children.append(id)
+        while ancestor_id is not None:
+            ancestor = self._nodes[ancestor_id]
+            ancestor.descendants.add(id)
+            ancestor_id = ancestor.parent_id
+
+    def get(self, activity_id: int) -> ActivityNode | None:
+        """Получить узел по идентификатору."""
+        return self._nodes.get(activity_id)
+
+    def nodes(self) -> list[ActivityNode]:
+        """Все узлы, отсортированные по уровню и идентификатору."""
+        return sorted(self._nodes.values(), key=lambda n: (n.level, n.id))
+
+    def descendants(self, activity_id: int) -> set[int]:
+        """Идентификаторы поддерева вида деятельности, включая его самого."""
+        node = self._nodes.get(activity_id)
+        return set(node.descendants) if node else set()
+
+    def find_by_name(self, name: str) -> list[int]:
+        """Идентификаторы видов деятельности с совпадающим названием (без учета регистра)."""
+        return list(self._by_name.get(normalize_name(name), []))
+
+
+activity_tree = ActivityTree()
+
+
+@subscribe
+def _on_activity_changes(changes: list[Change]) -> None:
+    for change in changes:
+        if change.model is not Activity or change.op == "relate":
+            continue
+        if change.op == "insert":
+            values = change.values
+            activity_tree.add(values["id"], values["name"], values.get("parent_id"), values["level"])
+        else:
+            activity_tree.invalidate()
+            return
@@ -0,0 +1,125 @@
+import bisect
+import logging
+import re
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.events import Change, subscribe
+from app.models.building import Building
+from app.models.organization import Organization
+
+logger = logging.getLogger(__name__)
+
+ORGANIZATION = "organization"
+BUILDING = "building"
+
+_SEPARATORS = re.compile(r"[^\w]+")
+
+
+def normalize_label(label: str) -> str:
+    """Привести подпись к виду для префиксного поиска: нижний регистр, слова через пробел."""
+    return " ".join(_SEPARATORS.sub(" ", label.lower()).split())
+
+
+def _keys(label: str) -> list[str]:
+    """Ключи индекса: нормализованная подпись, начиная с каждого слова."""
+    words = normalize_label(label).split(" ")
+    return [" ".join(words[i:]) for i in range(len(words)) if words[i]]
+
+
+class AutocompleteIndex:
+    """Префиксный индекс названий организаций и адресов зданий в памяти процесса.
+
+    Хранит отсортированный массив ключей (подпись, начиная с каждого слова), поэтому
+    поиск по префиксу сводится к бинарному поиску и чтению соседних элементов.
+    Индекс дополняется при вставке организаций и зданий и сбрасывается при их
+    изменении или удалении. Как и в ActivityTree, загрузка повторяет оба запроса,
+    если за их время индекс изменился (номер поколения растёт при add и invalidate).
+    """
+
+    def __init__(self):
+        self._entries: list[tuple[str, str, int, str]] | None = None
+        self._generation = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self._entries is not None
+
+    async def load(self, db: AsyncSession) -> None:
+        """Загрузить подписи организаций и зданий из БД (повторяется, если индекс изменился во время запросов)."""
+        for attempt in range(1, settings.INDEX_LOAD_ATTEMPTS + 1):
+            generation = self._generation
+            orgs = (await db.execute(select(Organization.id, Organization.name))).all()
+            buildings = (await db.execute(select(Building.id, Building.address))).all()
+            if generation == self._generation:
+                break
+            logger.info(f"Организации или здания изменились во время загрузки автодополнения, попытка {attempt}")
+        else:
+            logger.warning("Индекс автодополнения загружен из снимка, изменившегося во время запросов")
+        entries = []
+        for org_id, name in orgs:
+            entries.extend((key, ORGANIZATION, org_id, name) for key in _keys(name))
+        for building_id, address in buildings:
+            entries.extend((key, BUILDING, building_id, address) for key in _keys(address))
+        entries.sort()
+        self._entries = entries
+        logger.info(f"Индекс автодополнения загружен: {len(entries)} ключей")
+
+    async def ensure_loaded(self, db: AsyncSession) -> "AutocompleteIndex":
+        """Загрузить индекс, если он ещё не загружен или был сброшен."""
+        if self._entries is None:
+            await self.load(db)
+        return self
+
+    def invalidate(self) -> None:
+        """Сбросить индекс; он будет перезагружен при следующем обращении."""
+        self._generation += 1
+        self._entries = None
+
+    def add(self, kind: str, id: int, label: str) -> None:
+        """Добавить подпись в загруженный индекс."""
+        self._generation += 1
+        if self._entries is None:
+            return
+        for key in _keys(label):
+            bisect.insort(self._entries, (key, kind, id, label))
+
+    def search(self, prefix: str, limit: int, kind: str | None = None) -> list[dict]:
+        """Найти до limit подписей, у которых одно из слов начинается с prefix."""
+        needle = normalize_label(prefix)
+        if not needle:
+            return []
+        result = []
+        seen = set()
+        pos = bisect.bisect_left(self._entries, (needle,))
+        while pos < len(self._entries) and len(result) < limit:
+            key, entry_kind, entry_id, label = self._entries[pos]
+            pos += 1
+            if not key.startswith(needle):
+                break
+            if (kind and entry_kind != kind) or (entry_kind, entry_id) in seen:
+                continue
+            seen.add((entry_kind, entry_id))
+            result.append({"id": entry_id, "label": label, "kind": entry_kind})
+        return result
+
+
+autocomplete_index = AutocompleteIndex()
+
+
+@subscribe
+def _on_label_changes(changes: list[Change]) -> None:
+    for change in changes:
+        if change.model is Organization:
+            kind, label_key = ORGANIZATION, "name"
+        elif change.model is Building:
+            kind, label_key = BUILDING, "address"
+        else:
+            continue
+        if change.op == "insert":
+            autocomplete_index.add(kind, change.values["id"], change.values[label_key])
+        elif change.op != "relate":
+            autocomplete_index.invalidate()
+            return
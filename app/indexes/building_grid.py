@@ -0,0 +1,134 @@
+import logging
+import math
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.events import Change, subscribe
+from app.models.building import Building
+
+logger = logging.getLogger(__name__)
+
+
+class BuildingGrid:
+    """Пространственный индекс зданий в памяти процесса (равномерная сетка).
+
+    Плоскость широта/долгота разбита на квадратные ячейки размером cell_deg градусов;
+    каждая ячейка хранит здания, попавшие в неё. Поиск в прямоугольнике перебирает
+    только пересекающиеся с ним ячейки и не обращается к таблице buildings. Здания
+    добавляются, перемещаются и удаляются в индексе по зафиксированным изменениям.
+
+    Как и в ActivityTree, загрузка повторяет запрос, если за его время индекс
+    изменился (номер поколения растёт при add, remove и invalidate).
+    """
+
+    def __init__(self, cell_deg: float):
+        self.cell_deg = cell_deg
+        self._points: dict[int, tuple[float, float]] | None = None
+        self._cells: dict[tuple[int, int], dict[int, tuple[float, float]]] = {}
+        self._generation = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self._points is not None
+
+    async def load(self, db: AsyncSession) -> None:
+        """Загрузить координаты всех зданий из БД (повторяется, если индекс изменился во время запроса)."""
+        for attempt in range(1, settings.INDEX_LOAD_ATTEMPTS + 1):
+            generation = self._generation
+            res = await db.execute(select(Building.id, Building.latitude, Building.longitude))
+            rows = res.all()
+            if generation == self._generation:
+                break
+            logger.info(f"Здания изменились во время загрузки сетки, попытка {attempt}")
+        else:
+            logger.warning("Сетка зданий загружена из снимка, изменившегося во время запроса")
+        self._points = {}
+        self._cells = {}
+        for building_id, lat, lon in rows:
+            self._insert(building_id, lat, lon)
+        logger.info(f"Сетка зданий загружена: {len(self._points)} зданий, {len(self._cells)} ячеек")
+
+    async def ensure_loaded(self, db: AsyncSession) -> "BuildingGrid":
+        """Загрузить индекс, если он ещё не загружен или был сброшен."""
+        if self._points is None:
+            await self.load(db)
+        return self
+
+    def invalidate(self) -> None:
+        """Сбросить индекс; он будет перезагружен при следующем обращении."""
+        self._generation += 1
+        self._points = None
+        self._cells = {}
+
+    def add(self, id: int, lat: float, lon: float) -> None:
+        """Добавить здание в загруженный индекс или переместить его в новые координаты."""
+        self._generation += 1
+        if self._points is None:
+            return
+        self.remove(id)
+        self._insert(id, lat, lon)
+
+    def remove(self, id: int) -> None:
+        """Удалить здание из загруженного индекса."""
+        self._generation += 1
+        if self._points is None or id not in self._points:
+            return
+        cell_key = self._cell(*self._points.pop(id))
+        cell = self._cells[cell_key]
+        del cell[id]
+        if not cell:
+            del self._cells[cell_key]
+
+    def _cell(self, lat: float, lon: float) -> tuple[int, int]:
+        return math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg)
+
+    def _insert(self, id: int, lat: float, lon: float) -> None:
+        self._points[id] = (lat, lon)
+        self._cells.setdefault(self._cell(lat, lon), {})[id] = (lat, lon)
+
+    def within(
+        self, min_lat: float, max_lat: float, min_lon: float, max_lon: float
+    ) -> list[tuple[int, float, float]]:
+        """Здания (id, широта, долгота) внутри прямоугольника, отсортированные по id."""
+        min_row, min_col = self._cell(min_lat, min_lon)
+        max_row, max_col = self._cell(max_lat, max_lon)
+        if (max_row - min_row + 1) * (max_col - min_col + 1) > len(self._cells):
+            cells = [
+                cell for (row, col), cell in self._cells.items()
+                if min_row <= row <= max_row and min_col <= col <= max_col
+            ]
+        else:
+            cells = [
+                self._cells[(row, col)]
+                for row in range(min_row, max_row + 1)
+                for col in range(min_col, max_col + 1)
+                if (row, col) in self._cells
+            ]
+        result = [
+            (building_id, lat, lon)
+            for cell in cells
+            for building_id, (lat, lon) in cell.items()
+            if min_lat <= lat <= max_lat and min_lon <= lon <= max_lon
+        ]
+        result.sort()
+        return result
+
+
+building_grid = BuildingGrid(settings.GEO_GRID_CELL_DEG)
+
+
+@subscribe
+def _on_building_changes(changes: list[Change]) -> None:
+    for change in changes:
+        if change.model is not Building or change.op == "relate":
+            continue
+        values = change.values
+        if change.op == "delete":
+            building_grid.remove(values["id"])
+        elif {"id", "latitude", "longitude"} <= values.keys():
+            building_grid.add(values["id"], values["latitude"], values["longitude"])
+        else:
+            building_grid.invalidate()
+            return
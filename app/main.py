@@ -2,9 +2,16 @@ import logging
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.cache import response_cache
+from app.core.fragments import org_fragments
+from app.core.bus import start_change_bus, stop_change_bus
+from app.core.redis_client import get_redis
+from app.indexes import invalidate_all, load_all
 from app.api.v1.organizations import router as org_router
 from app.api.v1.buildings import router as bld_router
 from app.api.v1.activities import router as act_router
+from app.api.v1.autocomplete import router as ac_router
 
 logging.basicConfig(
     level=logging.INFO,
@@ -43,6 +50,7 @@ async def global_exception_handler(request: Request, exc: Exception):
 app.include_router(org_router, prefix="/api/v1")
 app.include_router(bld_router, prefix="/api/v1")
 app.include_router(act_router, prefix="/api/v1")
+app.include_router(ac_router, prefix="/api/v1")
 
 logger.info("Маршруты успешно подключены")
 
@@ -52,10 +60,29 @@ async def health():
     logger.debug("Health check запрос")
     return {"status": "ok"}
 
+@app.get("/health/cache")
+async def cache_stats():
+    """Метрики кэша ответов и кэша фрагментов: размер, вытеснения, попадания и промахи."""
+    return {**await response_cache.stats(), "fragments": org_fragments.stats()}
+
+async def reset_local_state() -> None:
+    """Сбросить индексы и кэши процесса: изменения других воркеров за время разрыва с Redis потеряны."""
+    invalidate_all()
+    org_fragments.clear()
+    await response_cache.clear()
+
 @app.on_event("startup")
 async def startup_event():
+    try:
+        async with AsyncSessionLocal() as db:
+            await load_all(db)
+    except Exception as e:
+        logger.warning(f"Не удалось загрузить индексы при старте: {str(e)}")
+    if settings.REDIS_URL:
+        await start_change_bus(get_redis(), settings.CHANGES_CHANNEL, reset_local_state)
     logger.info("Приложение запущено")
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Приложение завершает работу")
+    await stop_change_bus()
@@ -1,6 +1,16 @@
-from sqlalchemy import Integer, String, ForeignKey, CheckConstraint
+from sqlalchemy import Column, Integer, String, ForeignKey, CheckConstraint, Index, Table, event, insert, literal, select
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.core.database import Base
+from app.models.versioning import version_column
+
+activity_closure = Table(
+    "activity_closure",
+    Base.metadata,
+    Column("ancestor_id", ForeignKey("activities.id", ondelete="CASCADE"), primary_key=True),
+    Column("descendant_id", ForeignKey("activities.id", ondelete="CASCADE"), primary_key=True),
+    Column("depth", Integer, nullable=False),
+    Index("ix_activity_closure_descendant_id", "descendant_id"),
+)
 
 
 class Activity(Base):
@@ -10,6 +20,7 @@ class Activity(Base):
     - name: наименование вида деятельности
     - parent_id: идентификатор родительского вида деятельности (для дерева)
     - level: уровень вложенности в дереве (1–3)
+    - version: версия строки из row_version_seq (для ETag)
     - parent: родительский объект вида деятельности
     - children: дочерние виды деятельности
     - organizations: организации, относящиеся к этому виду деятельности
@@ -23,6 +34,7 @@ class Activity(Base):
         Integer, ForeignKey("activities.id", ondelete="SET NULL"), nullable=True
     )
     level: Mapped[int] = mapped_column(Integer, nullable=False)
+    version: Mapped[int] = version_column()
 
     __table_args__ = (
         CheckConstraint("level >= 1 AND level <= 3", name="ck_activity_level_1_3"),
@@ -41,3 +53,26 @@ class Activity(Base):
         back_populates="activities",
         lazy="selectin"
     )
+
+
+@event.listens_for(Activity, "after_insert")
+def _insert_closure_rows(mapper, connection, target: Activity) -> None:
+    """Дополнить таблицу замыкания путями от предков нового вида деятельности.
+
+    Вызывается в том же flush, что и INSERT в activities, поэтому create_activity
+    и прямые вставки через сессию поддерживают activity_closure одинаково.
+    """
+    connection.execute(
+        insert(activity_closure).values(ancestor_id=target.id, descendant_id=target.id, depth=0)
+    )
+    if target.parent_id is not None:
+        connection.execute(
+            insert(activity_closure).from_select(
+                ["ancestor_id", "descendant_id", "depth"],
+                select(
+                    activity_closure.c.ancestor_id,
+                    literal(target.id),
+                    activity_closure.c.depth + 1,
+                ).where(activity_closure.c.descendant_id == target.parent_id),
+            )
+        )
@@ -1,6 +1,7 @@
-from sqlalchemy import Integer, String, Float
+from sqlalchemy import Integer, String, Float, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.core.database import Base
+from app.models.versioning import version_column
 
 
 class Building(Base):
@@ -10,15 +11,20 @@ class Building(Base):
     - address: почтовый адрес здания
     - latitude: географическая широта здания
     - longitude: географическая долгота здания
+    - version: версия строки из row_version_seq (для ETag)
     - organizations: организации, расположенные в этом здании
     """
 
     __tablename__ = "buildings"
+    __table_args__ = (
+        Index("ix_buildings_lat_lon", "latitude", "longitude", "id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     address: Mapped[str] = mapped_column(String, nullable=False, index=True)
     latitude: Mapped[float] = mapped_column(Float, nullable=False)
     longitude: Mapped[float] = mapped_column(Float, nullable=False)
+    version: Mapped[int] = version_column()
 
     organizations: Mapped[list["Organization"]] = relationship(
         "Organization", back_populates="building", cascade="all, delete-orphan", lazy="selectin"
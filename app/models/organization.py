@@ -1,14 +1,25 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Table
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import Column, Integer, String, ForeignKey, Index, Table, event, func, inspect, text, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Mapped, mapped_column, relationship, query_expression
 from app.core.database import Base
+from app.models.versioning import row_version_seq, version_column
 
 organization_activity = Table(
     "organization_activity",
     Base.metadata,
     Column("organization_id", ForeignKey("organizations.id", ondelete="CASCADE"), primary_key=True),
     Column("activity_id", ForeignKey("activities.id", ondelete="CASCADE"), primary_key=True),
+    Index("ix_organization_activity_activity_id", "activity_id"),
 )
 
+PG_TRGM_INSTALLED = text("SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')")
+
+
+def _pg_trgm_installed(ddl, target, bind, **kw) -> bool:
+    """Создавать триграммный индекс в create_all только при установленном pg_trgm."""
+    return bool(bind.scalar(PG_TRGM_INSTALLED))
+
+
 class Organization(Base):
     """Модель организации.
 
@@ -18,24 +29,60 @@ class Organization(Base):
     - building: связанный объект здания
     - phones: номера телефонов, привязанные к организации
     - activities: виды деятельности, которыми занимается организация
+    - version: версия строки из row_version_seq; увеличивается и при изменении
+      телефонов и списка видов деятельности организации (для ETag)
+    - distance_m: расстояние до точки поиска в метрах (заполняется только геопоиском)
     """
 
     __tablename__ = "organizations"
+    __table_args__ = (
+        Index(
+            "ix_organizations_name_trgm",
+            func.lower(text("name")).label("name"),
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ).ddl_if(callable_=_pg_trgm_installed),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     name: Mapped[str] = mapped_column(String, nullable=False, index=True)
+    version: Mapped[int] = version_column()
 
     building_id: Mapped[int] = mapped_column(
-        Integer, ForeignKey("buildings.id", ondelete="RESTRICT"), nullable=False
+        Integer, ForeignKey("buildings.id", ondelete="RESTRICT"), nullable=False, index=True
     )
     building: Mapped["Building"] = relationship("Building", back_populates="organizations", lazy="selectin")
 
     phones: Mapped[list["Phone"]] = relationship(
-        "Phone", back_populates="organization", cascade="all, delete-orphan", lazy="selectin"
+        "Phone", back_populates="organization", cascade="all, delete-orphan", lazy="selectin", order_by="Phone.id"
     )
     activities: Mapped[list["Activity"]] = relationship(
         "Activity",
         secondary=organization_activity,
         back_populates="organizations",
-        lazy="selectin"
+        lazy="selectin",
+        order_by="Activity.id"
     )
+
+    distance_m: Mapped[float | None] = query_expression()
+
+
+def bump_organization_version(connection: Connection, org_id: int | None) -> None:
+    """Присвоить организации новую версию в текущей транзакции."""
+    if org_id is not None:
+        connection.execute(
+            update(Organization.__table__)
+            .where(Organization.__table__.c.id == org_id)
+            .values(version=row_version_seq.next_value())
+        )
+
+
+@event.listens_for(Organization, "after_update")
+def _bump_version_on_relations(mapper, connection, target: Organization) -> None:
+    """Увеличить версию при изменении только списка видов деятельности.
+
+    Такие изменения пишутся в organization_activity без UPDATE organizations,
+    поэтому onupdate колонки version для них не срабатывает.
+    """
+    if inspect(target).attrs.activities.history.has_changes():
+        bump_organization_version(connection, target.id)
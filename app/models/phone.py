@@ -1,6 +1,8 @@
-from sqlalchemy import Integer, String, ForeignKey
+from sqlalchemy import Integer, String, ForeignKey, event, inspect
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.core.database import Base
+from app.models.organization import bump_organization_version
+from app.models.versioning import version_column
 
 
 class Phone(Base):
@@ -9,6 +11,7 @@ class Phone(Base):
     - id: идентификатор телефонного номера
     - number: строковое представление телефонного номера
     - organization_id: идентификатор организации-владельца номера
+    - version: версия строки из row_version_seq (для ETag)
     - organization: связанный объект организации
     """
 
@@ -16,8 +19,18 @@ class Phone(Base):
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     number: Mapped[str] = mapped_column(String, nullable=False, index=True)
+    version: Mapped[int] = version_column()
 
     organization_id: Mapped[int] = mapped_column(
         Integer, ForeignKey("organizations.id", ondelete="CASCADE"), nullable=False
     )
     organization: Mapped["Organization"] = relationship("Organization", back_populates="phones", lazy="selectin")
+
+
+@event.listens_for(Phone, "after_insert")
+@event.listens_for(Phone, "after_update")
+@event.listens_for(Phone, "after_delete")
+def _bump_owner_version(mapper, connection, target: Phone) -> None:
+    """Увеличить версию организации (и прежней организации при переносе номера) при изменении её телефонов."""
+    for org_id in {target.organization_id, *inspect(target).attrs.organization_id.history.deleted}:
+        bump_organization_version(connection, org_id)
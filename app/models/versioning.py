@@ -0,0 +1,23 @@
+from sqlalchemy import BigInteger, Sequence, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+row_version_seq = Sequence("row_version_seq", metadata=Base.metadata)
+"""Общая последовательность версий строк организаций, зданий, видов деятельности и телефонов.
+
+Версия строки берётся из последовательности при вставке и при каждом UPDATE,
+поэтому max(version) таблицы растёт при любой вставке и изменении, а версии
+разных таблиц сравнимы между собой.
+"""
+
+
+def version_column() -> Mapped[int]:
+    """Колонка version: nextval при вставке (в том числе вне ORM) и при UPDATE через ORM."""
+    return mapped_column(
+        BigInteger,
+        nullable=False,
+        server_default=text("nextval('row_version_seq')"),
+        onupdate=row_version_seq.next_value(),
+        index=True,
+    )
@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+from typing import Literal
+
+class AutocompleteItem(BaseModel):
+    """Схема подсказки автодополнения.
+
+    - id: идентификатор организации или здания
+    - label: название организации или адрес здания
+    - kind: тип сущности (organization или building)
+    """
+
+    id: int
+    label: str
+    kind: Literal["organization", "building"]
@@ -1,5 +1,8 @@
-from pydantic import BaseModel, Field
-from typing import List
+from functools import lru_cache
+from pydantic import BaseModel, Field, create_model, model_validator
+from typing import Dict, List, get_args, get_origin
+
+from app.core.config import settings
 
 from app.schemas.building import BuildingOut
 from app.schemas.activity import ActivityOut
@@ -32,6 +35,166 @@ class OrganizationOut(BaseModel):
     activities: List[ActivityOut]
     model_config = {"from_attributes": True}
 
+Projection = tuple[tuple[str, tuple[str, ...] | None], ...]
+"""Набор полей OrganizationOut для параметра fields: пары (поле, вложенные поля или None — все)."""
+
+
+def _nested_schema(annotation) -> type[BaseModel] | None:
+    """Схема связанной сущности поля: BuildingOut для building, PhoneOut для List[PhoneOut]."""
+    if get_origin(annotation) in (list, List):
+        annotation = get_args(annotation)[0]
+    return annotation if isinstance(annotation, type) and issubclass(annotation, BaseModel) else None
+
+
+def parse_fields(value: str) -> Projection:
+    """Разобрать fields вида "id,name,building.latitude" в Projection.
+
+    Поля без вложенных указывают целиком; "building" вместе с "building.id"
+    означает всё здание. ValueError для неизвестных и пустых полей.
+    """
+    requested: dict[str, set[str] | None] = {}
+    for part in value.split(","):
+        name, _, nested = part.strip().partition(".")
+        field = OrganizationOut.model_fields.get(name)
+        if field is None:
+            raise ValueError(f"Unknown field: {part.strip()}")
+        if not nested:
+            requested[name] = None
+            continue
+        schema = _nested_schema(field.annotation)
+        if schema is None or nested not in schema.model_fields:
+            raise ValueError(f"Unknown field: {part.strip()}")
+        if name not in requested:
+            requested[name] = set()
+        if requested[name] is not None:
+            requested[name].add(nested)
+    return tuple(
+        (name, None if requested[name] is None else tuple(
+            f for f in _nested_schema(OrganizationOut.model_fields[name].annotation).model_fields if f in requested[name]
+        ))
+        for name in OrganizationOut.model_fields if name in requested
+    )
+
+
+@lru_cache(maxsize=256)
+def projected_model(projection: Projection) -> type[BaseModel]:
+    """Схема ответа с полями OrganizationOut из projection; создаётся один раз на набор полей."""
+    fields = {}
+    for name, nested in projection:
+        annotation = OrganizationOut.model_fields[name].annotation
+        if nested is not None:
+            schema = _nested_schema(annotation)
+            subset = create_model(
+                f"{schema.__name__}Fields",
+                __config__={"from_attributes": True},
+                **{f: (schema.model_fields[f].annotation, ...) for f in nested},
+            )
+            annotation = List[subset] if get_origin(annotation) in (list, List) else subset
+        fields[name] = (annotation, ...)
+    return create_model("OrganizationFields", __config__={"from_attributes": True}, **fields)
+
+class FacetCount(BaseModel):
+    """Схема значения фасета.
+
+    - id: идентификатор вида деятельности верхнего уровня или здания
+    - count: число найденных организаций с этим значением
+    """
+
+    id: int
+    count: int
+
+class OrganizationSearchPage(BaseModel):
+    """Схема ответа поиска организаций с фасетами.
+
+    - items: найденные организации (текущая страница)
+    - facets: число организаций по значениям запрошенных фасетов (activity, building) для всей выборки
+    """
+
+    items: List[OrganizationOut]
+    facets: Dict[str, List[FacetCount]]
+
+class OrganizationNearbyOut(OrganizationOut):
+    """Схема ответа для организации в результатах поиска ближайших.
+
+    - distance_m: расстояние от точки поиска до здания организации в метрах
+    """
+
+    distance_m: float
+
+class OrganizationClusterOut(BaseModel):
+    """Схема ячейки кластеризации организаций на карте.
+
+    - count: число организаций в ячейке
+    - latitude: широта центроида зданий организаций ячейки
+    - longitude: долгота центроида зданий организаций ячейки
+    """
+
+    count: int
+    latitude: float
+    longitude: float
+    model_config = {"from_attributes": True}
+
+class GeoQuery(BaseModel):
+    """Схема одного геозапроса в пакетном поиске.
+
+    - lat: широта центральной точки
+    - lon: долгота центральной точки
+    - width_m: ширина прямоугольной области в метрах
+    - height_m: высота прямоугольной области в метрах
+    - radius_m: радиус поиска в метрах (вместо width_m и height_m)
+    """
+
+    lat: float = Field(..., ge=-90, le=90)
+    lon: float = Field(..., ge=-180, le=180)
+    width_m: float | None = Field(None, gt=0)
+    height_m: float | None = Field(None, gt=0)
+    radius_m: float | None = Field(None, gt=0)
+
+    @model_validator(mode="after")
+    def check_area(self) -> "GeoQuery":
+        is_rectangle = self.width_m is not None and self.height_m is not None
+        if is_rectangle == (self.radius_m is not None):
+            raise ValueError("Укажите либо width_m и height_m, либо radius_m")
+        return self
+
+class GeoBatchRequest(BaseModel):
+    """Схема пакетного геопоиска.
+
+    - queries: список прямоугольных или радиусных запросов
+    - limit: максимальное число организаций в ответе на один запрос
+    """
+
+    queries: List[GeoQuery] = Field(..., min_length=1, max_length=settings.GEO_BATCH_MAX_QUERIES)
+    limit: int = Field(settings.PAGE_SIZE_DEFAULT, ge=1, le=settings.PAGE_SIZE_MAX)
+
+class GeoBatchResultOut(BaseModel):
+    """Схема результата одного запроса пакетного геопоиска.
+
+    - index: номер запроса в списке queries
+    - organizations: найденные организации (по id для прямоугольника, по расстоянию для радиуса)
+    """
+
+    index: int
+    organizations: List[OrganizationOut]
+
+class OrganizationBatchItem(BaseModel):
+    """Схема элемента пакетного получения организаций.
+
+    - id: запрошенный идентификатор организации
+    - organization: организация или null, если она не найдена
+    """
+
+    id: int
+    organization: OrganizationOut | None
+
+class OrganizationBatchGet(BaseModel):
+    """Схема запроса пакетного получения организаций.
+
+    - ids: идентификаторы организаций; ответ возвращается в том же порядке
+    """
+
+    ids: List[int] = Field(..., min_length=1, max_length=settings.BATCH_GET_MAX_IDS)
+
 class OrganizationCreate(BaseModel):
     """Схема создания организации.
 
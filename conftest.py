@@ -7,10 +7,15 @@ from typing import AsyncGenerator
 import pytest
 import pytest_asyncio
 from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event, text
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 
 from app.core.config import settings
 from app.core.database import Base, get_db
+from app.core.cache import response_cache
+from app.core.fragments import org_fragments
+from app.indexes import invalidate_all
 from app.main import app
 from app.models.activity import Activity
 from app.models.building import Building
@@ -52,14 +57,32 @@ def event_loop():
     loop.close()
 
 
+@pytest_asyncio.fixture(scope="session")
+async def pg_trgm() -> bool:
+    """Фикстура установки расширения pg_trgm в тестовой БД.
+
+    Возвращает False, если расширение недоступно на сервере PostgreSQL.
+    """
+    try:
+        async with test_engine.begin() as conn:
+            await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    except DBAPIError:
+        logging.warning("Расширение pg_trgm недоступно, триграммный индекс не создается")
+        return False
+    return True
+
+
 @pytest_asyncio.fixture(scope="function")
-async def db_session() -> AsyncGenerator[AsyncSession, None]:
+async def db_session(pg_trgm: bool) -> AsyncGenerator[AsyncSession, None]:
     """Фикстура для создания тестовой сессии базы данных.
     
     Создает все таблицы перед тестом и удаляет их после.
     """
     async with test_engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+    invalidate_all()
+    await response_cache.clear()
+    org_fragments.clear()
     
     async with TestSessionLocal() as session:
         yield session
@@ -141,6 +164,19 @@ async def sample_organization(
     return org
 
 
+@pytest.fixture
+def sql_statements() -> list[str]:
+    """Фикстура для перехвата SQL-запросов, выполняемых тестовой БД."""
+    statements: list[str] = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(test_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    yield statements
+    event.remove(test_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+
 @pytest.fixture
 def api_headers() -> dict:
     """Фикстура для создания заголовков с API ключом."""
@@ -0,0 +1,168 @@
+"""Тесты для индекса дерева видов деятельности в памяти."""
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.activity import create_activity
+from app.crud.organization import list_by_activity_with_descendants
+from app.indexes.activity_tree import ActivityTree, activity_tree
+from app.models.activity import Activity
+from app.models.building import Building
+
+
+class CommitDuringLoad:
+    """Сессия, которая после первого запроса загрузки фиксирует новый вид деятельности."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.committed: Activity | None = None
+
+    async def execute(self, stmt):
+        res = await self.db.execute(stmt)
+        if self.committed is None:
+            self.committed = Activity(name="Новая", parent_id=None, level=1)
+            self.db.add(self.committed)
+            await self.db.commit()
+        return res
+
+
+@pytest.mark.unit
+class TestActivityTree:
+    """Тесты для структуры ActivityTree."""
+
+    def _tree(self) -> ActivityTree:
+        tree = ActivityTree()
+        tree._nodes = {}
+        tree.add(1, "Еда", None, 1)
+        tree.add(2, "Мясная продукция", 1, 2)
+        tree.add(3, "Молочная продукция", 1, 2)
+        tree.add(4, "Автомобили", None, 1)
+        tree.add(5, "Легковые", 4, 2)
+        tree.add(6, "Запчасти", 5, 3)
+        return tree
+
+    def test_descendants(self):
+        """Тест получения поддерева."""
+        tree = self._tree()
+
+        assert tree.descendants(1) == {1, 2, 3}
+        assert tree.descendants(4) == {4, 5, 6}
+        assert tree.descendants(6) == {6}
+        assert tree.descendants(999) == set()
+
+    def test_children_and_levels(self):
+        """Тест связей узлов."""
+        tree = self._tree()
+
+        assert tree.get(1).children == [2, 3]
+        assert tree.get(6).parent_id == 5
+        assert tree.get(6).level == 3
+        assert [n.id for n in tree.nodes()] == [1, 4, 2, 3, 5, 6]
+
+    def test_find_by_name_case_insensitive(self):
+        """Тест поиска по нормализованному названию."""
+        tree = self._tree()
+        tree.add(7, "ЕДА", 4, 2)
+
+        assert tree.find_by_name("еда") == [1, 7]
+        assert tree.find_by_name("Нет такой") == []
+
+    def test_add_with_unknown_parent_invalidates(self):
+        """Тест сброса индекса при вставке узла с неизвестным родителем."""
+        tree = self._tree()
+        tree.add(10, "Сирота", 999, 2)
+
+        assert not tree.loaded
+
+    def test_add_to_unloaded_tree_is_noop(self):
+        """Тест игнорирования вставки в незагруженный индекс."""
+        tree = ActivityTree()
+        tree.add(1, "Еда", None, 1)
+
+        assert not tree.loaded
+
+
+@pytest.mark.crud
+class TestActivityTreeIndex:
+    """Тесты для синхронизации индекса с БД."""
+
+    async def test_patched_after_commit(self, db_session: AsyncSession):
+        """Тест дополнения загруженного индекса после commit."""
+        food = await create_activity(db_session, "Еда", None)
+        await activity_tree.ensure_loaded(db_session)
+
+        meat = await create_activity(db_session, "Мясо", food.id)
+        direct = Activity(name="Молоко", parent_id=food.id, level=2)
+        db_session.add(direct)
+        await db_session.commit()
+
+        assert activity_tree.loaded
+        assert activity_tree.descendants(food.id) == {food.id, meat.id, direct.id}
+        assert activity_tree.find_by_name("молоко") == [direct.id]
+
+    async def test_not_patched_on_rollback(self, db_session: AsyncSession):
+        """Тест отсутствия изменений индекса при откате транзакции."""
+        food = await create_activity(db_session, "Еда", None)
+        food_id = food.id
+        await activity_tree.ensure_loaded(db_session)
+
+        db_session.add(Activity(name="Мясо", parent_id=food_id, level=2))
+        await db_session.flush()
+        await db_session.rollback()
+
+        assert activity_tree.descendants(food_id) == {food_id}
+
+    async def test_invalidated_on_update(self, db_session: AsyncSession):
+        """Тест сброса индекса при изменении вида деятельности."""
+        food = await create_activity(db_session, "Еда", None)
+        await activity_tree.ensure_loaded(db_session)
+
+        food.name = "Продукты"
+        await db_session.commit()
+
+        assert not activity_tree.loaded
+        await activity_tree.ensure_loaded(db_session)
+        assert activity_tree.find_by_name("продукты") == [food.id]
+
+    async def test_commit_during_load_not_lost(self, db_session: AsyncSession):
+        """Тест повторной загрузки, если вид деятельности зафиксирован во время запроса."""
+        food = await create_activity(db_session, "Еда", None)
+        activity_tree.invalidate()
+        session = CommitDuringLoad(db_session)
+
+        await activity_tree.load(session)
+
+        assert activity_tree.loaded
+        assert activity_tree.find_by_name("новая") == [session.committed.id]
+        assert activity_tree.descendants(food.id) == {food.id}
+
+    async def test_depth_check_without_queries(self, db_session: AsyncSession, sql_statements: list[str]):
+        """Тест проверки глубины вложенности без обращения к БД."""
+        level1 = await create_activity(db_session, "Уровень 1", None)
+        level2 = await create_activity(db_session, "Уровень 2", level1.id)
+        level3 = await create_activity(db_session, "Уровень 3", level2.id)
+        sql_statements.clear()
+
+        with pytest.raises(HTTPException) as exc_info:
+            await create_activity(db_session, "Уровень 4", level3.id)
+
+        assert exc_info.value.status_code == 400
+        assert sql_statements == []
+
+    async def test_descendants_resolved_without_recursive_query(
+        self,
+        db_session: AsyncSession,
+        sample_building: Building,
+        sql_statements: list[str]
+    ):
+        """Тест получения организаций по поддереву одним запросом."""
+        food = await create_activity(db_session, "Еда", None)
+        await create_activity(db_session, "Мясо", food.id)
+        await activity_tree.ensure_loaded(db_session)
+        sql_statements.clear()
+
+        await list_by_activity_with_descendants(db_session, food.id)
+
+        selects = [s for s in sql_statements if s.lstrip().upper().startswith("SELECT")]
+        assert len(selects) == 1
+        assert "RECURSIVE" not in selects[0]
@@ -1,4 +1,6 @@
 """Тесты для API endpoints видов деятельности."""
+import json
+
 import pytest
 from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -39,11 +41,109 @@ class TestActivitiesAPI:
         assert all("id" in item for item in data)
         assert all("name" in item for item in data)
 
+    async def test_get_activities_paginated(
+        self,
+        client: AsyncClient,
+        api_headers: dict,
+        db_session: AsyncSession
+    ):
+        """Тест постраничного получения видов деятельности в порядке (level, id)."""
+        food = Activity(name="Еда", parent_id=None, level=1)
+        db_session.add(food)
+        await db_session.commit()
+        meat = Activity(name="Мясо", parent_id=food.id, level=2)
+        db_session.add(meat)
+        await db_session.commit()
+        services = Activity(name="Услуги", parent_id=None, level=1)
+        db_session.add(services)
+        await db_session.commit()
+
+        seen = []
+        params = {"limit": 1}
+        while True:
+            response = await client.get("/api/v1/activities", params=params, headers=api_headers)
+            assert response.status_code == 200
+            seen.extend(a["id"] for a in response.json())
+            if "X-Next-Cursor" not in response.headers:
+                break
+            params["cursor"] = response.headers["X-Next-Cursor"]
+
+        assert seen == [food.id, services.id, meat.id]
+
     async def test_get_activities_unauthorized(self, client: AsyncClient, invalid_api_headers: dict):
         """Тест доступа без авторизации."""
         response = await client.get("/api/v1/activities", headers=invalid_api_headers)
         assert response.status_code == 403
 
+    async def test_get_activities_tree(
+        self,
+        client: AsyncClient,
+        api_headers: dict,
+        db_session: AsyncSession
+    ):
+        """Тест получения дерева видов деятельности."""
+        food = Activity(name="Еда", parent_id=None, level=1)
+        cars = Activity(name="Автомобили", parent_id=None, level=1)
+        db_session.add_all([food, cars])
+        await db_session.commit()
+
+        meat = Activity(name="Мясо", parent_id=food.id, level=2)
+        light = Activity(name="Легковые", parent_id=cars.id, level=2)
+        db_session.add_all([meat, light])
+        await db_session.commit()
+
+        parts = Activity(name="Запчасти", parent_id=light.id, level=3)
+        db_session.add(parts)
+        await db_session.commit()
+
+        response = await client.get("/api/v1/activities/tree", headers=api_headers)
+
+        assert response.status_code == 200
+        assert response.json() == [
+            {"id": food.id, "name": "Еда", "level": 1, "children": [
+                {"id": meat.id, "name": "Мясо", "level": 2, "children": []},
+            ]},
+            {"id": cars.id, "name": "Автомобили", "level": 1, "children": [
+                {"id": light.id, "name": "Легковые", "level": 2, "children": [
+                    {"id": parts.id, "name": "Запчасти", "level": 3, "children": []},
+                ]},
+            ]},
+        ]
+
+    async def test_get_activities_tree_root_and_depth(
+        self,
+        client: AsyncClient,
+        api_headers: dict,
+        db_session: AsyncSession
+    ):
+        """Тест получения поддерева с ограничением глубины."""
+        cars = Activity(name="Автомобили", parent_id=None, level=1)
+        db_session.add(cars)
+        await db_session.commit()
+
+        light = Activity(name="Легковые", parent_id=cars.id, level=2)
+        db_session.add(light)
+        await db_session.commit()
+
+        db_session.add(Activity(name="Запчасти", parent_id=light.id, level=3))
+        await db_session.commit()
+
+        response = await client.get(
+            "/api/v1/activities/tree",
+            params={"root_id": light.id, "max_depth": 1},
+            headers=api_headers
+        )
+
+        assert response.status_code == 200
+        assert response.json() == [{"id": light.id, "name": "Легковые", "level": 2, "children": []}]
+
+    async def test_get_activities_tree_root_not_found(self, client: AsyncClient, api_headers: dict):
+        """Тест получения поддерева несуществующего вида деятельности."""
+        response = await client.get("/api/v1/activities/tree", params={"root_id": 99999}, headers=api_headers)
+
+        assert response.status_code == 404
+        assert "Activity not found" in response.json()["detail"]
+
     async def test_create_activity_root(self, client: AsyncClient, api_headers: dict):
         """Тест создания корневого вида деятельности."""
         payload = {
@@ -178,6 +278,36 @@ class TestActivitiesAPI:
         data = response.json()
         assert len(data) == 2
 
+    async def test_get_organizations_by_activity_stream(
+        self,
+        client: AsyncClient,
+        api_headers: dict,
+        db_session: AsyncSession,
+        sample_building: Building,
+        sample_activity: Activity
+    ):
+        """Тест потоковой выдачи организаций по виду деятельности в формате NDJSON."""
+        orgs = [
+            await create_org(db_session, f"Организация {i}", sample_building.id, [], [sample_activity.id])
+            for i in range(3)
+        ]
+        url = f"/api/v1/activities/{sample_activity.id}/organizations"
+
+        response = await client.get(url, params={"stream": 1, "limit": 1}, headers=api_headers)
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        assert "X-Cache" not in response.headers
+        lines = response.text.splitlines()
+        assert [json.loads(line)["id"] for line in lines] == [org.id for org in orgs]
+        assert json.loads(lines[0])["activities"][0]["id"] == sample_activity.id
+
+        await client.get(url, headers=api_headers)
+        response = await client.get(url, headers={**api_headers, "Accept": "application/x-ndjson"})
+
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        assert len(response.text.splitlines()) == 3
+
     async def test_search_organizations_by_activity_name(
         self,
         client: AsyncClient,
@@ -0,0 +1,121 @@
+"""Тесты для API endpoint автодополнения."""
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.crud.organization import create_org
+from app.indexes.autocomplete import AutocompleteIndex, autocomplete_index, normalize_label
+from app.models.building import Building
+
+
+@pytest.mark.unit
+class TestAutocompleteIndex:
+    """Тесты для префиксного индекса в памяти."""
+
+    def _index(self) -> AutocompleteIndex:
+        index = AutocompleteIndex()
+        index._entries = []
+        index.add("organization", 1, 'ООО "Рога и Копыта"')
+        index.add("organization", 2, "Рогалик")
+        index.add("building", 1, "г. Москва, ул. Ленина 1")
+        return index
+
+    def test_normalize_label(self):
+        """Тест нормализации подписи."""
+        assert normalize_label('  ООО "Рога  и Копыта" ') == "ооо рога и копыта"
+
+    def test_search_by_word_prefix(self):
+        """Тест поиска по началу любого слова подписи."""
+        index = self._index()
+
+        assert index.search("рог", 10) == [
+            {"id": 1, "label": 'ООО "Рога и Копыта"', "kind": "organization"},
+            {"id": 2, "label": "Рогалик", "kind": "organization"},
+        ]
+        assert [item["id"] for item in index.search("копыт", 10)] == [1]
+        assert [item["kind"] for item in index.search("ленина", 10)] == ["building"]
+
+    def test_search_limit_and_kind(self):
+        """Тест ограничения числа подсказок и фильтра по типу."""
+        index = self._index()
+
+        assert len(index.search("р", 1)) == 1
+        assert index.search("москва", 10, kind="organization") == []
+        assert index.search("   ", 10) == []
+
+
+@pytest.mark.crud
+class TestAutocompleteIndexLoad:
+    """Тесты для загрузки индекса автодополнения из БД."""
+
+    async def test_commit_during_load_not_lost(self, db_session: AsyncSession, sample_building: Building):
+        """Тест повторной загрузки, если организация зафиксирована между запросами загрузки."""
+        created = []
+
+        class CommitDuringLoad:
+            async def execute(self, stmt):
+                res = await db_session.execute(stmt)
+                if not created:
+                    created.append(await create_org(db_session, "Аптека", sample_building.id, [], []))
+                return res
+
+        autocomplete_index.invalidate()
+        await autocomplete_index.load(CommitDuringLoad())
+
+        assert autocomplete_index.search("аптек", 10) == [{"id": created[0].id, "label": "Аптека", "kind": "organization"}]
+
+
+@pytest.mark.api
+class TestAutocompleteAPI:
+    """Тесты для API endpoint /api/v1/autocomplete."""
+
+    async def test_autocomplete(
+        self,
+        client: AsyncClient,
+        api_headers: dict,
+        db_session: AsyncSession,
+        sample_building: Building
+    ):
+        """Тест подсказок по организациям и зданиям."""
+        org = await create_org(db_session, "Тестовый магазин", sample_building.id, [], [])
+
+        response = await client.get("/api/v1/autocomplete", params={"q": "Тест"}, headers=api_headers)
+
+        assert response.status_code == 200
+        assert response.json() == [
+            {"id": sample_building.id, "label": "Тестовая улица, 123", "kind": "building"},
+            {"id": org.id, "label": "Тестовый магазин", "kind": "organization"},
+        ]
+
+    async def test_autocomplete_sees_new_organizations(
+        self,
+        client: AsyncClient,
+        api_headers: dict,
+        db_session: AsyncSession,
+        sample_building: Building
+    ):
+        """Тест обновления индекса после создания организации."""
+        response = await client.get("/api/v1/autocomplete", params={"q": "аптек"}, headers=api_headers)
+        assert response.json() == []
+
+        org = await create_org(db_session, "Аптека", sample_building.id, [], [])
+
+        response = await client.get("/api/v1/autocomplete", params={"q": "аптек"}, headers=api_headers)
+        assert response.json() == [{"id": org.id, "label": "Аптека", "kind": "organization"}]
+
+    async def test_autocomplete_limit_capped(self, client: AsyncClient, api_headers: dict):
+        """Тест ограничения максимального числа подсказок."""
+        response = await client.get(
+            "/api/v1/autocomplete",
+            params={"q": "а", "limit": settings.AUTOCOMPLETE_MAX_RESULTS + 1},
+            headers=api_headers
+        )
+
+        assert response.status_code == 422
+
+    async def test_autocomplete_unauthorized(self, client: AsyncClient, invalid_api_headers: dict):
+        """Тест доступа без авторизации."""
+        response = await client.get("/api/v1/autocomplete", params={"q": "а"}, headers=invalid_api_headers)
+
+        assert response.status_code == 403
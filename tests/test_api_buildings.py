@@ -4,6 +4,7 @@ from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.crud.organization import create_org
+from app.models.activity import Activity
 from app.models.building import Building
 
 
@@ -35,6 +36,42 @@ class TestBuildingsAPI:
         assert data[0]["latitude"] == sample_building.latitude
         assert data[0]["longitude"] == sample_building.longitude
 
+    async def test_get_buildings_paginated(
+        self,
+        client: AsyncClient,
+        api_headers: dict,
+        db_session: AsyncSession
+    ):
+        """Тест постраничного получения списка зданий по курсору."""
+        buildings = [Building(address=f"Адрес {i}", latitude=55.0, longitude=37.0) for i in range(3)]
+        db_session.add_all(buildings)
+        await db_session.commit()
+
+        response = await client.get("/api/v1/buildings", params={"limit": 2}, headers=api_headers)
+
+        assert response.status_code == 200
+        assert [b["id"] for b in response.json()] == [buildings[0].id, buildings[1].id]
+        cursor = response.headers["X-Next-Cursor"]
+
+        response = await client.get("/api/v1/buildings", params={"limit": 2, "cursor": cursor}, headers=api_headers)
+
+        assert response.status_code == 200
+        assert [b["id"] for b in response.json()] == [buildings[2].id]
+        assert "X-Next-Cursor" not in response.headers
+
+    async def test_get_buildings_invalid_cursor(self, client: AsyncClient, api_headers: dict):
+        """Тест передачи некорректного курсора."""
+        response = await client.get("/api/v1/buildings", params={"cursor": "not-a-cursor"}, headers=api_headers)
+
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Invalid cursor"
+
+    async def test_get_buildings_limit_out_of_range(self, client: AsyncClient, api_headers: dict):
+        """Тест передачи недопустимого размера страницы."""
+        response = await client.get("/api/v1/buildings", params={"limit": 0}, headers=api_headers)
+
+        assert response.status_code == 422
+
     async def test_get_buildings_unauthorized(self, client: AsyncClient, invalid_api_headers: dict):
         """Тест доступа без авторизации."""
         response = await client.get("/api/v1/buildings", headers=invalid_api_headers)
@@ -121,6 +158,61 @@ class TestBuildingsAPI:
         assert org2.id in org_ids
         assert org3.id in org_ids
 
+    async def test_get_organizations_in_building_normalized(
+        self,
+        client: AsyncClient,
+        api_headers: dict,
+        db_session: AsyncSession,
+        sample_building: Building,
+        sample_activity: Activity
+    ):
+        """Тест нормализованного ответа: здания и виды деятельности один раз на страницу."""
+        for i in range(3):
+            await create_org(db_session, f"Организация {i}", sample_building.id, [f"{i}-111"], [sample_activity.id])
+        url = f"/api/v1/buildings/{sample_building.id}/organizations"
+        full = await client.get(url, params={"limit": 2}, headers=api_headers)
+
+        response = await client.get(url, params={"limit": 2, "format": "normalized"}, headers=api_headers)
+
+        assert response.status_code == 200
+        assert response.headers["X-Next-Cursor"] == full.headers["X-Next-Cursor"]
+        data = response.json()
+        assert list(data["buildings"]) == [str(sample_building.id)]
+        assert list(data["activities"]) == [str(sample_activity.id)]
+        assert data["items"][0] == {
+            "id": full.json()[0]["id"],
+            "name": "Организация 0",
+            "building_id": sample_building.id,
+            "phones": full.json()[0]["phones"],
+            "activity_ids": [sample_activity.id],
+        }
+        denormalized = [
+            {
+                "id": item["id"],
+                "name": item["name"],
+                "building": data["buildings"][str(item["building_id"])],
+                "phones": item["phones"],
+                "activities": [data["activities"][str(i)] for i in item["activity_ids"]],
+            }
+            for item in data["items"]
+        ]
+        assert denormalized == full.json()
+
+    async def test_get_organizations_in_building_invalid_format(
+        self,
+        client: AsyncClient,
+        api_headers: dict,
+        sample_building: Building
+    ):
+        """Тест отклонения неизвестного формата ответа."""
+        response = await client.get(
+            f"/api/v1/buildings/{sample_building.id}/organizations",
+            params={"format": "compact"},
+            headers=api_headers
+        )
+
+        assert response.status_code == 422
+
     async def test_get_organizations_in_building_unauthorized(
         self,
         client: AsyncClient,
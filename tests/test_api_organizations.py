@@ -1,10 +1,13 @@
 """Тесты для API endpoints организаций."""
+import json
+
 import pytest
 from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.activity import Activity
 from app.models.building import Building
+from app.core.config import settings
 from app.crud.organization import create_org
 
 @pytest.mark.api
@@ -31,6 +34,125 @@ class TestOrganizationsAPI:
         assert "phones" in data
         assert "activities" in data
 
+    async def test_get_organization_json_agg(
+        self,
+        client: AsyncClient,
+        api_headers: dict,
+        sample_organization,
+        monkeypatch
+    ):
+        """Тест получения организации через документы, собранные в БД."""
+        url = f"/api/v1/organizations/{sample_organization.id}"
+        orm_response = await client.get(url, headers=api_headers)
+
+        monkeypatch.setattr(settings, "ORG_READ_PATH", "json_agg")
+        response = await client.get(url, headers=api_headers)
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        assert response.json() == orm_response.json()
+
+    async def test_search_organizations_json_agg(
+        self,
+        client: AsyncClient,
+        api_headers: dict,
+        db_session: AsyncSession,
+        sample_building: Building,
+        sample_activity: Activity,
+        monkeypatch
+    ):
+        """Тест постраничного поиска через документы, собранные в БД."""
+        for i in range(3):
+            await create_org(db_session, f"Магазин {i}", sample_building.id, [f"+7999000000{i}"], [sample_activity.id])
+        params = {"name": "магазин", "limit": 2}
+        orm_response = await client.get("/api/v1/organizations/search/by-name", params=params, headers=api_headers)
+
+        monkeypatch.setattr(settings, "ORG_READ_PATH", "json_agg")
+        response = await client.get("/api/v1/organizations/search/by-name", params=params, headers=api_headers)
+
+        assert response.status_code == 200
+        assert response.json() == orm_response.json()
+        assert response.headers["X-Next-Cursor"] == orm_response.headers["X-Next-Cursor"]
+
+    async def test_rows_read_path_byte_compatible(
+        self,
+        client: AsyncClient,
+        api_headers: dict,
+        db_session: AsyncSession,
+        sample_building: Building,
+        monkeypatch
+    ):
+        """Тест побайтного совпадения ответов orjson и кэша фрагментов с ответами через response_model."""
+        monkeypatch.setattr(settings, "CACHE_ENABLED", False)
+        food = Activity(name="Еда «Ё»", parent_id=None, level=1)
+        db_session.add(food)
+        await db_session.commit()
+        meat = Activity(name="Мясо", parent_id=food.id, level=2)
+        db_session.add(meat)
+        await db_session.commit()
+        orgs = [
+            await create_org(db_session, 'ООО "Кавычки" \\ \n\t\u2028 😀', sample_building.id, ["+7 (999) 1", "2-222"], [meat.id, food.id]),
+            await create_org(db_session, "Без телефонов", sample_building.id, [], [food.id]),
+            await create_org(db_session, "Пустая", sample_building.id, [], []),
+        ]
+        ids = ",".join(str(o.id) for o in orgs) + ",99999"
+        requests = [
+            ("get", f"/api/v1/organizations/{orgs[0].id}", {}),
+            ("get", f"/api/v1/buildings/{sample_building.id}/organizations", {"limit": 2}),
+            ("get", "/api/v1/organizations/search", {"building_id": sample_building.id, "facets": "activity,building"}),
+            ("get", "/api/v1/organizations", {"ids": ids}),
+            ("get", f"/api/v1/activities/{food.id}/organizations", {}),
+        ]
+
+        for building in (sample_building, None):
+            if building is None:
+                near_equator = Building(address="Экватор", latitude=5e-05, longitude=-1e-05)
+                db_session.add(near_equator)
+                await db_session.commit()
+                org = await create_org(db_session, "На экваторе", near_equator.id, [], [])
+                requests.append(("get", f"/api/v1/organizations/{org.id}", {}))
+            for method, url, params in requests:
+                monkeypatch.setattr(settings, "ORG_READ_PATH", "orm")
+                expected = await client.request(method, url, params=params, headers=api_headers)
+                for read_path in ("rows", "fragments", "fragments"):
+                    monkeypatch.setattr(settings, "ORG_READ_PATH", read_path)
+                    response = await client.request(method, url, params=params, headers=api_headers)
+
+                    assert response.status_code == expected.status_code == 200
+                    assert response.content == expected.content
+                    assert response.headers.get("X-Next-Cursor") == expected.headers.get("X-Next-Cursor")
+
+    async def test_search_organizations_normalized_with_facets(
+        self,
+        client: AsyncClient,
+        api_headers: dict,
+        db_session: AsyncSession,
+        sample_building: Building,
+        sample_activity: Activity
+    ):
+        """Тест нормализованного конверта поиска с фасетами."""
+        org = await create_org(db_session, "Магазин", sample_building.id, [], [sample_activity.id])
+
+        response = await client.get(
+            "/api/v1/organizations/search",
+            params={"name": "магазин", "facets": "building", "format": "normalized"},
+            headers=api_headers
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert [item["id"] for item in data["items"]] == [org.id]
+        assert data["buildings"][str(sample_building.id)]["address"] == sample_building.address
+        assert data["activities"][str(sample_activity.id)]["name"] == sample_activity.name
+        assert data["facets"] == {"building": [{"id": sample_building.id, "count": 1}]}
+
+    async def test_get_organization_not_found_json_agg(self, client: AsyncClient, api_headers: dict, monkeypatch):
+        """Тест получения несуществующей организации через документы, собранные в БД."""
+        monkeypatch.setattr(settings, "ORG_READ_PATH", "json_agg")
+        response = await client.get("/api/v1/organizations/99999", headers=api_headers)
+
+        assert response.status_code == 404
+
     async def test_get_organization_not_found(self, client: AsyncClient, api_headers: dict):
         """Тест получения несуществующей организации."""
         response = await client.get("/api/v1/organizations/99999", headers=api_headers)
@@ -69,6 +191,20 @@ class TestOrganizationsAPI:
         assert len(data) >= 1
         assert any(org["id"] == sample_organization.id for org in data)
 
+    async def test_search_organizations_relevance_rejects_cursor(
+        self,
+        client: AsyncClient,
+        api_headers: dict
+    ):
+        """Тест запрета курсора при упорядочивании по сходству."""
+        response = await client.get(
+            "/api/v1/organizations/search/by-name",
+            params={"name": "аптека", "order": "relevance", "cursor": "WzFd"},
+            headers=api_headers
+        )
+
+        assert response.status_code == 400
+
     async def test_search_organizations_by_name_partial(
         self,
         client: AsyncClient,
@@ -246,6 +382,27 @@ class TestOrganizationsAPI:
         org_ids = {org["id"] for org in data}
         assert org1.id in org_ids
 
+    async def test_orgs_in_rectangular_area_stream(
+        self,
+        client: AsyncClient,
+        api_headers: dict,
+        db_session: AsyncSession,
+        sample_building: Building
+    ):
+        """Тест потоковой выдачи организаций в прямоугольной области в формате NDJSON."""
+        org1 = await create_org(db_session, "Первая", sample_building.id, [], [])
+        org2 = await create_org(db_session, "Вторая", sample_building.id, [], [])
+        params = {"lat": sample_building.latitude, "lon": sample_building.longitude, "width_m": 200, "height_m": 200}
+
+        response = await client.get(
+            "/api/v1/organizations/geo/rectangular-area",
+            params=params,
+            headers={**api_headers, "Accept": "application/x-ndjson"}
+        )
+
+        assert response.status_code == 200
+        assert [json.loads(line)["id"] for line in response.text.splitlines()] == [org1.id, org2.id]
+
     async def test_orgs_in_rectangular_area_empty(
         self,
         client: AsyncClient,
@@ -349,3 +506,253 @@ class TestOrganizationsAPI:
             headers=invalid_api_headers
         )
         assert response.status_code == 403
+
+    async def test_orgs_nearby(
+        self,
+        client: AsyncClient,
+        api_headers: dict,
+        db_session: AsyncSession,
+        sample_activity: Activity
+    ):
+        """Тест поиска ближайших организаций."""
+        near = Building(address="Рядом", latitude=55.7501, longitude=37.618)
+        far = Building(address="Дальше", latitude=55.7520, longitude=37.618)
+        db_session.add_all([far, near])
+        await db_session.commit()
+
+        org_far = await create_org(db_session, "Дальше", far.id, [], [sample_activity.id])
+        org_near = await create_org(db_session, "Рядом", near.id, ["+79991111111"], [sample_activity.id])
+
+        response = await client.get(
+            "/api/v1/organizations/geo/nearby",
+            params={"lat": 55.750, "lon": 37.618, "radius_m": 1000},
+            headers=api_headers
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert [org["id"] for org in data] == [org_near.id, org_far.id]
+        assert data[0]["distance_m"] < data[1]["distance_m"]
+        assert data[0]["phones"][0]["number"] == "+79991111111"
+
+    async def test_orgs_nearby_invalid_radius(self, client: AsyncClient, api_headers: dict):
+        """Тест поиска ближайших с некорректным радиусом."""
+        response = await client.get(
+            "/api/v1/organizations/geo/nearby",
+            params={"lat": 55.75, "lon": 37.61, "radius_m": 0},
+            headers=api_headers
+        )
+
+        assert response.status_code == 422
+
+    async def test_orgs_clusters(
+        self,
+        client: AsyncClient,
+        api_headers: dict,
+        sample_organization
+    ):
+        """Тест получения кластеров организаций."""
+        building = sample_organization.building
+
+        response = await client.get(
+            "/api/v1/organizations/geo/clusters",
+            params={
+                "bbox": f"{building.longitude - 1},{building.latitude - 1},{building.longitude + 1},{building.latitude + 1}",
+                "zoom": 10,
+            },
+            headers=api_headers
+        )
+
+        assert response.status_code == 200
+        assert response.json() == [
+            {"count": 1, "latitude": building.latitude, "longitude": building.longitude}
+        ]
+
+    async def test_orgs_clusters_invalid_bbox(self, client: AsyncClient, api_headers: dict):
+        """Тест кластеризации с некорректными границами области."""
+        for bbox in ["1,2,3", "a,b,c,d", "37.7,55.8,37.6,55.7", "0,-100,1,1"]:
+            response = await client.get(
+                "/api/v1/organizations/geo/clusters",
+                params={"bbox": bbox, "zoom": 10},
+                headers=api_headers
+            )
+
+            assert response.status_code == 400
+            assert response.json()["detail"] == "Invalid bbox"
+
+    async def test_orgs_clusters_too_many_cells(self, client: AsyncClient, api_headers: dict):
+        """Тест отказа в кластеризации, если bbox задевает слишком много ячеек."""
+        response = await client.get(
+            "/api/v1/organizations/geo/clusters",
+            params={"bbox": "-180,-85,180,85", "zoom": 10},
+            headers=api_headers
+        )
+
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Too many cells for bbox and zoom"
+
+    async def test_orgs_geo_batch(
+        self,
+        client: AsyncClient,
+        api_headers: dict,
+        sample_organization
+    ):
+        """Тест пакетного геопоиска."""
+        building = sample_organization.building
+
+        response = await client.post(
+            "/api/v1/organizations/geo/batch",
+            json={"queries": [
+                {"lat": building.latitude, "lon": building.longitude, "width_m": 100, "height_m": 100},
+                {"lat": building.latitude, "lon": building.longitude, "radius_m": 50},
+                {"lat": 0, "lon": 0, "radius_m": 50},
+            ]},
+            headers=api_headers
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert [item["index"] for item in data] == [0, 1, 2]
+        assert [org["id"] for org in data[0]["organizations"]] == [sample_organization.id]
+        assert [org["id"] for org in data[1]["organizations"]] == [sample_organization.id]
+        assert data[2]["organizations"] == []
+
+    async def test_orgs_geo_batch_invalid_query(self, client: AsyncClient, api_headers: dict):
+        """Тест пакетного геопоиска с запросом без размеров области."""
+        response = await client.post(
+            "/api/v1/organizations/geo/batch",
+            json={"queries": [{"lat": 55.75, "lon": 37.61, "width_m": 100}]},
+            headers=api_headers
+        )
+
+        assert response.status_code == 422
+
+    async def test_search_combined(
+        self,
+        client: AsyncClient,
+        api_headers: dict,
+        db_session: AsyncSession,
+        sample_building: Building,
+        sample_activity: Activity
+    ):
+        """Тест комбинированного поиска с постраничной выдачей."""
+        first = await create_org(db_session, "Аптека 1", sample_building.id, [], [sample_activity.id])
+        second = await create_org(db_session, "Аптека 2", sample_building.id, [], [sample_activity.id])
+        await create_org(db_session, "Аптека без деятельности", sample_building.id, [], [])
+
+        params = {
+            "name": "аптека",
+            "activity_id": sample_activity.id,
+            "building_id": sample_building.id,
+            "lat": sample_building.latitude,
+            "lon": sample_building.longitude,
+            "width_m": 100,
+            "height_m": 100,
+            "limit": 1,
+        }
+        response = await client.get("/api/v1/organizations/search", params=params, headers=api_headers)
+
+        assert response.status_code == 200
+        assert [org["id"] for org in response.json()] == [first.id]
+
+        params["cursor"] = response.headers["X-Next-Cursor"]
+        response = await client.get("/api/v1/organizations/search", params=params, headers=api_headers)
+
+        assert response.status_code == 200
+        assert [org["id"] for org in response.json()] == [second.id]
+        assert "X-Next-Cursor" not in response.headers
+
+    async def test_search_combined_incomplete_area(self, client: AsyncClient, api_headers: dict):
+        """Тест комбинированного поиска с неполными параметрами области."""
+        response = await client.get(
+            "/api/v1/organizations/search",
+            params={"lat": 55.75, "lon": 37.61},
+            headers=api_headers
+        )
+
+        assert response.status_code == 400
+
+    async def test_search_with_facets(
+        self,
+        client: AsyncClient,
+        api_headers: dict,
+        db_session: AsyncSession,
+        sample_building: Building,
+        sample_activity: Activity
+    ):
+        """Тест поиска с фасетами по всей выборке, а не только по странице."""
+        first = await create_org(db_session, "Аптека 1", sample_building.id, [], [sample_activity.id])
+        await create_org(db_session, "Аптека 2", sample_building.id, [], [sample_activity.id])
+
+        for url in ["/api/v1/organizations/search", "/api/v1/organizations/search/by-name"]:
+            response = await client.get(
+                url,
+                params={"name": "аптека", "facets": "activity,building", "limit": 1},
+                headers=api_headers
+            )
+
+            assert response.status_code == 200
+            data = response.json()
+            assert [org["id"] for org in data["items"]] == [first.id]
+            assert data["facets"] == {
+                "activity": [{"id": sample_activity.id, "count": 2}],
+                "building": [{"id": sample_building.id, "count": 2}],
+            }
+            assert "X-Next-Cursor" in response.headers
+
+    async def test_search_invalid_facets(self, client: AsyncClient, api_headers: dict):
+        """Тест поиска с неизвестным фасетом."""
+        response = await client.get(
+            "/api/v1/organizations/search",
+            params={"name": "аптека", "facets": "phone"},
+            headers=api_headers
+        )
+
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Invalid facets"
+
+    async def test_get_organizations_by_ids(
+        self,
+        client: AsyncClient,
+        api_headers: dict,
+        db_session: AsyncSession,
+        sample_building: Building
+    ):
+        """Тест пакетного получения организаций в порядке запроса."""
+        first = await create_org(db_session, "Первая", sample_building.id, ["+79990000001"], [])
+        second = await create_org(db_session, "Вторая", sample_building.id, [], [])
+
+        response = await client.get(
+            "/api/v1/organizations",
+            params={"ids": f"{second.id},99999,{first.id}"},
+            headers=api_headers
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert [item["id"] for item in data] == [second.id, 99999, first.id]
+        assert data[1]["organization"] is None
+        assert data[2]["organization"]["phones"][0]["number"] == "+79990000001"
+
+        response = await client.post(
+            "/api/v1/organizations/batch-get",
+            json={"ids": [first.id, 99999]},
+            headers=api_headers
+        )
+
+        assert response.status_code == 200
+        assert [(item["id"], item["organization"] and item["organization"]["name"]) for item in response.json()] == [
+            (first.id, "Первая"), (99999, None)
+        ]
+
+    async def test_get_organizations_by_ids_invalid(self, client: AsyncClient, api_headers: dict, monkeypatch):
+        """Тест пакетного получения с некорректным или слишком длинным списком."""
+        response = await client.get("/api/v1/organizations", params={"ids": "1,a"}, headers=api_headers)
+
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Invalid ids"
+
+        monkeypatch.setattr(settings, "BATCH_GET_MAX_IDS", 2)
+        response = await client.get("/api/v1/organizations", params={"ids": "1,2,3"}, headers=api_headers)
+
+        assert response.status_code == 400
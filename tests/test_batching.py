@@ -0,0 +1,71 @@
+"""Тесты для пакетного загрузчика."""
+import asyncio
+
+import pytest
+
+from app.core.batching import BatchLoader
+
+
+@pytest.mark.unit
+class TestBatchLoader:
+    """Тесты для структуры BatchLoader."""
+
+    async def test_concurrent_loads_merged(self):
+        """Тест объединения одновременных загрузок в один вызов load_many."""
+        calls = []
+
+        async def load_many(group, keys):
+            calls.append((group, keys))
+            return {key: key * 10 for key in keys if key != 3}
+
+        loader = BatchLoader(load_many, 0.001)
+        results = await asyncio.gather(
+            loader.load("g", 1), loader.load("g", 2), loader.load("g", 1), loader.load("g", 3)
+        )
+
+        assert results == [10, 20, 10, None]
+        assert calls == [("g", [1, 2, 3])]
+
+    async def test_groups_loaded_separately(self):
+        """Тест раздельных пакетов для разных групп."""
+        calls = []
+
+        async def load_many(group, keys):
+            calls.append((group, keys))
+            return {key: group for key in keys}
+
+        loader = BatchLoader(load_many, 0.001)
+        results = await asyncio.gather(loader.load("a", 1), loader.load("b", 1))
+
+        assert results == ["a", "b"]
+        assert sorted(calls) == [("a", [1]), ("b", [1])]
+
+    async def test_error_propagates_to_all(self):
+        """Тест передачи исключения пакета всем ожидающим."""
+
+        async def load_many(group, keys):
+            raise ValueError("ошибка")
+
+        loader = BatchLoader(load_many, 0.001)
+        results = await asyncio.gather(
+            loader.load("g", 1), loader.load("g", 2), return_exceptions=True
+        )
+
+        assert all(isinstance(result, ValueError) for result in results)
+
+    async def test_cancelled_batch_cancels_waiters(self):
+        """Тест отмены ожидающих при отмене пакетной загрузки."""
+        started = asyncio.Event()
+
+        async def load_many(group, keys):
+            started.set()
+            await asyncio.Event().wait()
+
+        loader = BatchLoader(load_many, 0.001)
+        loads = asyncio.gather(loader.load("g", 1), loader.load("g", 2), return_exceptions=True)
+        await started.wait()
+        for task in loader._running:
+            task.cancel()
+        results = await asyncio.wait_for(loads, timeout=1)
+
+        assert all(isinstance(result, asyncio.CancelledError) for result in results)
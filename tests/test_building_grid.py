@@ -0,0 +1,116 @@
+"""Тесты для сетки зданий в памяти."""
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.organization import create_org, list_in_rectangular_area, list_nearby
+from app.indexes.building_grid import BuildingGrid, building_grid
+from app.models.building import Building
+
+
+@pytest.mark.unit
+class TestBuildingGrid:
+    """Тесты для структуры BuildingGrid."""
+
+    def _grid(self) -> BuildingGrid:
+        grid = BuildingGrid(0.01)
+        grid._points = {}
+        grid.add(1, 55.7501, 37.6101)
+        grid.add(2, 55.7599, 37.6199)
+        grid.add(3, 55.7700, 37.6300)
+        grid.add(4, -33.8688, 151.2093)
+        return grid
+
+    def test_within(self):
+        """Тест поиска зданий в прямоугольнике, пересекающем несколько ячеек."""
+        grid = self._grid()
+
+        assert grid.within(55.75, 55.76, 37.61, 37.62) == [(1, 55.7501, 37.6101), (2, 55.7599, 37.6199)]
+        assert [b[0] for b in grid.within(55.0, 56.0, 37.0, 38.0)] == [1, 2, 3]
+        assert [b[0] for b in grid.within(-34.0, -33.0, 151.0, 152.0)] == [4]
+        assert grid.within(10.0, 11.0, 10.0, 11.0) == []
+
+    def test_within_huge_box(self):
+        """Тест поиска в прямоугольнике, содержащем больше ячеек, чем заполнено в сетке."""
+        grid = self._grid()
+
+        assert [b[0] for b in grid.within(-90.0, 90.0, -180.0, 180.0)] == [1, 2, 3, 4]
+
+    def test_move_and_remove(self):
+        """Тест перемещения и удаления здания."""
+        grid = self._grid()
+        grid.add(1, -33.8700, 151.2100)
+        grid.remove(4)
+
+        assert [b[0] for b in grid.within(55.0, 56.0, 37.0, 38.0)] == [2, 3]
+        assert [b[0] for b in grid.within(-34.0, -33.0, 151.0, 152.0)] == [1]
+
+    def test_add_to_unloaded_grid_is_noop(self):
+        """Тест игнорирования вставки в незагруженный индекс."""
+        grid = BuildingGrid(0.01)
+        grid.add(1, 55.75, 37.61)
+
+        assert not grid.loaded
+
+
+@pytest.mark.crud
+class TestBuildingGridIndex:
+    """Тесты для синхронизации сетки зданий с БД."""
+
+    async def test_patched_after_commit(self, db_session: AsyncSession):
+        """Тест дополнения, перемещения и удаления зданий в загруженном индексе."""
+        building = Building(address="Адрес", latitude=55.75, longitude=37.61)
+        db_session.add(building)
+        await db_session.commit()
+        await building_grid.ensure_loaded(db_session)
+
+        added = Building(address="Новый адрес", latitude=55.76, longitude=37.62)
+        db_session.add(added)
+        building.latitude = 10.0
+        await db_session.commit()
+
+        assert building_grid.loaded
+        assert [b[0] for b in building_grid.within(55.0, 56.0, 37.0, 38.0)] == [added.id]
+        assert [b[0] for b in building_grid.within(9.0, 11.0, 37.0, 38.0)] == [building.id]
+
+        await db_session.delete(added)
+        await db_session.commit()
+
+        assert building_grid.within(55.0, 56.0, 37.0, 38.0) == []
+
+    async def test_commit_during_load_not_lost(self, db_session: AsyncSession):
+        """Тест повторной загрузки, если здание зафиксировано во время запроса."""
+        added: list[Building] = []
+
+        class CommitDuringLoad:
+            async def execute(self, stmt):
+                res = await db_session.execute(stmt)
+                if not added:
+                    added.append(Building(address="Новый адрес", latitude=55.76, longitude=37.62))
+                    db_session.add(added[0])
+                    await db_session.commit()
+                return res
+
+        building_grid.invalidate()
+        await building_grid.load(CommitDuringLoad())
+
+        assert [b[0] for b in building_grid.within(55.0, 56.0, 37.0, 38.0)] == [added[0].id]
+
+    async def test_geo_queries_skip_buildings_table(
+        self,
+        db_session: AsyncSession,
+        sample_building: Building,
+        sql_statements: list[str]
+    ):
+        """Тест геопоиска без обращения к таблице buildings для отбора зданий."""
+        org = await create_org(db_session, "Организация", sample_building.id, [], [])
+        await building_grid.ensure_loaded(db_session)
+        sql_statements.clear()
+
+        rect = await list_in_rectangular_area(
+            db_session, sample_building.latitude, sample_building.longitude, 1000, 1000
+        )
+        nearby = await list_nearby(db_session, sample_building.latitude, sample_building.longitude, 500, 10)
+
+        assert [o.id for o in rect] == [org.id]
+        assert [o.id for o in nearby] == [org.id]
+        assert not any("buildings.latitude" in s for s in sql_statements)
@@ -0,0 +1,352 @@
+"""Тесты для кэша ответов GET-маршрутов."""
+import asyncio
+import time
+
+import pytest
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeRedis
+from httpx import AsyncClient
+from redis.asyncio.client import Pipeline
+from redis.exceptions import ConnectionError as RedisConnectionError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.bus import ChangeBus, decode_changes, encode_changes
+from app.core.cache import response_cache
+from app.core.cache_backends import CachedResponse, MemoryCacheBackend, RedisCacheBackend
+from app.core.config import settings
+from app.core.events import Change
+from app.crud.activity import create_activity
+from app.crud.organization import create_org
+from app.indexes.building_grid import building_grid
+from app.models.building import Building
+
+
+def _response(body: bytes) -> CachedResponse:
+    return CachedResponse(200, {"content-type": "application/json"}, body)
+
+
+class DroppedPubSub:
+    """Подписка, соединение которой обрывается при первом чтении."""
+
+    def __init__(self, pubsub):
+        self.pubsub = pubsub
+
+    async def subscribe(self, *channels):
+        await self.pubsub.subscribe(*channels)
+
+    async def listen(self):
+        raise RedisConnectionError("Connection closed by server.")
+        yield
+
+    async def aclose(self):
+        await self.pubsub.aclose()
+
+
+class DroppingRedis(FakeRedis):
+    """FakeRedis, у которого обрывается первая подписка."""
+
+    dropped = False
+
+    def pubsub(self, **kwargs):
+        pubsub = super().pubsub(**kwargs)
+        if self.dropped:
+            return pubsub
+        self.dropped = True
+        return DroppedPubSub(pubsub)
+
+
+@pytest.mark.unit
+class TestMemoryCacheBackend:
+    """Тесты для хранилища кэша в памяти процесса."""
+
+    async def test_lru_eviction(self):
+        """Тест вытеснения давно не использованных записей."""
+        cache = MemoryCacheBackend(max_entries=2)
+        await cache.put("a", _response(b"a"), 60, (), await cache.generation())
+        await cache.put("b", _response(b"b"), 60, (), await cache.generation())
+        await cache.get("a")
+        await cache.put("c", _response(b"c"), 60, (), await cache.generation())
+
+        assert (await cache.get("a")).body == b"a"
+        assert await cache.get("b") is None
+        assert (await cache.get("c")).body == b"c"
+        assert (await cache.stats())["evictions"] == 1
+
+    async def test_ttl_expiry(self, monkeypatch):
+        """Тест истечения срока жизни записи."""
+        cache = MemoryCacheBackend(max_entries=10)
+        await cache.put("a", _response(b"a"), 10, (), await cache.generation())
+        now = time.monotonic()
+        monkeypatch.setattr(time, "monotonic", lambda: now + 11)
+
+        assert await cache.get("a") is None
+        assert (await cache.stats())["entries"] == 0
+
+    async def test_invalidate_tags(self):
+        """Тест сброса записей по тегам."""
+        cache = MemoryCacheBackend(max_entries=10)
+        await cache.put("a", _response(b"a"), 60, ("organizations",), await cache.generation())
+        await cache.put("b", _response(b"b"), 60, ("buildings",), await cache.generation())
+        await cache.invalidate_tags({"organizations"})
+
+        assert await cache.get("a") is None
+        assert (await cache.get("b")).body == b"b"
+
+    async def test_stale_put_is_ignored(self):
+        """Тест отказа сохранять ответ, вычисленный до сброса по тегам."""
+        cache = MemoryCacheBackend(max_entries=10)
+        generation = await cache.generation()
+        await cache.invalidate_tags({"organizations"})
+        await cache.put("a", _response(b"a"), 60, ("organizations",), generation)
+
+        assert await cache.get("a") is None
+
+
+@pytest.mark.unit
+class TestRedisCacheBackend:
+    """Тесты для хранилища кэша в Redis (на FakeRedis)."""
+
+    def _backend(self) -> RedisCacheBackend:
+        return RedisCacheBackend(FakeRedis(server=FakeServer()), "test:cache:")
+
+    async def test_put_and_get(self):
+        """Тест сохранения ответа с заголовками."""
+        cache = self._backend()
+        value = CachedResponse(200, {"content-type": "application/json", "x-next-cursor": "WzJd"}, b"[1,\n2]")
+        await cache.put("a", value, 60, ("organizations",), await cache.generation())
+
+        assert await cache.get("a") == value
+        assert await cache.client.pttl("test:cache:entry:a") > 0
+
+    async def test_invalidate_tags(self):
+        """Тест сброса записей по тегам и увеличения общего поколения."""
+        cache = self._backend()
+        generation = await cache.generation()
+        await cache.put("a", _response(b"a"), 60, ("organizations",), generation)
+        await cache.put("b", _response(b"b"), 60, ("buildings",), generation)
+        await cache.invalidate_tags({"organizations"})
+
+        assert await cache.get("a") is None
+        assert (await cache.get("b")).body == b"b"
+        assert await cache.generation() == generation + 1
+
+        await cache.put("c", _response(b"c"), 60, (), generation)
+
+        assert await cache.get("c") is None
+
+    async def test_tag_sets_expire_with_entries(self):
+        """Тест TTL множеств тегов не меньше самой долгой записи в них."""
+        cache = self._backend()
+        await cache.put("a", _response(b"a"), 300, ("organizations",), await cache.generation())
+        await cache.put("b", _response(b"b"), 60, ("organizations",), await cache.generation())
+
+        assert 60_000 < await cache.client.pttl("test:cache:tag:organizations") <= 300_000
+
+    async def test_invalidation_during_put_rejects_entry(self, monkeypatch):
+        """Тест отказа сохранять запись, если сброс произошёл между проверкой поколения и записью."""
+        server = FakeServer()
+        cache = RedisCacheBackend(FakeRedis(server=server), "test:cache:")
+        other = RedisCacheBackend(FakeRedis(server=server), "test:cache:")
+        generation = await cache.generation()
+        pttl = Pipeline.pttl
+        invalidated = []
+
+        async def pttl_with_invalidation(pipe, name):
+            if not invalidated:
+                invalidated.append(True)
+                await other.invalidate_tags({"organizations"})
+            return await pttl(pipe, name)
+
+        monkeypatch.setattr(Pipeline, "pttl", pttl_with_invalidation)
+        await cache.put("a", _response(b"a"), 60, ("organizations",), generation)
+
+        assert invalidated
+        assert await cache.get("a") is None
+
+    async def test_shared_between_processes(self):
+        """Тест общего кэша для двух клиентов одного сервера Redis."""
+        server = FakeServer()
+        first = RedisCacheBackend(FakeRedis(server=server), "test:cache:")
+        second = RedisCacheBackend(FakeRedis(server=server), "test:cache:")
+        await first.put("a", _response(b"a"), 60, ("organizations",), await first.generation())
+
+        assert (await second.get("a")).body == b"a"
+
+        await second.clear()
+
+        assert await first.get("a") is None
+
+
+@pytest.mark.unit
+class TestChangeBus:
+    """Тесты для рассылки изменений между процессами."""
+
+    async def test_remote_changes_dispatched(self):
+        """Тест применения изменений другого процесса к индексам и кэшу этого процесса."""
+        server = FakeServer()
+        local = ChangeBus(FakeRedis(server=server), "test:changes")
+        remote = ChangeBus(FakeRedis(server=server), "test:changes")
+        await local.start()
+        building_grid.invalidate()
+        building_grid._points = {}
+        await response_cache.backend.put("k", _response(b"k"), 60, ("buildings",), await response_cache.backend.generation())
+        try:
+            remote.publish([Change("insert", Building, {"id": 7, "address": "Адрес", "latitude": 55.75, "longitude": 37.61})])
+            for _ in range(100):
+                await asyncio.sleep(0.01)
+                if building_grid.within(55.0, 56.0, 37.0, 38.0):
+                    break
+            assert [b[0] for b in building_grid.within(55.0, 56.0, 37.0, 38.0)] == [7]
+            await asyncio.sleep(0)
+            assert await response_cache.backend.get("k") is None
+        finally:
+            await remote.stop()
+            await local.stop()
+            building_grid.invalidate()
+
+    async def test_reconnect_after_disconnect(self, monkeypatch):
+        """Тест переподписки после разрыва соединения и сброса состояния процесса."""
+        monkeypatch.setattr(settings, "CHANGES_RECONNECT_DELAY", 0.01)
+        server = FakeServer()
+        resyncs = []
+
+        async def on_resync():
+            resyncs.append(True)
+
+        local = ChangeBus(DroppingRedis(server=server), "test:changes", on_resync)
+        remote = ChangeBus(FakeRedis(server=server), "test:changes")
+        await local.start()
+        building_grid.invalidate()
+        building_grid._points = {}
+        try:
+            for _ in range(100):
+                await asyncio.sleep(0.01)
+                if resyncs:
+                    break
+            assert resyncs == [True]
+            assert not local._listener.done()
+
+            remote.publish([Change("insert", Building, {"id": 7, "address": "Адрес", "latitude": 55.75, "longitude": 37.61})])
+            for _ in range(100):
+                await asyncio.sleep(0.01)
+                if building_grid.within(55.0, 56.0, 37.0, 38.0):
+                    break
+            assert [b[0] for b in building_grid.within(55.0, 56.0, 37.0, 38.0)] == [7]
+        finally:
+            await remote.stop()
+            await local.stop()
+            building_grid.invalidate()
+
+    async def test_own_changes_ignored(self):
+        """Тест игнорирования собственных сообщений процесса."""
+        origin, changes = decode_changes(
+            encode_changes([Change("delete", Building, {"id": 7})], "me")
+        )
+
+        assert origin == "me"
+        assert changes == [Change("delete", Building, {"id": 7})]
+
+
+@pytest.mark.api
+class TestResponseCacheAPI:
+    """Тесты для кэширования ответов API."""
+
+    async def test_hit_skips_database(
+        self,
+        client: AsyncClient,
+        api_headers: dict,
+        sample_building: Building,
+        sql_statements: list[str]
+    ):
+        """Тест ответа из кэша без обращения к БД."""
+        first = await client.get("/api/v1/buildings", params={"limit": 10}, headers=api_headers)
+        sql_statements.clear()
+        second = await client.get("/api/v1/buildings", params={"limit": 10}, headers=api_headers)
+
+        assert first.headers["X-Cache"] == "MISS"
+        assert second.headers["X-Cache"] == "HIT"
+        assert second.json() == first.json()
+        assert sql_statements == []
+
+    async def test_create_org_invalidates_lists(
+        self,
+        client: AsyncClient,
+        api_headers: dict,
+        db_session: AsyncSession,
+        sample_building: Building
+    ):
+        """Тест сброса списков организаций при создании организации."""
+        url = f"/api/v1/buildings/{sample_building.id}/organizations"
+        await client.get(url, headers=api_headers)
+
+        org = await create_org(db_session, "Новая организация", sample_building.id, [], [])
+        response = await client.get(url, headers=api_headers)
+
+        assert response.headers["X-Cache"] == "MISS"
+        assert [item["id"] for item in response.json()] == [org.id]
+
+    async def test_create_activity_invalidates_tree(
+        self,
+        client: AsyncClient,
+        api_headers: dict,
+        db_session: AsyncSession
+    ):
+        """Тест сброса дерева видов деятельности при создании вида деятельности."""
+        await client.get("/api/v1/activities/tree", headers=api_headers)
+
+        await create_activity(db_session, "Еда", None)
+        response = await client.get("/api/v1/activities/tree", headers=api_headers)
+
+        assert response.headers["X-Cache"] == "MISS"
+        assert [node["name"] for node in response.json()] == ["Еда"]
+
+    async def test_invalid_key_not_served_from_cache(
+        self,
+        client: AsyncClient,
+        api_headers: dict,
+        invalid_api_headers: dict
+    ):
+        """Тест проверки ключа API перед обращением к кэшу."""
+        await client.get("/api/v1/buildings", headers=api_headers)
+        response = await client.get("/api/v1/buildings", headers=invalid_api_headers)
+
+        assert response.status_code == 403
+
+    async def test_redis_backend(
+        self,
+        client: AsyncClient,
+        api_headers: dict,
+        db_session: AsyncSession,
+        sample_building: Building,
+        monkeypatch
+    ):
+        """Тест кэширования и сброса через хранилище Redis."""
+        monkeypatch.setattr(response_cache, "backend", RedisCacheBackend(FakeRedis(server=FakeServer()), "test:cache:"))
+        url = f"/api/v1/buildings/{sample_building.id}/organizations"
+        await client.get(url, headers=api_headers)
+
+        assert (await client.get(url, headers=api_headers)).headers["X-Cache"] == "HIT"
+
+        org = await create_org(db_session, "Новая организация", sample_building.id, [], [])
+        response = await client.get(url, headers=api_headers)
+
+        assert response.headers["X-Cache"] == "MISS"
+        assert [item["id"] for item in response.json()] == [org.id]
+
+    async def test_disabled(self, client: AsyncClient, api_headers: dict, monkeypatch):
+        """Тест отключения кэша настройкой."""
+        monkeypatch.setattr(settings, "CACHE_ENABLED", False)
+        await client.get("/api/v1/buildings", headers=api_headers)
+        response = await client.get("/api/v1/buildings", headers=api_headers)
+
+        assert "X-Cache" not in response.headers
+
+    async def test_stats(self, client: AsyncClient, api_headers: dict):
+        """Тест метрик попаданий и промахов."""
+        await client.get("/api/v1/buildings", headers=api_headers)
+        await client.get("/api/v1/buildings", headers=api_headers)
+
+        response = await client.get("/health/cache")
+
+        assert response.status_code == 200
+        assert response.json()["routes"]["/api/v1/buildings"] == {"hits": 1, "misses": 1}
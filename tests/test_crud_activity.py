@@ -1,10 +1,13 @@
 """Тесты для CRUD операций с видами деятельности."""
 import pytest
 from fastapi import HTTPException
+from sqlalchemy import insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.crud.activity import create_activity, list_activities
-from app.models.activity import Activity
+from app.indexes.activity_tree import activity_tree
+from app.models.activity import Activity, activity_closure
+from app.models.organization import Organization
 
 
 @pytest.mark.crud
@@ -52,6 +55,32 @@ class TestActivityCRUD:
         assert exc_info.value.status_code == 404
         assert "Parent activity not found" in str(exc_info.value.detail)
 
+    async def test_create_activity_parent_missing_in_index(self, db_session: AsyncSession):
+        """Тест создания дочернего вида деятельности, когда индекс дерева не знает о родителе."""
+        await activity_tree.ensure_loaded(db_session)
+        parent_id = await db_session.scalar(
+            insert(Activity).values(name="Еда", parent_id=None, level=1).returning(Activity.id)
+        )
+        await db_session.commit()
+
+        child = await create_activity(db_session, "Мясо", parent_id)
+
+        assert child.level == 2
+        assert (await activity_tree.ensure_loaded(db_session)).get(parent_id) is not None
+
+    async def test_create_activity_updates_closure(self, db_session: AsyncSession):
+        """Тест поддержки таблицы замыкания при создании видов деятельности."""
+        food = await create_activity(db_session, "Еда", None)
+        meat = await create_activity(db_session, "Мясо", food.id)
+        dairy = await create_activity(db_session, "Молоко", food.id)
+
+        result = await db_session.execute(
+            select(activity_closure.c.descendant_id, activity_closure.c.depth)
+            .where(activity_closure.c.ancestor_id == food.id)
+            .order_by(activity_closure.c.descendant_id)
+        )
+        assert result.all() == [(food.id, 0), (meat.id, 1), (dairy.id, 1)]
+
     async def test_list_activities_empty(self, db_session: AsyncSession):
         """Тест получения пустого списка видов деятельности."""
         activities = await list_activities(db_session)
@@ -82,3 +111,18 @@ class TestActivityCRUD:
 
         assert len(activities) == 3
         assert all(activities[i].level <= activities[i+1].level for i in range(len(activities)-1))
+
+    async def test_list_activities_single_select(
+        self,
+        db_session: AsyncSession,
+        sample_organization: Organization,
+        sql_statements: list[str]
+    ):
+        """Тест получения списка видов деятельности одним запросом без загрузки связей."""
+        db_session.expunge_all()
+
+        activities = await list_activities(db_session)
+
+        assert len(activities) == 1
+        assert len(sql_statements) == 1
+        assert "organizations" not in sql_statements[0]
@@ -4,6 +4,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.crud.building import list_buildings
 from app.models.building import Building
+from app.models.organization import Organization
 
 
 @pytest.mark.crud
@@ -51,3 +52,18 @@ class TestBuildingCRUD:
         assert buildings[0].address == sample_building.address
         assert buildings[0].latitude == sample_building.latitude
         assert buildings[0].longitude == sample_building.longitude
+
+    async def test_list_buildings_single_select(
+        self,
+        db_session: AsyncSession,
+        sample_organization: Organization,
+        sql_statements: list[str]
+    ):
+        """Тест получения списка зданий одним запросом без загрузки организаций."""
+        db_session.expunge_all()
+
+        buildings = await list_buildings(db_session)
+
+        assert len(buildings) == 1
+        assert len(sql_statements) == 1
+        assert "organizations" not in sql_statements[0]
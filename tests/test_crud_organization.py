@@ -1,11 +1,25 @@
 """Тесты для CRUD операций с организациями."""
+import asyncio
+
 import pytest
+from sqlalchemy import select, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
+import json
+
+from app.core.config import settings
+from app.crud.loading import (
+    load_organization_documents, load_organization_refs, load_organization_rows, stream_organization_documents, stream_organization_rows
+)
+from app.crud import organization as organization_crud
+from app.indexes import load_all
+from app.schemas.organization import OrganizationOut
 from app.crud.organization import (
-    get_org, search_by_name, create_org,
+    get_org, get_orgs, get_org_batched, search_by_name, search_combined, count_facets, create_org,
     list_by_building, list_by_activity_with_descendants,
-    list_by_activity_name_with_descendants, list_in_rectangular_area
+    list_by_activity_name_with_descendants, list_in_rectangular_area,
+    list_nearby, buildings_in_box, cluster_cells, cluster_organizations, list_in_areas_batch,
+    stream_by_activity_with_descendants, stream_in_rectangular_area, org_batch_loader
 )
 from app.models.activity import Activity
 from app.models.building import Building
@@ -29,6 +43,52 @@ class TestOrganizationCRUD:
         assert org.activities is not None
         assert len(org.activities) > 0
 
+    async def test_get_org_single_select(
+        self,
+        db_session: AsyncSession,
+        sample_organization: Organization,
+        sql_statements: list[str]
+    ):
+        """Тест загрузки организации одним запросом без каскада по связям."""
+        org_id = sample_organization.id
+        db_session.expunge_all()
+
+        org = await get_org(db_session, org_id)
+
+        assert len(sql_statements) == 1
+        assert org.building.id is not None
+        assert len(org.phones) == 1
+        assert len(org.activities) == 1
+
+    async def test_load_organization_documents(
+        self,
+        db_session: AsyncSession,
+        sample_building: Building,
+        sql_statements: list[str]
+    ):
+        """Тест сборки документов OrganizationOut на стороне БД одним запросом."""
+        food = Activity(name="Еда", parent_id=None, level=1)
+        db_session.add(food)
+        await db_session.commit()
+        meat = Activity(name="Мясо", parent_id=food.id, level=2)
+        db_session.add(meat)
+        await db_session.commit()
+
+        org = await create_org(db_session, "Мясной", sample_building.id, ["1-111", "2-222"], [food.id, meat.id])
+        empty = await create_org(db_session, "Пустая", sample_building.id, [], [])
+        expected = [OrganizationOut.model_validate(o).model_dump() for o in (org, empty)]
+        sql_statements.clear()
+
+        rows = await list_by_building(db_session, sample_building.id, loader=load_organization_documents)
+
+        assert len(sql_statements) == 1
+        assert [row.id for row in rows] == [org.id, empty.id]
+        documents = [json.loads(row.document) for row in rows]
+        for document in expected + documents:
+            document["phones"].sort(key=lambda p: p["id"])
+            document["activities"].sort(key=lambda a: a["id"])
+        assert documents == expected
+
     async def test_get_org_not_found(self, db_session: AsyncSession):
         """Тест получения несуществующей организации."""
         org = await get_org(db_session, 99999)
@@ -79,6 +139,73 @@ class TestOrganizationCRUD:
         assert len(results) == 1
         assert "ПРОДУКТЫ" in results[0].name
 
+    async def test_search_by_name_escapes_wildcards(
+        self,
+        db_session: AsyncSession,
+        sample_building: Building
+    ):
+        """Тест экранирования символов шаблона LIKE в поисковом запросе."""
+        await create_org(db_session, "Скидки 100%", sample_building.id, [], [])
+        await create_org(db_session, "Скидки 1000", sample_building.id, [], [])
+        await create_org(db_session, "Кафе_Уют", sample_building.id, [], [])
+        await create_org(db_session, "Кафе Уют", sample_building.id, [], [])
+
+        assert [o.name for o in await search_by_name(db_session, "100%")] == ["Скидки 100%"]
+        assert [o.name for o in await search_by_name(db_session, "кафе_")] == ["Кафе_Уют"]
+
+    async def test_search_by_name_ranked(
+        self,
+        db_session: AsyncSession,
+        sample_building: Building,
+        pg_trgm: bool,
+        monkeypatch
+    ):
+        """Тест упорядочивания результатов поиска по триграммному сходству."""
+        if not pg_trgm:
+            pytest.skip("Расширение pg_trgm недоступно")
+        monkeypatch.setattr(organization_crud, "_pg_trgm", None)
+
+        await create_org(db_session, "Большая городская аптека на углу", sample_building.id, [], [])
+        await create_org(db_session, "Аптека", sample_building.id, [], [])
+        await create_org(db_session, "Аптека 24", sample_building.id, [], [])
+
+        results = await search_by_name(db_session, "аптека", limit=2, ranked=True)
+
+        assert [o.name for o in results] == ["Аптека", "Аптека 24"]
+
+    async def test_search_by_name_ranked_without_pg_trgm(
+        self,
+        db_session: AsyncSession,
+        sample_building: Building,
+        sql_statements: list[str],
+        monkeypatch
+    ):
+        """Тест упорядочивания по позиции совпадения и длине названия без pg_trgm."""
+        monkeypatch.setattr(organization_crud, "_pg_trgm", False)
+        await create_org(db_session, "Большая городская аптека на углу", sample_building.id, [], [])
+        await create_org(db_session, "Аптека 24", sample_building.id, [], [])
+        await create_org(db_session, "Аптека", sample_building.id, [], [])
+        sql_statements.clear()
+
+        results = await search_by_name(db_session, "аптека", limit=3, ranked=True)
+
+        assert [o.name for o in results] == ["Аптека", "Аптека 24", "Большая городская аптека на углу"]
+        assert not any("similarity" in statement for statement in sql_statements)
+
+    async def test_search_by_name_paginated(
+        self,
+        db_session: AsyncSession,
+        sample_building: Building
+    ):
+        """Тест keyset-пагинации поиска по названию."""
+        orgs = [await create_org(db_session, f"Магазин {i}", sample_building.id, ["1", "2"], []) for i in range(3)]
+
+        first = await search_by_name(db_session, "магазин", limit=2)
+        second = await search_by_name(db_session, "магазин", limit=2, after_id=first[-1].id)
+
+        assert [o.id for o in first] == [orgs[0].id, orgs[1].id]
+        assert [o.id for o in second] == [orgs[2].id]
+
     async def test_search_by_name_no_results(self, db_session: AsyncSession):
         """Тест поиска без результатов."""
         results = await search_by_name(db_session, "НесуществующаяОрганизация")
@@ -187,6 +314,55 @@ class TestOrganizationCRUD:
 
         assert len(results) == 2
 
+    async def test_list_by_activity_with_descendants_three_levels(
+        self,
+        db_session: AsyncSession,
+        sample_building: Building
+    ):
+        """Тест получения организаций по всем трём уровням дерева."""
+        cars = Activity(name="Автомобили", parent_id=None, level=1)
+        db_session.add(cars)
+        await db_session.commit()
+
+        light = Activity(name="Легковые", parent_id=cars.id, level=2)
+        db_session.add(light)
+        await db_session.commit()
+
+        parts = Activity(name="Запчасти", parent_id=light.id, level=3)
+        db_session.add(parts)
+        await db_session.commit()
+
+        org = await create_org(db_session, "АвтоМир", sample_building.id, [], [parts.id])
+        await create_org(db_session, "Без деятельности", sample_building.id, [], [])
+
+        for activity_id in (cars.id, light.id, parts.id):
+            results = await list_by_activity_with_descendants(db_session, activity_id)
+            assert [o.id for o in results] == [org.id]
+
+    async def test_list_by_activity_name_with_descendants_multiple_matches(
+        self,
+        db_session: AsyncSession,
+        sample_building: Building
+    ):
+        """Тест поиска по названию, совпадающему у нескольких видов деятельности."""
+        food = Activity(name="Еда", parent_id=None, level=1)
+        services = Activity(name="Услуги", parent_id=None, level=1)
+        db_session.add_all([food, services])
+        await db_session.commit()
+
+        food_delivery = Activity(name="Доставка", parent_id=food.id, level=2)
+        parcel_delivery = Activity(name="Доставка", parent_id=services.id, level=2)
+        db_session.add_all([food_delivery, parcel_delivery])
+        await db_session.commit()
+
+        org1 = await create_org(db_session, "Курьер Еды", sample_building.id, [], [food_delivery.id])
+        org2 = await create_org(db_session, "Почта", sample_building.id, [], [parcel_delivery.id])
+        await create_org(db_session, "Ресторан", sample_building.id, [], [food.id])
+
+        results = await list_by_activity_name_with_descendants(db_session, "доставка")
+
+        assert [o.id for o in results] == [org1.id, org2.id]
+
     async def test_list_by_activity_name_with_descendants_case_insensitive(
         self,
         db_session: AsyncSession,
@@ -244,6 +420,375 @@ class TestOrganizationCRUD:
         results = await list_in_rectangular_area(db_session, 0.0, 0.0, 100, 100)
         assert results == []
 
+    async def test_rectangular_area_uses_coordinates_index(
+        self,
+        db_session: AsyncSession,
+        sample_building: Building
+    ):
+        """Тест использования индекса ix_buildings_lat_lon при отборе зданий в прямоугольнике."""
+        await db_session.execute(text("SET LOCAL enable_seqscan = off"))
+        sql = buildings_in_box(55.0, 56.0, 37.0, 38.0).compile(
+            dialect=db_session.bind.dialect, compile_kwargs={"literal_binds": True}
+        )
+
+        res = await db_session.execute(text(f"EXPLAIN {sql}"))
+        plan = "\n".join(row[0] for row in res)
+
+        assert "ix_buildings_lat_lon" in plan
+
+    async def test_search_organizations_combined(
+        self,
+        db_session: AsyncSession,
+        sql_statements: list[str]
+    ):
+        """Тест комбинированного поиска по названию, виду деятельности, зданию и области."""
+        center = Building(address="Центр", latitude=55.750, longitude=37.618)
+        remote = Building(address="Далеко", latitude=59.9, longitude=30.3)
+        food = Activity(name="Еда", level=1)
+        db_session.add_all([center, remote, food])
+        await db_session.commit()
+        meat = Activity(name="Мясо", parent_id=food.id, level=2)
+        db_session.add(meat)
+        await db_session.commit()
+
+        butcher = await create_org(db_session, "Мясная лавка", center.id, [], [meat.id])
+        await create_org(db_session, "Книжная лавка", center.id, [], [])
+        await create_org(db_session, "Мясная лавка на окраине", remote.id, [], [meat.id])
+        await load_all(db_session)
+        sql_statements.clear()
+
+        results = await search_combined(
+            db_session, name="ЛАВКА", activity_id=food.id, area=(55.750, 37.618, 500, 500)
+        )
+
+        assert [o.id for o in results] == [butcher.id]
+        assert len([s for s in sql_statements if s.lstrip().upper().startswith("SELECT")]) == 1
+
+        results = await search_combined(db_session, name="лавка", building_id=center.id, limit=1)
+
+        assert [o.id for o in results] == [butcher.id]
+
+        sql_statements.clear()
+        results = await search_combined(db_session, building_id=remote.id, area=(55.750, 37.618, 500, 500))
+
+        assert results == []
+        assert sql_statements == []
+
+    async def test_count_facets(
+        self,
+        db_session: AsyncSession,
+        sql_statements: list[str]
+    ):
+        """Тест подсчёта фасетов с подъёмом видов деятельности до верхнего уровня."""
+        first = Building(address="Первое", latitude=55.75, longitude=37.61)
+        second = Building(address="Второе", latitude=55.76, longitude=37.62)
+        food = Activity(name="Еда", level=1)
+        cars = Activity(name="Автомобили", level=1)
+        db_session.add_all([first, second, food, cars])
+        await db_session.commit()
+        meat = Activity(name="Мясо", parent_id=food.id, level=2)
+        milk = Activity(name="Молоко", parent_id=food.id, level=2)
+        db_session.add_all([meat, milk])
+        await db_session.commit()
+
+        await create_org(db_session, "Лавка 1", first.id, [], [meat.id, milk.id])
+        await create_org(db_session, "Лавка 2", first.id, [], [food.id, cars.id])
+        await create_org(db_session, "Лавка 3", second.id, [], [milk.id])
+        await create_org(db_session, "Автосалон", second.id, [], [cars.id])
+        await load_all(db_session)
+        sql_statements.clear()
+
+        facets = await count_facets(db_session, {"activity", "building"}, name="лавка")
+
+        assert facets == {
+            "activity": [{"id": food.id, "count": 3}, {"id": cars.id, "count": 1}],
+            "building": [{"id": first.id, "count": 2}, {"id": second.id, "count": 1}],
+        }
+        assert len(sql_statements) == 1
+
+        facets = await count_facets(db_session, {"building"}, activity_id=cars.id)
+
+        assert facets == {"building": [{"id": first.id, "count": 1}, {"id": second.id, "count": 1}]}
+
+    async def test_get_orgs_in_request_order(
+        self,
+        db_session: AsyncSession,
+        sample_building: Building,
+        sql_statements: list[str]
+    ):
+        """Тест получения организаций по списку идентификаторов одним запросом."""
+        first = await create_org(db_session, "Первая", sample_building.id, [], [])
+        second = await create_org(db_session, "Вторая", sample_building.id, [], [])
+        sql_statements.clear()
+
+        orgs = await get_orgs(db_session, [second.id, 99999, first.id, second.id])
+
+        assert [o.id if o else None for o in orgs] == [second.id, None, first.id, second.id]
+        assert len(sql_statements) == 1
+
+    async def test_get_org_batched_merges_concurrent_calls(
+        self,
+        db_session: AsyncSession,
+        sample_building: Building,
+        sql_statements: list[str],
+        monkeypatch
+    ):
+        """Тест объединения одновременных get_org_batched в один запрос при включённом окне."""
+        monkeypatch.setattr(settings, "ORG_BATCH_WINDOW_MS", 2.0)
+        monkeypatch.setattr(org_batch_loader, "window", 0.002)
+        first = await create_org(db_session, "Первая", sample_building.id, [], [])
+        second = await create_org(db_session, "Вторая", sample_building.id, [], [])
+        sql_statements.clear()
+
+        orgs = await asyncio.gather(
+            get_org_batched(db_session, first.id),
+            get_org_batched(db_session, second.id),
+            get_org_batched(db_session, first.id),
+            get_org_batched(db_session, 99999),
+        )
+
+        assert [o.id if o else None for o in orgs] == [first.id, second.id, first.id, None]
+        assert len([s for s in sql_statements if s.lstrip().upper().startswith("SELECT")]) == 1
+
+    async def test_load_organization_rows(
+        self,
+        db_session: AsyncSession,
+        sample_building: Building,
+        sample_activity: Activity,
+        sql_statements: list[str],
+        monkeypatch
+    ):
+        """Тест сборки словарей OrganizationOut из строк тремя запросами на выборку."""
+        monkeypatch.setattr(settings, "STREAM_YIELD_PER", 2)
+        orgs = [
+            await create_org(db_session, f"Организация {i}", sample_building.id, [f"{i}-111", f"{i}-222"], [sample_activity.id])
+            for i in range(3)
+        ]
+        orgs.append(await create_org(db_session, "Пустая", sample_building.id, [], []))
+        expected = [OrganizationOut.model_validate(o).model_dump() for o in orgs]
+        sql_statements.clear()
+
+        rows = await list_by_building(db_session, sample_building.id, loader=load_organization_rows)
+
+        assert len(sql_statements) == 3
+        assert [row.id for row in rows] == [o.id for o in orgs]
+        assert [row.data for row in rows] == expected
+
+        stmt = select(Organization).where(Organization.building_id == sample_building.id).order_by(Organization.id)
+        streamed = [row async for row in stream_organization_rows(db_session, stmt)]
+
+        assert [row.data for row in streamed] == expected
+
+    async def test_load_organization_refs(
+        self,
+        db_session: AsyncSession,
+        sample_building: Building,
+        sql_statements: list[str]
+    ):
+        """Тест загрузки зданий и видов деятельности один раз на выборку."""
+        food = Activity(name="Еда", parent_id=None, level=1)
+        db_session.add(food)
+        await db_session.commit()
+        meat = Activity(name="Мясо", parent_id=food.id, level=2)
+        db_session.add(meat)
+        await db_session.commit()
+        orgs = [
+            await create_org(db_session, f"Организация {i}", sample_building.id, [f"{i}-111"], [food.id, meat.id])
+            for i in range(10)
+        ]
+        orgs.append(await create_org(db_session, "Пустая", sample_building.id, [], []))
+        sql_statements.clear()
+
+        refs = await list_by_building(db_session, sample_building.id, loader=load_organization_refs)
+
+        assert len(sql_statements) == 5
+        assert [ref.id for ref in refs] == [o.id for o in orgs]
+        assert refs[0].data == {
+            "id": orgs[0].id,
+            "name": "Организация 0",
+            "building_id": sample_building.id,
+            "phones": [{"id": orgs[0].phones[0].id, "number": "0-111"}],
+            "activity_ids": [food.id, meat.id],
+        }
+        assert all(ref.building is refs[0].building for ref in refs)
+        assert refs[1].activities[0] is refs[0].activities[0]
+        assert refs[-1].data["activity_ids"] == [] and refs[-1].activities == []
+
+    async def test_stream_by_activity_with_descendants(
+        self,
+        db_session: AsyncSession,
+        sample_building: Building,
+        monkeypatch
+    ):
+        """Тест потоковой выдачи организаций по виду деятельности порциями."""
+        monkeypatch.setattr(settings, "STREAM_YIELD_PER", 2)
+        food = Activity(name="Еда", parent_id=None, level=1)
+        db_session.add(food)
+        await db_session.commit()
+        meat = Activity(name="Мясо", parent_id=food.id, level=2)
+        db_session.add(meat)
+        await db_session.commit()
+        orgs = [
+            await create_org(db_session, f"Организация {i}", sample_building.id, [f"{i}-111"], [food.id if i % 2 else meat.id])
+            for i in range(5)
+        ]
+        await create_org(db_session, "Без деятельности", sample_building.id, [], [])
+        expected = [OrganizationOut.model_validate(o).model_dump() for o in orgs]
+
+        streamed = [o async for o in stream_by_activity_with_descendants(db_session, food.id)]
+
+        assert [OrganizationOut.model_validate(o).model_dump() for o in streamed] == expected
+
+        rows = [
+            row async for row in stream_by_activity_with_descendants(
+                db_session, food.id, orgs[1].id, streamer=stream_organization_documents
+            )
+        ]
+
+        assert [json.loads(row.document) for row in rows] == expected[2:]
+
+    async def test_stream_in_rectangular_area(self, db_session: AsyncSession, sample_building: Building):
+        """Тест потоковой выдачи организаций в прямоугольной области."""
+        far = Building(address="Далеко", latitude=55.9, longitude=37.9)
+        db_session.add(far)
+        await db_session.commit()
+        org = await create_org(db_session, "В центре", sample_building.id, [], [])
+        await create_org(db_session, "Далеко", far.id, [], [])
+
+        streamed = [
+            o async for o in stream_in_rectangular_area(
+                db_session, sample_building.latitude, sample_building.longitude, 200, 200
+            )
+        ]
+
+        assert [o.id for o in streamed] == [org.id]
+        assert [o async for o in stream_in_rectangular_area(db_session, 0.0, 0.0, 200, 200)] == []
+
+    async def test_list_nearby(
+        self,
+        db_session: AsyncSession,
+        sample_activity: Activity
+    ):
+        """Тест поиска ближайших организаций с сортировкой по расстоянию."""
+        near = Building(address="В 111 м", latitude=55.751, longitude=37.618)
+        center = Building(address="Центр", latitude=55.750, longitude=37.618)
+        middle = Building(address="В 222 м", latitude=55.752, longitude=37.618)
+        far = Building(address="Далеко", latitude=55.800, longitude=37.618)
+        db_session.add_all([near, center, middle, far])
+        await db_session.commit()
+
+        org_near = await create_org(db_session, "Рядом", near.id, [], [sample_activity.id])
+        org_center = await create_org(db_session, "В центре", center.id, [], [])
+        org_middle = await create_org(db_session, "Подальше", middle.id, [], [])
+        await create_org(db_session, "Далеко", far.id, [], [])
+
+        results = await list_nearby(db_session, 55.750, 37.618, 500, 10)
+
+        assert [o.id for o in results] == [org_center.id, org_near.id, org_middle.id]
+        assert results[0].distance_m == pytest.approx(0, abs=0.01)
+        assert results[1].distance_m == pytest.approx(111.2, abs=0.5)
+        assert results[2].distance_m == pytest.approx(222.4, abs=0.5)
+        assert len(results[1].activities) == 1
+
+        results = await list_nearby(db_session, 55.750, 37.618, 500, 2)
+
+        assert [o.id for o in results] == [org_center.id, org_near.id]
+
+    async def test_list_nearby_excludes_bbox_corners(
+        self,
+        db_session: AsyncSession
+    ):
+        """Тест отсечения точек, попавших в прямоугольник, но лежащих вне радиуса."""
+        corner = Building(address="Угол", latitude=55.7508, longitude=37.6194)
+        db_session.add(corner)
+        await db_session.commit()
+        await create_org(db_session, "В углу", corner.id, [], [])
+
+        results = await list_nearby(db_session, 55.750, 37.618, 100, 10)
+
+        assert results == []
+
+    async def test_list_in_areas_batch(
+        self,
+        db_session: AsyncSession,
+        sql_statements: list[str]
+    ):
+        """Тест пакетного поиска по прямоугольникам и радиусам двумя запросами к БД."""
+        center = Building(address="Центр", latitude=55.750, longitude=37.618)
+        near = Building(address="В 111 м", latitude=55.751, longitude=37.618)
+        corner = Building(address="Угол", latitude=55.7508, longitude=37.6194)
+        remote = Building(address="Далеко", latitude=59.9, longitude=30.3)
+        db_session.add_all([center, near, corner, remote])
+        await db_session.commit()
+
+        org_near = await create_org(db_session, "Рядом", near.id, [], [])
+        org_center = await create_org(db_session, "В центре", center.id, [], [])
+        org_corner = await create_org(db_session, "В углу", corner.id, [], [])
+        org_remote = await create_org(db_session, "Далеко", remote.id, [], [])
+        sql_statements.clear()
+
+        results = await list_in_areas_batch(
+            db_session,
+            [
+                (55.750, 37.618, 1000, 1000, None),
+                (55.750, 37.618, 240, 240, 120),
+                (59.9, 30.3, 100, 100, None),
+                (0.0, 0.0, 100, 100, None),
+            ],
+            limit=10
+        )
+
+        assert [[o.id for o in group] for group in results] == [
+            [org_near.id, org_center.id, org_corner.id],
+            [org_center.id, org_near.id],
+            [org_remote.id],
+            [],
+        ]
+        assert len(sql_statements) == 2
+
+        sql_statements.clear()
+        results = await list_in_areas_batch(
+            db_session, [(55.750, 37.618, 1000, 1000, None), (55.750, 37.618, 240, 240, 120)], limit=1
+        )
+
+        assert [[o.id for o in group] for group in results] == [[org_near.id], [org_center.id]]
+        assert "LATERAL" in sql_statements[0] and "LIMIT" in sql_statements[0]
+
+    async def test_cluster_organizations(
+        self,
+        db_session: AsyncSession,
+        sample_activity: Activity
+    ):
+        """Тест группировки организаций по ячейкам сетки с фильтром по виду деятельности."""
+        first = Building(address="Первое", latitude=55.752, longitude=37.612)
+        second = Building(address="Второе", latitude=55.756, longitude=37.616)
+        remote = Building(address="Удалённое", latitude=55.805, longitude=37.705)
+        outside = Building(address="Вне области", latitude=59.9, longitude=30.3)
+        db_session.add_all([first, second, remote, outside])
+        await db_session.commit()
+        child = Activity(name="Дочерняя", parent_id=sample_activity.id, level=2)
+        db_session.add(child)
+        await db_session.commit()
+
+        await create_org(db_session, "Орг 1", first.id, [], [sample_activity.id])
+        await create_org(db_session, "Орг 2", first.id, [], [])
+        await create_org(db_session, "Орг 3", second.id, [], [child.id])
+        await create_org(db_session, "Орг 4", remote.id, [], [])
+        await create_org(db_session, "Орг 5", outside.id, [], [sample_activity.id])
+
+        clusters = await cluster_organizations(db_session, 55.0, 56.0, 37.0, 38.0, 0.01)
+
+        assert [c["count"] for c in clusters] == [3, 1]
+        assert clusters[0]["latitude"] == pytest.approx((55.752 * 2 + 55.756) / 3)
+        assert clusters[1]["longitude"] == pytest.approx(37.705)
+
+        clusters = await cluster_organizations(db_session, 55.0, 56.0, 37.0, 38.0, 0.01, sample_activity.id)
+
+        assert [c["count"] for c in clusters] == [2]
+
+        assert await cluster_organizations(db_session, 55.0, 56.0, 37.0, 38.0, 0.01, 99999) == []
+        assert cluster_cells(55.0, 56.0, 37.0, 38.0, 0.5) == 9
+
     async def test_create_org_minimal(
         self,
         db_session: AsyncSession,
@@ -0,0 +1,157 @@
+"""Тесты для версий строк и условных GET-запросов (ETag)."""
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.etag import etag_matches
+from app.crud.versions import activities_version, buildings_version, organization_version
+from app.models.activity import Activity
+from app.models.building import Building
+from app.models.organization import Organization
+from app.models.phone import Phone
+
+
+@pytest.mark.unit
+class TestEtagMatches:
+    """Тесты для сравнения ETag с If-None-Match."""
+
+    def test_weak_comparison(self):
+        """Тест слабого сравнения, списка значений и "*"."""
+        etag = 'W/"1-5"'
+        cases = [
+            ('W/"1-5"', True),
+            ('"1-5"', True),
+            ('"0-1", W/"1-5"', True),
+            ("*", True),
+            ('W/"1-6"', False),
+            ("", False),
+            (None, False),
+        ]
+        for header, expected in cases:
+            assert etag_matches(header, etag) is expected, header
+
+
+@pytest.mark.crud
+class TestRowVersions:
+    """Тесты для версий строк и версий ресурсов."""
+
+    async def test_update_bumps_version(self, db_session: AsyncSession, sample_building: Building):
+        """Тест увеличения версии строки и версии таблицы при изменении."""
+        before = await buildings_version(db_session)
+        version = sample_building.version
+
+        sample_building.address = "Новая улица, 1"
+        await db_session.commit()
+        await db_session.refresh(sample_building)
+
+        assert sample_building.version > version
+        assert await buildings_version(db_session) != before
+
+    async def test_delete_changes_table_version(self, db_session: AsyncSession, sample_building: Building):
+        """Тест смены версии таблицы при удалении строки с меньшей версией."""
+        db_session.add(Building(address="Вторая улица, 2", latitude=55.0, longitude=37.0))
+        await db_session.commit()
+        before = await buildings_version(db_session)
+
+        await db_session.execute(delete(Building).where(Building.id == sample_building.id))
+        await db_session.commit()
+
+        assert await buildings_version(db_session) != before
+
+    async def test_phone_and_activity_changes_bump_organization(
+        self, db_session: AsyncSession, sample_organization: Organization
+    ):
+        """Тест смены версии организации при изменении телефонов и видов деятельности."""
+        versions = [await organization_version(db_session, sample_organization.id)]
+
+        db_session.add(Phone(number="+70000000000", organization_id=sample_organization.id))
+        await db_session.commit()
+        versions.append(await organization_version(db_session, sample_organization.id))
+
+        activity = Activity(name="Другая деятельность", parent_id=None, level=1)
+        db_session.add(activity)
+        await db_session.commit()
+        await db_session.refresh(sample_organization)
+        await db_session.run_sync(lambda session: sample_organization.activities.append(activity))
+        await db_session.commit()
+        versions.append(await organization_version(db_session, sample_organization.id))
+
+        await db_session.execute(delete(Activity).where(Activity.id == activity.id))
+        await db_session.commit()
+        versions.append(await organization_version(db_session, sample_organization.id))
+
+        assert len(set(versions)) == len(versions)
+
+    async def test_missing_organization(self, db_session: AsyncSession):
+        """Тест отсутствия версии у несуществующей организации."""
+        assert await organization_version(db_session, 999999) is None
+        assert await activities_version(db_session) == "0-0"
+
+
+@pytest.mark.api
+class TestConditionalGetAPI:
+    """Тесты для ETag и ответов 304 Not Modified."""
+
+    async def test_not_modified_skips_query(
+        self,
+        client: AsyncClient,
+        api_headers: dict,
+        sample_building: Building,
+        sql_statements: list[str],
+        monkeypatch
+    ):
+        """Тест ответа 304 только по запросу версии, без основного запроса."""
+        monkeypatch.setattr(settings, "CACHE_ENABLED", False)
+        first = await client.get("/api/v1/buildings", headers=api_headers)
+        etag = first.headers["ETag"]
+        sql_statements.clear()
+
+        second = await client.get("/api/v1/buildings", headers={**api_headers, "If-None-Match": etag})
+
+        assert etag.startswith('W/"')
+        assert second.status_code == 304
+        assert second.headers["ETag"] == etag
+        assert second.content == b""
+        assert len(sql_statements) == 1
+        assert "version" in sql_statements[0]
+
+    async def test_change_produces_new_etag(
+        self,
+        client: AsyncClient,
+        api_headers: dict,
+        db_session: AsyncSession,
+        sample_organization: Organization
+    ):
+        """Тест нового ETag и ответа 200 после изменения организации."""
+        url = f"/api/v1/organizations/{sample_organization.id}"
+        etag = (await client.get(url, headers=api_headers)).headers["ETag"]
+
+        db_session.add(Phone(number="+71111111111", organization_id=sample_organization.id))
+        await db_session.commit()
+        await db_session.refresh(sample_organization)
+        response = await client.get(url, headers={**api_headers, "If-None-Match": etag})
+
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+        assert "+71111111111" in [phone["number"] for phone in response.json()["phones"]]
+
+    async def test_cache_hit_not_modified(self, client: AsyncClient, api_headers: dict, sql_statements: list[str]):
+        """Тест ответа 304 из кэша ответов при совпадении сохранённого ETag."""
+        etag = (await client.get("/api/v1/activities/tree", headers=api_headers)).headers["ETag"]
+        sql_statements.clear()
+
+        response = await client.get("/api/v1/activities/tree", headers={**api_headers, "If-None-Match": etag})
+
+        assert response.status_code == 304
+        assert response.headers["X-Cache"] == "HIT"
+        assert response.headers["ETag"] == etag
+        assert sql_statements == []
+
+    async def test_missing_organization_without_etag(self, client: AsyncClient, api_headers: dict, db_session: AsyncSession):
+        """Тест ответа 404 без ETag для несуществующей организации."""
+        response = await client.get("/api/v1/organizations/999999", headers={**api_headers, "If-None-Match": "*"})
+
+        assert response.status_code == 404
+        assert "ETag" not in response.headers
@@ -0,0 +1,171 @@
+"""Тесты для выбора полей ответа организаций (параметр fields)."""
+import json
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.loading import projection_loader
+from app.crud.organization import create_org
+from app.models.activity import Activity
+from app.models.building import Building
+from app.models.organization import Organization
+from app.schemas.organization import parse_fields, projected_model
+
+
+@pytest.mark.unit
+class TestParseFields:
+    """Тесты для разбора параметра fields."""
+
+    def test_parse(self):
+        """Тест разбора полей в порядке схемы OrganizationOut."""
+        assert parse_fields("building.longitude,id,building.latitude") == (
+            ("id", None), ("building", ("latitude", "longitude"))
+        )
+        assert parse_fields("building.id,building,name") == (("name", None), ("building", None))
+
+    def test_unknown_fields(self):
+        """Тест отклонения неизвестных полей."""
+        for value in ("foo", "building.foo", "name.id", "id,", ""):
+            with pytest.raises(ValueError):
+                parse_fields(value)
+
+    def test_model_cached(self):
+        """Тест создания схемы ответа один раз на набор полей."""
+        projection = parse_fields("id,building.latitude")
+        model = projected_model(projection)
+
+        assert model is projected_model(parse_fields("building.latitude,id"))
+        assert model.model_validate({"id": 1, "building": {"latitude": 55.0}}).model_dump() == {
+            "id": 1, "building": {"latitude": 55.0}
+        }
+        assert projection_loader(projection) is projection_loader(parse_fields("building.latitude,id"))
+
+
+@pytest.mark.crud
+class TestProjectionLoader:
+    """Тесты для загрузки только запрошенных полей."""
+
+    async def test_columns_only(
+        self,
+        db_session: AsyncSession,
+        sample_organization: Organization,
+        sql_statements: list[str]
+    ):
+        """Тест загрузки id и name без связанных сущностей."""
+        db_session.expunge_all()
+        sql_statements.clear()
+
+        orgs = await projection_loader(parse_fields("id,name"))(db_session, select(Organization))
+
+        assert [(o.id, o.name) for o in orgs] == [(sample_organization.id, sample_organization.name)]
+        assert len(sql_statements) == 1
+        assert "JOIN" not in sql_statements[0].upper()
+        assert "building_id" not in sql_statements[0]
+        with pytest.raises(InvalidRequestError):
+            orgs[0].phones
+
+    async def test_building_coordinates(
+        self,
+        db_session: AsyncSession,
+        sample_organization: Organization,
+        sql_statements: list[str]
+    ):
+        """Тест загрузки координат здания одним запросом без телефонов и видов деятельности."""
+        db_session.expunge_all()
+        sql_statements.clear()
+
+        orgs = await projection_loader(parse_fields("id,building.latitude,building.longitude"))(
+            db_session, select(Organization)
+        )
+
+        assert orgs[0].building.latitude == 55.751244
+        assert len(sql_statements) == 1
+        assert "address" not in sql_statements[0]
+        assert "phones" not in sql_statements[0]
+
+
+@pytest.mark.api
+class TestFieldsAPI:
+    """Тесты для параметра fields в API организаций."""
+
+    async def test_get_organization_fields(self, client: AsyncClient, api_headers: dict, sample_organization: Organization):
+        """Тест ответа только с запрошенными полями."""
+        response = await client.get(
+            f"/api/v1/organizations/{sample_organization.id}",
+            params={"fields": "id,name,activities.name"},
+            headers=api_headers
+        )
+
+        assert response.status_code == 200
+        assert response.json() == {
+            "id": sample_organization.id,
+            "name": sample_organization.name,
+            "activities": [{"name": "Тестовая деятельность"}],
+        }
+
+    async def test_list_fields_with_cursor(
+        self,
+        client: AsyncClient,
+        api_headers: dict,
+        db_session: AsyncSession,
+        sample_building: Building,
+        sample_activity: Activity
+    ):
+        """Тест списка с полями и курсором следующей страницы."""
+        orgs = [await create_org(db_session, f"Организация {i}", sample_building.id, [], [sample_activity.id]) for i in range(3)]
+        url = f"/api/v1/activities/{sample_activity.id}/organizations"
+        params = {"fields": "id,building.latitude,building.longitude", "limit": 2}
+
+        response = await client.get(url, params=params, headers=api_headers)
+
+        assert response.status_code == 200
+        assert response.json() == [
+            {"id": org.id, "building": {"latitude": sample_building.latitude, "longitude": sample_building.longitude}}
+            for org in orgs[:2]
+        ]
+        assert "X-Next-Cursor" in response.headers
+
+        response = await client.get(url, params={**params, "stream": 1}, headers=api_headers)
+
+        assert [json.loads(line)["id"] for line in response.text.splitlines()] == [org.id for org in orgs]
+
+    async def test_batch_and_search_fields(
+        self,
+        client: AsyncClient,
+        api_headers: dict,
+        sample_organization: Organization
+    ):
+        """Тест полей в пакетном получении и в поиске с фасетами."""
+        response = await client.get(
+            "/api/v1/organizations",
+            params={"ids": f"{sample_organization.id},99999", "fields": "name"},
+            headers=api_headers
+        )
+
+        assert response.json() == [
+            {"id": sample_organization.id, "organization": {"name": sample_organization.name}},
+            {"id": 99999, "organization": None},
+        ]
+
+        response = await client.get(
+            "/api/v1/organizations/search",
+            params={"name": "тест", "fields": "id", "facets": "building"},
+            headers=api_headers
+        )
+
+        assert response.json()["items"] == [{"id": sample_organization.id}]
+
+    async def test_invalid_fields(self, client: AsyncClient, api_headers: dict, sample_organization: Organization):
+        """Тест ответа 400 для неизвестных полей и полей вместе с format=normalized."""
+        for params in ({"fields": "id,secret"}, {"fields": "id", "format": "normalized"}):
+            response = await client.get(
+                f"/api/v1/buildings/{sample_organization.building_id}/organizations",
+                params=params,
+                headers=api_headers
+            )
+
+            assert response.status_code == 400
+            assert response.json()["detail"] == "Invalid fields"
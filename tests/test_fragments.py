@@ -0,0 +1,148 @@
+"""Тесты для кэша JSON-фрагментов организаций."""
+import json
+
+import pytest
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.fragments import FragmentCache, org_fragments
+from app.crud.loading import load_organization_fragments
+from app.crud.organization import create_org, list_by_building
+from app.models.activity import Activity
+from app.models.building import Building
+from app.models.organization import Organization
+from app.models.phone import Phone
+from app.schemas.organization import OrganizationOut
+
+
+def _cached(org_ids: list[int]) -> set[int]:
+    return {org_id for org_id in org_ids if org_id in org_fragments._entries}
+
+
+@pytest.mark.unit
+class TestFragmentCache:
+    """Тесты для структуры FragmentCache."""
+
+    def test_lru_eviction_by_bytes(self):
+        """Тест вытеснения давно не использованных фрагментов по объёму."""
+        cache = FragmentCache(max_bytes=10)
+        cache.put(1, "v1", "aaaa", cache.generation)
+        cache.put(2, "v1", "ёёё", cache.generation)
+        cache.get_many(dict.fromkeys([1], "v1"))
+        cache.put(3, "v1", "cccc", cache.generation)
+
+        assert cache.get_many(dict.fromkeys([1, 2, 3], "v1")) == {1: "aaaa", 3: "cccc"}
+        assert cache.stats()["bytes"] == 8
+        assert cache.stats()["evictions"] == 1
+
+    def test_oversized_fragment_not_stored(self):
+        """Тест отказа сохранять фрагмент больше всего бюджета."""
+        cache = FragmentCache(max_bytes=3)
+        cache.put(1, "v1", "aaaa", cache.generation)
+
+        assert cache.get_many(dict.fromkeys([1], "v1")) == {}
+        assert cache.stats()["bytes"] == 0
+
+    def test_stale_put_is_ignored(self):
+        """Тест отказа сохранять фрагмент, вычисленный до сброса."""
+        cache = FragmentCache(max_bytes=100)
+        generation = cache.generation
+        cache.invalidate([1])
+        cache.put(1, "v1", "a", generation)
+
+        assert cache.get_many(dict.fromkeys([1], "v1")) == {}
+
+    def test_other_version_is_miss(self):
+        """Тест промаха для фрагмента другой версии документа."""
+        cache = FragmentCache(max_bytes=100)
+        cache.put(1, "v1", "a", cache.generation)
+
+        assert cache.get_many({1: "v2"}) == {}
+        assert cache.get_many({1: "v1"}) == {1: "a"}
+
+    def test_invalidate(self):
+        """Тест сброса фрагментов отдельных организаций и всех сразу."""
+        cache = FragmentCache(max_bytes=100)
+        for org_id in (1, 2, 3):
+            cache.put(org_id, "v1", str(org_id), cache.generation)
+        cache.invalidate([2])
+
+        assert cache.get_many(dict.fromkeys([1, 2, 3], "v1")) == {1: "1", 3: "3"}
+
+        cache.invalidate()
+
+        assert cache.get_many(dict.fromkeys([1, 3], "v1")) == {}
+        assert cache.stats()["bytes"] == 0
+
+
+@pytest.mark.crud
+class TestOrganizationFragments:
+    """Тесты для загрузки организаций через кэш фрагментов."""
+
+    async def test_hits_skip_documents_query(
+        self,
+        db_session: AsyncSession,
+        sample_building: Building,
+        sql_statements: list[str]
+    ):
+        """Тест повторной выборки одним запросом id без сборки документов."""
+        orgs = [await create_org(db_session, f"Организация {i}", sample_building.id, [f"{i}-111"], []) for i in range(3)]
+        expected = [OrganizationOut.model_validate(o).model_dump() for o in orgs]
+        first = await list_by_building(db_session, sample_building.id, loader=load_organization_fragments)
+        sql_statements.clear()
+
+        second = await list_by_building(db_session, sample_building.id, loader=load_organization_fragments)
+
+        assert [json.loads(row.document) for row in first] == expected
+        assert second == first
+        assert len(sql_statements) == 1
+        assert org_fragments.stats()["entries"] == 3
+
+    async def test_changes_invalidate_fragments(self, db_session: AsyncSession, sample_building: Building):
+        """Тест сброса фрагментов при изменении организации, телефона и здания."""
+        org = await create_org(db_session, "Организация", sample_building.id, [], [])
+        other = await create_org(db_session, "Другая", sample_building.id, [], [])
+        stmt = select(Organization).where(Organization.building_id == sample_building.id).order_by(Organization.id)
+        await load_organization_fragments(db_session, stmt)
+
+        db_session.add(Phone(number="1-111", organization_id=org.id))
+        await db_session.commit()
+
+        assert _cached([org.id, other.id]) == {other.id}
+        rows = await load_organization_fragments(db_session, stmt)
+        assert json.loads(rows[0].document)["phones"][0]["number"] == "1-111"
+
+        sample_building.address = "Новый адрес"
+        await db_session.commit()
+
+        assert _cached([org.id, other.id]) == set()
+        rows = await load_organization_fragments(db_session, stmt)
+        assert {json.loads(row.document)["building"]["address"] for row in rows} == {"Новый адрес"}
+
+    async def test_new_organization_with_activity_keeps_other_fragments(
+        self,
+        db_session: AsyncSession,
+        sample_building: Building,
+        sample_organization: Organization,
+        sample_activity: Activity
+    ):
+        """Тест сохранения чужих фрагментов при создании организации с видом деятельности."""
+        stmt = select(Organization).where(Organization.building_id == sample_building.id)
+        await load_organization_fragments(db_session, stmt)
+
+        await create_org(db_session, "Новая", sample_building.id, [], [sample_activity.id])
+
+        assert _cached([sample_organization.id]) == {sample_organization.id}
+
+    async def test_change_without_event_not_served(self, db_session: AsyncSession, sample_organization: Organization):
+        """Тест отказа отдавать фрагмент, если изменение не дошло до процесса событием."""
+        stmt = select(Organization).where(Organization.id == sample_organization.id)
+        await load_organization_fragments(db_session, stmt)
+
+        await db_session.execute(
+            update(Organization).where(Organization.id == sample_organization.id).values(name="Переименована")
+        )
+        await db_session.commit()
+        rows = await load_organization_fragments(db_session, stmt)
+
+        assert json.loads(rows[0].document)["name"] == "Переименована"
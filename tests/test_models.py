@@ -3,7 +3,7 @@ import pytest
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.activity import Activity
+from app.models.activity import Activity, activity_closure
 from app.models.building import Building
 from app.models.organization import Organization
 from app.models.phone import Phone
@@ -40,6 +40,27 @@ class TestModels:
         assert child.parent_id == parent.id
         assert child.level == 2
 
+    async def test_activity_closure_maintained(self, db_session: AsyncSession):
+        """Тест заполнения таблицы замыкания при вставке видов деятельности."""
+        root = Activity(name="Еда", parent_id=None, level=1)
+        db_session.add(root)
+        await db_session.commit()
+
+        child = Activity(name="Мясо", parent_id=root.id, level=2)
+        db_session.add(child)
+        await db_session.commit()
+
+        grandchild = Activity(name="Говядина", parent_id=child.id, level=3)
+        db_session.add(grandchild)
+        await db_session.commit()
+
+        result = await db_session.execute(
+            select(activity_closure.c.ancestor_id, activity_closure.c.depth)
+            .where(activity_closure.c.descendant_id == grandchild.id)
+            .order_by(activity_closure.c.depth)
+        )
+        assert result.all() == [(grandchild.id, 0), (child.id, 1), (root.id, 2)]
+
     async def test_building_model(self, db_session: AsyncSession):
         """Тест модели Building."""
         building = Building(
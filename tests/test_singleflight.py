@@ -0,0 +1,138 @@
+"""Тесты для объединения одинаковых одновременных запросов."""
+import asyncio
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.singleflight import SingleFlight
+from app.crud.organization import create_org, list_by_activity_with_descendants
+from app.indexes.activity_tree import activity_tree
+from app.models.activity import Activity
+from app.models.building import Building
+
+
+@pytest.mark.unit
+class TestSingleFlight:
+    """Тесты для структуры SingleFlight."""
+
+    async def test_concurrent_calls_share_result(self):
+        """Тест одного выполнения для одновременных вызовов с одним ключом."""
+        flights = SingleFlight()
+        calls = 0
+        release = asyncio.Event()
+
+        async def load():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return ["результат"]
+
+        waiters = [asyncio.create_task(flights.do("key", load)) for _ in range(5)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*waiters)
+
+        assert calls == 1
+        assert all(result is results[0] for result in results)
+        assert not flights.in_flight("key")
+
+    async def test_error_propagates_to_all(self):
+        """Тест передачи исключения всем ожидающим."""
+        flights = SingleFlight()
+        release = asyncio.Event()
+
+        async def fail():
+            await release.wait()
+            raise ValueError("ошибка")
+
+        waiters = [asyncio.create_task(flights.do("key", fail)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+
+        assert all(isinstance(result, ValueError) for result in results)
+        assert not flights.in_flight("key")
+
+    async def test_cancelled_waiter_does_not_cancel_others(self):
+        """Тест отмены одного ожидающего без отмены общего вызова."""
+        flights = SingleFlight()
+        release = asyncio.Event()
+
+        async def load():
+            await release.wait()
+            return 42
+
+        first = asyncio.create_task(flights.do("key", load))
+        second = asyncio.create_task(flights.do("key", load))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await second == 42
+        assert first.cancelled()
+
+    async def test_task_cancelled_without_waiters(self):
+        """Тест отмены общего вызова, когда ожидающих не осталось."""
+        flights = SingleFlight()
+        started = asyncio.Event()
+        cancelled = asyncio.Event()
+
+        async def load():
+            started.set()
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        waiter = asyncio.create_task(flights.do("key", load))
+        await started.wait()
+        waiter.cancel()
+        await asyncio.wait_for(cancelled.wait(), timeout=1)
+
+        assert waiter.cancelled()
+        assert not flights.in_flight("key")
+
+
+@pytest.mark.crud
+class TestCoalescedReads:
+    """Тесты для объединения одновременных чтений CRUD."""
+
+    async def test_concurrent_reads_run_one_query(
+        self,
+        db_session: AsyncSession,
+        sample_building: Building,
+        sample_activity: Activity,
+        sql_statements: list[str]
+    ):
+        """Тест одного запроса к БД для одинаковых одновременных вызовов."""
+        org = await create_org(db_session, "Организация", sample_building.id, [], [sample_activity.id])
+        await activity_tree.ensure_loaded(db_session)
+        sql_statements.clear()
+
+        results = await asyncio.gather(*(
+            list_by_activity_with_descendants(db_session, sample_activity.id, 10) for _ in range(5)
+        ))
+
+        assert [[o.id for o in orgs] for orgs in results] == [[org.id]] * 5
+        assert results[0][0].activities[0].id == sample_activity.id
+        selects = [s for s in sql_statements if s.lstrip().upper().startswith("SELECT")]
+        assert len(selects) == 1
+
+    async def test_disabled(
+        self,
+        db_session: AsyncSession,
+        sample_building: Building,
+        sample_activity: Activity,
+        monkeypatch
+    ):
+        """Тест чтения в сессии вызывающего при отключенном объединении."""
+        monkeypatch.setattr(settings, "SINGLEFLIGHT_ENABLED", False)
+        org = await create_org(db_session, "Организация", sample_building.id, [], [sample_activity.id])
+
+        orgs = await list_by_activity_with_descendants(db_session, sample_activity.id, 10)
+
+        assert orgs == [org]
+        assert orgs[0] in db_session